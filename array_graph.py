@@ -0,0 +1,732 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module contains ArrayGraph, an array-backed alternative to the Graph class in 'classes.py'. It has the same
+public methods as Graph, so a LineupSimulation can use either one (see GRAPH_BACKENDS in 'main.py').
+
+Instead of one _Connection class per edge, ArrayGraph gives every player an integer id and keeps the directed pass
+counts, assists and minutes together of every connection in NumPy arrays. Small or dense graphs are stored as
+dense matrices, and large sparse graphs (like a whole league, where players only pass to their own teammates) are
+stored in compressed sparse row (CSR) form. Passes per minute, assists per pass and synergy scores are then
+computed for every connection at once.
+
+The arrays speed up the methods that work on every connection at once, such as pass_matrix and synergy_matrix.
+The methods about one player or one connection, such as get_passes_per_minute_dict and get_connection, read the
+row of that player in the arrays, or a _Connection class, that is built the first time it is needed and kept until
+the graph changes, so they take about as long as the same methods of Graph.
+"""
+from __future__ import annotations
+import copy
+import heapq
+from typing import Any, Callable, NamedTuple, Optional, Union
+
+import numpy as np
+
+import instrumentation
+from classes import Graph, _Player, _Connection, POSITION_WEIGHTS, apply_box_scores
+
+# Graphs with at most this many players, or at least this fraction of all possible connections, are stored densely
+DENSE_MAX_PLAYERS = 64
+DENSE_MIN_DENSITY = 0.05
+
+
+class CSRMatrix(NamedTuple):
+    """ A square matrix in compressed sparse row form. The values of row i are data[indptr[i]:indptr[i + 1]],
+    in the columns indices[indptr[i]:indptr[i + 1]].
+
+    Instance Attributes:
+        - data: The stored values of the matrix
+        - indices: The column of each stored value
+        - indptr: Where each row starts and ends in data and indices
+        - shape: The number of rows and columns of the matrix
+    """
+    data: np.ndarray
+    indices: np.ndarray
+    indptr: np.ndarray
+    shape: tuple[int, int]
+
+    def toarray(self) -> np.ndarray:
+        """Return this matrix as a dense NumPy array."""
+        dense = np.zeros(self.shape, dtype=self.data.dtype)
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        dense[rows, self.indices] = self.data
+        return dense
+
+
+class ArrayGraph:
+    """ A graph whose vertices are _Player classes, with its connections stored in NumPy arrays.
+    Representation Invariants:
+    - all(name == self._players[name].name for name in self._players)
+    - all(self._names[self._ids[name]] == name for name in self._ids)
+    """
+    # Private Instance Attributes:
+    #     - _players: Maps each player name to its _Player class.
+    #     - _ids: Maps each player name to its integer id.
+    #     - _names: The player names, indexed by integer id.
+    #     - _pairs: Maps each connection, as a (smaller id, larger id) tuple, to its two ids in the order the
+    #               connection was first added.
+    #     - _adjacency: _adjacency[i] holds the ids of every player connected to the player with id i, in the
+    #                   order the connections were added.
+    #     - _directed: Maps (passer id, receiver id) to the (passes, assists, minutes together) of that direction.
+    #     - _compiled: The arrays built from _pairs and _directed, or None if they need to be rebuilt.
+    #     - _rows: Maps a player id to the dict of the average passes per minute of that player to every player it is
+    #              connected to, read from _compiled since this graph last changed.
+    #     - _built: Maps each connection, in the same way as _pairs, to the _Connection class built with its
+    #               statistics since this graph last changed.
+    #     - _version: The number of times a player or the passes of a connection were added to this graph.
+    #     - _cache: Maps a key to a result calculated from this graph (see get_cached), since it last changed.
+    #     - _weights: The weight table the player_impact_estimate of every player is calculated with.
+    _players: dict[str, _Player]
+    _ids: dict[str, int]
+    _names: list[str]
+    _pairs: dict[tuple[int, int], tuple[int, int]]
+    _adjacency: list[list[int]]
+    _directed: dict[tuple[int, int], tuple[float, float, float]]
+    _compiled: Optional[dict[str, Union[str, np.ndarray]]]
+    _rows: dict[int, dict[str, float]]
+    _built: dict[tuple[int, int], _Connection]
+    _version: int
+    _cache: dict
+    _weights: dict[str, dict[str, float]]
+
+    def __init__(self) -> None:
+        """
+        Initializes an empty ArrayGraph.
+        """
+        self._players = {}
+        self._ids = {}
+        self._names = []
+        self._pairs = {}
+        self._adjacency = []
+        self._directed = {}
+        self._compiled = None
+        self._rows = {}
+        self._built = {}
+        self._version = 0
+        self._cache = {}
+        self._weights = POSITION_WEIGHTS
+
+    @classmethod
+    def from_graph(cls, graph: Graph) -> ArrayGraph:
+        """
+        Return a new ArrayGraph with the same players and connections as the given Graph.
+
+        >>> g = Graph()
+        >>> g.add_player(_Player("Bob", "LAL", ["Center"], 5, 5, 5, 5, 5, 5))
+        >>> g.add_player(_Player("Ann", "LAL", ["Guard"], 5, 5, 5, 5, 5, 5))
+        >>> g.add_connection(g.get_player("Bob"), "Ann", 1, 4, 10)
+        >>> a = ArrayGraph.from_graph(g)
+        >>> a.get_order() == g.get_order()
+        True
+        >>> a.get_connection("Ann", "Bob").avg_passes_per_minute_player1
+        0.4
+        """
+        array_graph = cls()
+        array_graph.set_weights(graph.get_weights())
+        for player in graph.get_players():
+            array_graph.add_player(player)
+        for connection in graph.get_connections():
+            array_graph.insert_connection(connection)
+        return array_graph
+
+    def add_player(self, player: _Player) -> None:
+        """
+        If _Player class name is not in this graph, add it and give it the next integer id.
+
+        >>> p = _Player("Bob", "LAL", ["Center"], 5, 5, 5, 5, 5, 5)
+        >>> g = ArrayGraph()
+        >>> g.add_player(p)
+        >>> g.get_players() == [p]
+        True
+        """
+        if player.name not in self._players:
+            self._players[player.name] = player
+            self._ids[player.name] = len(self._names)
+            self._names.append(player.name)
+            self._adjacency.append([])
+            self._changed()
+
+    def get_players(self) -> list[_Player]:
+        """
+        Returns a list of every _Player class in this graph, in the order they were added.
+        """
+        return list(self._players.values())
+
+    def get_player(self, name: str) -> Optional[_Player]:
+        """
+        Returns the _Player class with the given name, or None if there is no such player in this graph.
+        """
+        return self._players.get(name)
+
+    def add_connection(self, player1: _Player, player2: str, assist: [int, float], passes: [int, float],
+                       minutes_together: [int, float]) -> None:
+        """
+        Sets the passing statistics of player1 passing to player2, adding a connection between them if needed.
+
+        Preconditions:
+            - player2 in self._players
+        """
+        passer, receiver = self._ids[player1.name], self._ids[player2]
+        pair = (min(passer, receiver), max(passer, receiver))
+        if pair not in self._pairs:
+            self._link(passer, receiver)
+            if instrumentation.ENABLED:
+                instrumentation.count('edges_created')
+        self._directed[(passer, receiver)] = (passes, assist, minutes_together)
+        self._changed()
+
+    def insert_connection(self, connection: _Connection) -> None:
+        """
+        Adds an already built _Connection class to this graph, using the pass totals it holds.
+
+        Preconditions:
+            - all(player.name in self._players for player in connection.player_connection)
+        """
+        player1, player2 = connection.player_connection
+        directions = ((player1, player2, connection.player1_total_assists, connection.player1_total_passes,
+                       connection.player1_minutes_together),
+                      (player2, player1, connection.player2_total_assists, connection.player2_total_passes,
+                       connection.player2_minutes_together))
+        for passer, receiver, assists, passes, minutes_together in directions:
+            if passes > 0 or minutes_together > 0:
+                self.add_connection(passer, receiver.name, assists, passes, minutes_together)
+
+        id1, id2 = self._ids[player1.name], self._ids[player2.name]
+        if (min(id1, id2), max(id1, id2)) not in self._pairs:
+            self._link(id1, id2)
+        self._pairs[(min(id1, id2), max(id1, id2))] = (id1, id2)
+        self._changed()
+
+    def apply_game(self, game: list[dict]) -> set[str]:
+        """
+        Add the box score and passes of one game to this graph without rebuilding it, and return the names of the
+        players whose statistics changed. Players that are not in this graph yet are added.
+
+        >>> g = ArrayGraph()
+        >>> g.add_player(_Player("Bob", "LAL", ["Center"], 5, 5, 5, 10, 5, 5))
+        >>> stats = {'points': 4, 'rebounds': 2, 'steals': 0, 'blocks': 1, 'minutes': 10}
+        >>> pass_to_ann = {'positions': ['Guard'], 'total_passes': 6, 'assists': 1, 'minutes_together': 10}
+        >>> game = [{'name': 'Bob', 'team': 'LAL', 'positions': ['Center'], 'defensive_stats': stats,
+        ...          'passes_to': {'Ann': pass_to_ann}},
+        ...         {'name': 'Ann', 'team': 'LAL', 'positions': ['Guard'], 'defensive_stats': stats, 'passes_to': {}}]
+        >>> sorted(g.apply_game(game))
+        ['Ann', 'Bob']
+        >>> g.get_player("Bob").minutes, g.top_passing_partners("Bob")
+        (20, [('Ann', 0.6)])
+
+        Preconditions:
+            - game in same format as the LAL.json and DAL.json files, holding the statistics of a single game
+            - every player in game played more than 0 minutes in total
+        """
+        affected = apply_box_scores(self, game)
+        for record in game:
+            passer = self._ids[record['name']]
+            for receiver_name, passes in record['passes_to'].items():
+                receiver = self._ids[receiver_name]
+                previous = self._directed.get((passer, receiver))
+                if previous is None:
+                    previous = (0, 0, 0)
+                    if ((passer, receiver) if passer < receiver else (receiver, passer)) not in self._pairs:
+                        self._link(passer, receiver)
+                        if instrumentation.ENABLED:
+                            instrumentation.count('edges_created')
+                self._directed[(passer, receiver)] = (previous[0] + passes['total_passes'],
+                                                      previous[1] + passes['assists'],
+                                                      previous[2] + passes['minutes_together'])
+        # The arrays and cached results are only rebuilt once for the whole game
+        self._changed()
+        return affected
+
+    def check_exists(self, player1_name: str, player2_name: str) -> bool:
+        """
+        Check whether player1_name and player2_name are connected.
+
+        >>> g = ArrayGraph()
+        >>> for name in ("Bob", "Ann", "Cal"):
+        ...     g.add_player(_Player(name, "LAL", ["Guard"], 5, 5, 5, 5, 5, 5))
+        >>> g.add_connection(g.get_player("Bob"), "Ann", 1, 4, 10)
+        >>> g.check_exists("Ann", "Bob"), g.check_exists("Bob", "Cal")
+        (True, False)
+
+        Preconditions:
+            - player1_name in self._players and player2_name in self._players
+        """
+        id1, id2 = self._ids[player1_name], self._ids[player2_name]
+        if instrumentation.ENABLED:
+            instrumentation.count('check_exists_lookups')
+        return ((id1, id2) if id1 < id2 else (id2, id1)) in self._pairs
+
+    def __str__(self) -> str:
+        str_so_far = "PLAYERS\n"
+        for player in self._players:
+            str_so_far += f'\n{player}'
+
+        str_so_far += '\n=================================\nCONNECTIONS\n'
+        for (id1, id2) in self._pairs.values():
+            str_so_far += f'\n{self._names[id1]} <---> {self._names[id2]}'
+
+        return str_so_far
+
+    def get_passes_per_minute_dict(self, player1_name: str, player_names: Optional[list] = None) -> dict:
+        """
+        Returns a dict of the average passes per minute of the given player1_name to all the players in
+        player_names, by default every player player1_name is connected to. Players that player1_name never
+        passed to have 0 passes per minute.
+
+        Preconditions:
+            - player1_name in self._players
+            - player_names is None or all([player in self._players for player in player_names])
+        """
+        if player_names is None:
+            return dict(self.top_passing_partners(player1_name, None))
+
+        row = self._row(self._ids[player1_name])
+        return {name: row.get(name, 0.0) for name in player_names}
+
+    def neighbours(self, player_name: str) -> list[str]:
+        """
+        Returns the names of every player connected to player_name, in the order the connections were added.
+        This takes time proportional to the number of connections of player_name, not of this graph.
+
+        Preconditions:
+            - player_name in self._players
+        """
+        return [self._names[i] for i in self._adjacency[self._ids[player_name]]]
+
+    def top_passing_partners(self, player_name: str, k: Optional[int] = 5) -> list[tuple[str, float]]:
+        """
+        Returns the (name, average passes per minute) of the k players that player_name passes to the most per
+        minute, from the most, or of every connected player in the order the connections were added if k is None.
+        Ties go to the connection that was added first.
+
+        >>> g = ArrayGraph()
+        >>> for name in ("Bob", "Ann", "Cal", "Dee"):
+        ...     g.add_player(_Player(name, "LAL", ["Guard"], 5, 5, 5, 5, 5, 5))
+        >>> g.add_connection(g.get_player("Bob"), "Ann", 1, 4, 10)
+        >>> g.add_connection(g.get_player("Bob"), "Cal", 1, 8, 10)
+        >>> g.add_connection(g.get_player("Bob"), "Dee", 0, 4, 10)
+        >>> g.top_passing_partners("Bob", 2)
+        [('Cal', 0.8), ('Ann', 0.4)]
+        >>> g.neighbours("Bob"), g.get_passes_per_minute_dict("Ann")
+        (['Ann', 'Cal', 'Dee'], {'Bob': 0.0})
+
+        Preconditions:
+            - player_name in self._players
+            - k is None or k >= 0
+        """
+        passer = self._ids[player_name]
+        row = self._row(passer)
+        partners = [(self._names[receiver], row[self._names[receiver]]) for receiver in self._adjacency[passer]]
+        if k is None:
+            return partners
+        return heapq.nlargest(k, partners, key=lambda item: item[1])
+
+    def ego_network(self, player_name: str, radius: int = 1) -> ArrayGraph:
+        """
+        Returns a new ArrayGraph of player_name, every player within radius connections of player_name, and every
+        connection between those players. The players of the new ArrayGraph are copies, so changing it does not
+        change this graph.
+
+        The players are found by going out from player_name one connection at a time, so this takes time
+        proportional to the connections of those players, not of this graph.
+
+        Preconditions:
+            - player_name in self._players
+            - radius >= 0
+        """
+        ids = [self._ids[player_name]]
+        found = set(ids)
+        frontier = list(ids)
+        for _ in range(radius):
+            next_frontier = []
+            for i in frontier:
+                for neighbour in self._adjacency[i]:
+                    if neighbour not in found:
+                        found.add(neighbour)
+                        ids.append(neighbour)
+                        next_frontier.append(neighbour)
+            frontier = next_frontier
+
+        ego = ArrayGraph()
+        ego.set_weights(self._weights)
+        for i in ids:
+            player = copy.copy(self._players[self._names[i]])
+            player.connections = []
+            ego.add_player(player)
+
+        for i in ids:
+            for neighbour in self._adjacency[i]:
+                first, second = self._pairs[(min(i, neighbour), max(i, neighbour))]
+                # Each connection between two found players is copied once, from the side of its first player
+                if neighbour in found and first == i:
+                    ego_first, ego_second = ego._ids[self._names[first]], ego._ids[self._names[second]]
+                    ego._link(ego_first, ego_second)
+                    for passer, receiver, ego_passer, ego_receiver in ((first, second, ego_first, ego_second),
+                                                                       (second, first, ego_second, ego_first)):
+                        if (passer, receiver) in self._directed:
+                            ego._directed[(ego_passer, ego_receiver)] = self._directed[(passer, receiver)]
+        ego._changed()
+        return ego
+
+    def get_connection_key(self, player1_name: str, player2_name: str) -> tuple[str, str]:
+        """
+        Returns the two names of the connection between player1_name and player2_name, in the order the
+        connection was first added.
+
+        Preconditions:
+            - player1_name in self._players and player2_name in self._players
+        """
+        first, second = self._pairs.get(self._pair(player1_name, player2_name),
+                                        (self._ids[player2_name], self._ids[player1_name]))
+        return (self._names[first], self._names[second])
+
+    def get_connection(self, player1_name: str, player2_name: str) -> Optional[_Connection]:
+        """
+        Returns a _Connection class with the statistics of the connection between player1_name and player2_name,
+        or None if the two players have no connection. The same _Connection class is returned until this graph
+        changes, so it should not be changed.
+        """
+        pair = self._pair(player1_name, player2_name)
+        if pair in self._built:
+            return self._built[pair]
+        return self._connection(pair) if pair in self._pairs else None
+
+    def get_connections(self) -> list[_Connection]:
+        """
+        Returns a list of _Connection classes with the statistics of every connection in this graph, in the order
+        the connections were added. As with get_connection, they should not be changed.
+        """
+        return [self._connection(pair) for pair in self._pairs]
+
+    def remove_player(self, name: str) -> list[_Connection]:
+        """
+        Remove the _Player class with the given name and all of its connections from this graph, and return the
+        removed _Connection classes, like Graph.remove_player. Every player added after the removed one moves down
+        to the previous integer id, so the ids stay 0 to the number of players - 1.
+
+        >>> g = ArrayGraph()
+        >>> g.add_player(_Player("Bob", "LAL", ["Center"], 5, 5, 5, 5, 5, 5))
+        >>> g.add_player(_Player("Ann", "LAL", ["Guard"], 5, 5, 5, 5, 5, 5))
+        >>> g.add_connection(g.get_player("Bob"), "Ann", 1, 4, 10)
+        >>> len(g.remove_player("Bob")), g.get_player_names(), g.get_connections()
+        (1, ['Ann'], [])
+
+        Preconditions:
+            - name in self._players
+        """
+        removed_id = self._ids[name]
+        removed = [self._connection(self._pair(name, self._names[other])) for other in self._adjacency[removed_id]]
+
+        def new_id(i: int) -> int:
+            """Return the id after the removal of the player whose id was i."""
+            return i if i < removed_id else i - 1
+
+        del self._players[name]
+        del self._names[removed_id]
+        del self._adjacency[removed_id]
+        self._ids = {player_name: i for i, player_name in enumerate(self._names)}
+        self._adjacency = [[new_id(j) for j in neighbours if j != removed_id] for neighbours in self._adjacency]
+        # new_id keeps the order of the ids, so every (smaller id, larger id) key stays in that order
+        self._pairs = {(new_id(i), new_id(j)): (new_id(first), new_id(second))
+                       for (i, j), (first, second) in self._pairs.items() if removed_id not in (i, j)}
+        self._directed = {(new_id(passer), new_id(receiver)): stats
+                          for (passer, receiver), stats in self._directed.items()
+                          if removed_id not in (passer, receiver)}
+        self._changed()
+        return removed
+
+    def get_order(self) -> tuple[list[str], list[tuple[str, str]]]:
+        """
+        Returns the names of the players and the (player1 name, player2 name) of the connections of this graph, in
+        the order of get_players and get_connections, like Graph.get_order.
+        """
+        return list(self._names), [(self._names[first], self._names[second]) for first, second in self._pairs.values()]
+
+    def restore_order(self, order: tuple[list[str], list[tuple[str, str]]]) -> None:
+        """
+        Put the players and connections of this graph back in the given order from get_order, like
+        Graph.restore_order. The players get their integer ids in that order.
+
+        >>> g = ArrayGraph()
+        >>> for name in ("Bob", "Ann", "Cal"):
+        ...     g.add_player(_Player(name, "LAL", ["Guard"], 5, 5, 5, 5, 5, 5))
+        >>> g.add_connection(g.get_player("Bob"), "Ann", 1, 4, 10)
+        >>> order = g.get_order()
+        >>> bob = g.get_player("Bob")
+        >>> removed = g.remove_player("Bob")
+        >>> g.add_player(bob)
+        >>> g.insert_connection(removed[0])
+        >>> g.get_player_names()
+        ['Ann', 'Cal', 'Bob']
+        >>> g.restore_order(order)
+        >>> g.get_order() == order
+        True
+
+        Preconditions:
+            - set(order[0]) == set(self._players)
+            - order[1] holds every connection of this graph once, with its two names in the order of get_order
+        """
+        names, keys = order
+        moved = [0] * len(self._names)
+        for i, name in enumerate(names):
+            moved[self._ids[name]] = i
+
+        self._names = list(names)
+        self._ids = {name: i for i, name in enumerate(names)}
+        self._players = {name: self._players[name] for name in names}
+        self._directed = {(moved[passer], moved[receiver]): stats
+                          for (passer, receiver), stats in self._directed.items()}
+        self._pairs = {}
+        self._adjacency = [[] for _ in names]
+        for name1, name2 in keys:
+            self._link(self._ids[name1], self._ids[name2])
+        self._changed()
+
+    def get_version(self) -> int:
+        """
+        Returns a number that grows every time a player or the passes of a connection are added to this graph,
+        like Graph.get_version.
+        """
+        return self._version
+
+    def get_cached(self, key: object, compute: Callable[[], Any]) -> Any:
+        """
+        Returns the result of compute(), kept under key until this graph changes, like Graph.get_cached.
+        """
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def get_weights(self) -> dict[str, dict[str, float]]:
+        """
+        Returns the weight table, in the same format as POSITION_WEIGHTS, that the player_impact_estimate of every
+        player in this graph is calculated with.
+        """
+        return self._weights
+
+    def set_weights(self, weights: dict[str, dict[str, float]]) -> None:
+        """
+        Record that the player_impact_estimate of every player in this graph is now calculated with the given weight
+        table (see ImpactModel.apply in 'impact.py'), so the players updated by apply_game use it too.
+        """
+        self._weights = weights
+
+    def refresh_synergy_scores(self) -> None:
+        """
+        Recalculate the synergy score of every _Connection class returned by get_connection or get_connections,
+        after the player_impact_estimate of some players changed. The synergy matrix is always calculated from the
+        current player_impact_estimate of the players.
+        """
+        for connection in self._built.values():
+            connection.synergy_score = connection.calculate_synergy_score()
+
+    def passes_per_minute_matrix(self) -> Union[np.ndarray, CSRMatrix]:
+        """
+        Returns the matrix whose [i, j] entry is the average passes per minute of player i to player j, where i
+        and j are the integer ids of the players (see get_player_names).
+        """
+        return self._wrap(self._compile()['passes_per_minute'])
+
+    def assists_per_pass_matrix(self) -> Union[np.ndarray, CSRMatrix]:
+        """
+        Returns the matrix whose [i, j] entry is the average assists per pass of player i passing to player j.
+        """
+        compiled = self._compile()
+        return self._wrap(_rounded_ratio(compiled['assists'], compiled['passes']))
+
+    def synergy_matrix(self) -> Union[np.ndarray, CSRMatrix]:
+        """
+        Returns the matrix whose [i, j] entry is the synergy score of the connection between player i and
+        player j, or 0 if they are not connected.
+        """
+        compiled = self._compile()
+        impact = np.array([player.player_impact_estimate for player in self._players.values()])
+        if compiled['storage'] == 'dense':
+            synergy = (impact[:, np.newaxis] + impact[np.newaxis, :]) / 2
+            return np.where(compiled['connected'], synergy, 0.0)
+        return self._wrap((impact[compiled['rows']] + impact[compiled['indices']]) / 2)
+
+    def pass_matrix(self, normalization: str = 'per_minute', sparse: bool = False,
+                    players: Optional[list[str]] = None) -> tuple[Union[np.ndarray, CSRMatrix], list[str]]:
+        """
+        Returns the pass matrix of this graph and the names of its players, like Graph.pass_matrix.
+
+        >>> g = ArrayGraph()
+        >>> for name in ("Bob", "Ann"):
+        ...     g.add_player(_Player(name, "LAL", ["Guard"], 5, 5, 5, 5, 5, 5))
+        >>> g.add_connection(g.get_player("Bob"), "Ann", 1, 4, 10)
+        >>> matrix, names = g.pass_matrix('raw', players=["Ann", "Bob"])
+        >>> names, matrix.tolist()
+        (['Ann', 'Bob'], [[0.0, 0.0], [4.0, 0.0]])
+        """
+        from pass_matrix import build_pass_matrix
+
+        compiled = self._compile()
+        if compiled['storage'] == 'dense':
+            rows, columns = np.nonzero(compiled['connected'])
+            totals = [compiled[name][rows, columns] for name in ('passes', 'assists', 'minutes')]
+        else:
+            rows, columns = compiled['rows'], compiled['indices']
+            totals = [compiled[name] for name in ('passes', 'assists', 'minutes')]
+
+        if players is None:
+            names = list(self._names)
+        else:
+            # Move every id to its place in players, dropping the connections of players not in it
+            names = list(players)
+            places = np.full(len(self._names), -1, dtype=np.intp)
+            places[[self._ids[name] for name in names]] = np.arange(len(names))
+            rows, columns = places[rows], places[columns]
+            kept = (rows >= 0) & (columns >= 0)
+            rows, columns, totals = rows[kept], columns[kept], [total[kept] for total in totals]
+
+        return build_pass_matrix(rows, columns, *totals, len(names), normalization, sparse), names
+
+    def get_player_names(self) -> list[str]:
+        """
+        Returns the player names of this graph, indexed by their integer ids.
+        """
+        return list(self._names)
+
+    def get_storage(self) -> str:
+        """
+        Returns 'dense' if the connections of this graph are stored in dense matrices and 'csr' otherwise.
+        """
+        return self._compile()['storage']
+
+    def visualize_graph(self, ideal_lineup: list[_Player], output_path: Optional[str] = None,
+                        min_passes: float = 0, top_k: Optional[int] = None) -> None:
+        """
+        Draws this graph the same way as Graph.visualize_graph.
+        """
+        from visualization import draw_graph
+
+        draw_graph(self, ideal_lineup, output_path, min_passes, top_k)
+
+    def _changed(self) -> None:
+        """Record that a player or the passes of a connection were added, so the arrays and every cached result
+        are out of date."""
+        self._compiled = None
+        self._rows.clear()
+        self._built.clear()
+        self._version += 1
+        self._cache.clear()
+
+    def _link(self, first: int, second: int) -> None:
+        """Add a connection between the two given ids, first and second in that order, to _pairs and _adjacency."""
+        self._pairs[(min(first, second), max(first, second))] = (first, second)
+        self._adjacency[first].append(second)
+        self._adjacency[second].append(first)
+
+    def _pair(self, player1_name: str, player2_name: str) -> tuple[int, int]:
+        """Return the (smaller id, larger id) key in _pairs of the two given players."""
+        id1, id2 = self._ids[player1_name], self._ids[player2_name]
+        return (id1, id2) if id1 < id2 else (id2, id1)
+
+    def _connection(self, pair: tuple[int, int]) -> _Connection:
+        """Return the _Connection class of the given key in _pairs, building it if it is not in _built yet."""
+        if pair not in self._built:
+            self._built[pair] = self._build_connection(*self._pairs[pair])
+        return self._built[pair]
+
+    def _row(self, row: int) -> dict[str, float]:
+        """Return the dict of the average passes per minute of the player with id row to every player it is
+        connected to, read from its row in the arrays of this graph if it is not in _rows yet."""
+        if row not in self._rows:
+            compiled = self._compile()
+            if compiled['storage'] == 'dense':
+                columns = np.flatnonzero(compiled['connected'][row])
+                values = compiled['passes_per_minute'][row, columns]
+            else:
+                start, end = compiled['indptr'][row], compiled['indptr'][row + 1]
+                columns, values = compiled['indices'][start:end], compiled['passes_per_minute'][start:end]
+            self._rows[row] = {self._names[column]: value for column, value in zip(columns.tolist(), values.tolist())}
+        return self._rows[row]
+
+    def _build_connection(self, first: int, second: int) -> _Connection:
+        """Return a new _Connection class with the statistics of the connection between the two given ids."""
+        player1, player2 = self._players[self._names[first]], self._players[self._names[second]]
+        connection = _Connection(player1, player2)
+        for passer, receiver in ((first, second), (second, first)):
+            if (passer, receiver) in self._directed:
+                passes, assists, minutes_together = self._directed[(passer, receiver)]
+                connection.tweak_stats(self._players[self._names[passer]], assists, passes, minutes_together)
+        return connection
+
+    def _wrap(self, values: np.ndarray) -> Union[np.ndarray, CSRMatrix]:
+        """Return values as a dense matrix or a CSRMatrix, depending on how this graph is stored."""
+        compiled = self._compile()
+        if compiled['storage'] == 'dense':
+            return values
+        n = len(self._names)
+        return CSRMatrix(values, compiled['indices'], compiled['indptr'], (n, n))
+
+    def _compile(self) -> dict[str, Union[str, np.ndarray]]:
+        """Return the arrays of this graph, building them first if the graph changed since they were last built."""
+        if self._compiled is not None:
+            return self._compiled
+
+        n = len(self._names)
+        # Every connection is stored in both directions, so a direction without passes is stored as zeros
+        edges = [(first, second) for first, second in self._pairs.values()]
+        edges += [(second, first) for first, second in edges]
+        rows = np.array([passer for passer, _ in edges], dtype=np.intp)
+        columns = np.array([receiver for _, receiver in edges], dtype=np.intp)
+        stats = np.array([self._directed.get(edge, (0, 0, 0)) for edge in edges], dtype=np.float64).reshape(-1, 3)
+
+        if n <= DENSE_MAX_PLAYERS or len(edges) >= DENSE_MIN_DENSITY * n * n:
+            compiled = {'storage': 'dense', 'connected': np.zeros((n, n), dtype=bool)}
+            compiled['connected'][rows, columns] = True
+            for column, name in enumerate(('passes', 'assists', 'minutes')):
+                matrix = np.zeros((n, n))
+                matrix[rows, columns] = stats[:, column]
+                compiled[name] = matrix
+        else:
+            order = np.lexsort((columns, rows))
+            compiled = {'storage': 'csr', 'rows': rows[order], 'indices': columns[order],
+                        'indptr': np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=n))))}
+            for column, name in enumerate(('passes', 'assists', 'minutes')):
+                compiled[name] = stats[order, column]
+
+        compiled['passes_per_minute'] = _rounded_ratio(compiled['passes'], compiled['minutes'])
+        self._compiled = compiled
+        return compiled
+
+
+def round3(values: np.ndarray) -> np.ndarray:
+    """Return values rounded to 3 decimals exactly like Python's round(value, 3), which the _Player and
+    _Connection classes use.
+
+    np.round can disagree with round when a value is almost exactly halfway between two roundings, so those few
+    values are rounded with round instead.
+
+    >>> round3(np.array([13 / 80, 0.0004, 2.5])).tolist() == [round(13 / 80, 3), 0.0, 2.5]
+    True
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scaled = values * 1000
+    rounded = np.round(scaled) / 1000
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_half.any():
+        rounded[near_half] = [round(value, 3) for value in values[near_half].tolist()]
+    return rounded
+
+
+def _rounded_ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Return numerator / denominator rounded to 3 decimals, with 0 wherever denominator is 0."""
+    ratio = np.zeros(np.shape(numerator))
+    np.divide(numerator, denominator, out=ratio, where=denominator > 0)
+    return round3(ratio)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['copy', 'heapq', 'numpy', 'instrumentation', 'classes', 'visualization', 'pass_matrix'],
+        'disable': ['E9998', 'R0914', 'R0902', 'R0913', 'E9959', 'E9972', 'W0212', 'C0415']
+    })
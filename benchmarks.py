@@ -0,0 +1,612 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module contains the benchmarks of this project. Run it as a script to print the results, for example:
+
+    python benchmarks.py cache LAL.json
+    python benchmarks.py startup LAL.json
+    python benchmarks.py memory LAL.json --players 5000
+    python benchmarks.py centrality --teams 30
+    python benchmarks.py service LAL.json --clients 200
+    python benchmarks.py whatif --teams 30
+    python benchmarks.py store --teams 100 --seasons 3
+    python benchmarks.py profile LAL.json --render --trace trace.json
+    python benchmarks.py suite --sizes 15 200 1000 5000 --output results.json --baseline baseline.json
+
+The suite benchmark runs on synthetic teams from 'synthetic.py'. It saves its results as JSON, and exits with
+status 1 if any stage got slower or used more memory than in the baseline results, beyond a tolerance.
+"""
+from __future__ import annotations
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.parse
+from typing import Any, Callable, Optional
+
+import instrumentation
+from classes import Graph, _Player
+from main import LineupSimulation
+from synthetic import write_team_file
+
+SUITE_SIZES = (15, 50, 200, 1000, 5000)
+SUITE_STAGES = ('load', 'add_connection', 'generate_lineup', 'passes_per_minute_dict', 'heatmap_matrix',
+                'graph_layout')
+
+# A stage only counts as a regression if it is both this fraction and this many seconds (or bytes) worse
+REGRESSION_TOLERANCE = 0.25
+MIN_REGRESSION_SECONDS = 0.002
+MIN_REGRESSION_BYTES = 64 * 1024
+
+
+def benchmark_cache_startup(filename: str, repeats: int = 5) -> dict[str, float]:
+    """
+    Return the median number of seconds it takes to initialize a LineupSimulation of filename:
+        - 'cold': without the compiled graph cache
+        - 'miss': with an empty compiled graph cache, which also saves the snapshot
+        - 'warm': with an up-to-date snapshot in the compiled graph cache
+    """
+    cold, miss, warm = [], [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        LineupSimulation(filename)
+        cold.append(time.perf_counter() - start)
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            start = time.perf_counter()
+            LineupSimulation(filename, cache_dir=cache_dir)
+            miss.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            LineupSimulation(filename, cache_dir=cache_dir)
+            warm.append(time.perf_counter() - start)
+
+    return {'cold': statistics.median(cold), 'miss': statistics.median(miss), 'warm': statistics.median(warm)}
+
+
+# The libraries that loading a datafile and generating a lineup should not import
+HEAVY_MODULES = ('networkx', 'matplotlib', 'pandas', 'seaborn', 'numpy')
+
+# Run in a fresh interpreter by benchmark_startup, so that nothing is imported yet
+_STARTUP_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+from main import LineupSimulation
+imported = time.perf_counter()
+LineupSimulation(sys.argv[1]).generate_lineup()
+finished = time.perf_counter()
+print(json.dumps({'import': imported - start, 'first_lineup': finished - imported,
+                  'modules': [name for name in sys.argv[2:] if name in sys.modules]}))
+'''
+
+
+def benchmark_startup(filename: str, repeats: int = 5) -> tuple[dict[str, float], list[str]]:
+    """
+    Return the median number of seconds a new Python process takes to:
+        - 'import': import LineupSimulation from 'main.py'
+        - 'first_lineup': then load filename and generate its lineup
+    alongside the names of the HEAVY_MODULES that were imported by the end.
+    """
+    project_dir = os.path.dirname(os.path.abspath(__file__))
+    imports, lineups, modules = [], [], []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', _STARTUP_SCRIPT, os.path.abspath(filename), *HEAVY_MODULES],
+                                cwd=project_dir, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output)
+        imports.append(result['import'])
+        lineups.append(result['first_lineup'])
+        modules = result['modules']
+
+    return {'import': statistics.median(imports), 'first_lineup': statistics.median(lineups)}, modules
+
+
+def benchmark_suite(sizes: tuple[int, ...] = SUITE_SIZES, degree: float = 15, seed: int = 0,
+                    repeats: int = 3) -> dict[str, Any]:
+    """
+    Return the results of every stage in SUITE_STAGES on a synthetic team of each of the given sizes, where each
+    player played with degree other players on average. Each stage is timed repeats times (the median is kept)
+    and then run once more under tracemalloc to find its peak memory use.
+
+    The results are a dict with a 'meta' dict describing the run and a 'results' dict mapping each size (as a
+    string, like in JSON) to a dict mapping each stage to its 'seconds' and 'peak_bytes'.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        for size in sizes:
+            filename = os.path.join(data_dir, f'synthetic_{size}.json')
+            write_team_file(filename, size, min(1.0, degree / max(size - 1, 1)), seed)
+            results[str(size)] = _benchmark_team(filename, repeats)
+
+    meta = {'python': platform.python_version(), 'platform': platform.platform(), 'degree': degree,
+            'seed': seed, 'repeats': repeats, 'created': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    return {'meta': meta, 'results': results}
+
+
+def compare_to_baseline(current: dict[str, Any], baseline: dict[str, Any],
+                        tolerance: float = REGRESSION_TOLERANCE) -> list[str]:
+    """
+    Return a description of every stage in current that is slower or uses more memory than the same stage and
+    size in baseline, by more than tolerance. Stages or sizes missing from baseline are skipped.
+
+    >>> base = {'results': {'15': {'load': {'seconds': 0.1, 'peak_bytes': 1000000}}}}
+    >>> now = {'results': {'15': {'load': {'seconds': 0.2, 'peak_bytes': 1000000}}}}
+    >>> compare_to_baseline(now, base)
+    ['load on 15 players: 200.000 ms vs. 100.000 ms in the baseline']
+    >>> compare_to_baseline(base, base)
+    []
+    """
+    regressions = []
+    for size, stages in current['results'].items():
+        for stage, result in stages.items():
+            previous = baseline['results'].get(size, {}).get(stage)
+            if previous is None:
+                continue
+            seconds, previous_seconds = result['seconds'], previous['seconds']
+            if seconds > previous_seconds * (1 + tolerance) and seconds - previous_seconds > MIN_REGRESSION_SECONDS:
+                regressions.append(f'{stage} on {size} players: {seconds * 1000:.3f} ms vs. '
+                                   f'{previous_seconds * 1000:.3f} ms in the baseline')
+            peak, previous_peak = result['peak_bytes'], previous['peak_bytes']
+            if peak > previous_peak * (1 + tolerance) and peak - previous_peak > MIN_REGRESSION_BYTES:
+                regressions.append(f'{stage} on {size} players: peak {peak} bytes vs. {previous_peak} bytes in '
+                                   f'the baseline')
+    return regressions
+
+
+def _benchmark_team(filename: str, repeats: int) -> dict[str, dict[str, float]]:
+    """Return the seconds and peak bytes of every stage in SUITE_STAGES on the team in the given datafile."""
+    # Imported here so the other benchmarks do not load the plotting libraries
+    from visualization import graph_edges, graph_layout, heatmap_matrix
+
+    with open(filename, 'r') as f:
+        records = json.load(f)
+
+    simulation = LineupSimulation.__new__(LineupSimulation)
+    simulation.players = {}
+    simulation.team_graph = simulation._load_game_data(filename)
+    simulation.lineup = simulation.generate_lineup()
+    graph = simulation.team_graph
+
+    def new_simulation() -> tuple:
+        new = LineupSimulation.__new__(LineupSimulation)
+        new.players = {}
+        return (new, filename)
+
+    def pass_data() -> dict:
+        return {name: graph.get_passes_per_minute_dict(name, simulation.players[name][1])
+                for name in simulation.players}
+
+    stages = {
+        'load': (new_simulation, lambda new, name: new._load_game_data(name)),
+        'add_connection': (lambda: (_empty_graph(records), records), _add_connections),
+        'generate_lineup': (tuple, simulation.generate_lineup),
+        'passes_per_minute_dict': (tuple, pass_data),
+        'heatmap_matrix': (tuple, lambda: heatmap_matrix(*graph.pass_matrix('per_minute',
+                                                                          players=sorted(simulation.players)))),
+        'graph_layout': (tuple, lambda: (graph_layout(graph), graph_edges(graph)))
+    }
+    return {stage: _measure(*stages[stage], repeats) for stage in SUITE_STAGES}
+
+
+def benchmark_memory(filename: str) -> dict[str, float]:
+    """
+    Return how much memory the Graph of the given datafile holds once the datafile's records are freed, measured
+    with tracemalloc:
+        - 'players' and 'edges': the number of players and connections
+        - 'bytes_per_player': the bytes held by the graph with only its _Player classes, per player
+        - 'bytes_per_edge': the bytes added by Graph.add_connection for every pass, per connection
+        - 'total_bytes': the bytes held by the whole graph
+    """
+    player_bytes, _ = _traced_graph_bytes(filename, with_connections=False)
+    total_bytes, graph = _traced_graph_bytes(filename, with_connections=True)
+    players, edges = len(graph.get_players()), len(graph.get_connections())
+    return {'players': players, 'edges': edges, 'bytes_per_player': player_bytes / max(players, 1),
+            'bytes_per_edge': (total_bytes - player_bytes) / max(edges, 1), 'total_bytes': total_bytes}
+
+
+def _traced_graph_bytes(filename: str, with_connections: bool) -> tuple[int, Graph]:
+    """Return the bytes still held after building the Graph of the given datafile and freeing its records, with
+    or without its connections, alongside the graph."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        with open(filename, 'r') as f:
+            records = json.load(f)
+        graph = _empty_graph(records)
+        if with_connections:
+            _add_connections(graph, records)
+        del records
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0], graph
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_centrality(filenames: list[str], repeats: int = 5) -> dict[str, float]:
+    """
+    Return the median number of seconds it takes to calculate every centrality in 'centrality.py' for the teams
+    in all of the given datafiles at once:
+        - 'cold': on graphs with nothing cached yet
+        - 'cached': again on the same graphs
+    """
+    from centrality import centrality_table
+
+    cold, cached = [], []
+    for _ in range(repeats):
+        graphs = [LineupSimulation(filename).team_graph for filename in filenames]
+        start = time.perf_counter()
+        for graph in graphs:
+            centrality_table(graph)
+        cold.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for graph in graphs:
+            centrality_table(graph)
+        cached.append(time.perf_counter() - start)
+
+    return {'cold': statistics.median(cold), 'cached': statistics.median(cached)}
+
+
+def benchmark_service(source: str, clients: int = 200, requests_per_client: int = 20) -> dict[str, float]:
+    """
+    Start a LineupService of the given datafiles (see 'service.py') on a free local port, and return the latency
+    of its requests when clients clients each send requests_per_client requests over their own connection at the
+    same time, cycling through the lineup, player impact estimate, pass matrix and connection queries:
+        - 'p50', 'p99' and 'max': the median, 99th percentile and slowest latency, in seconds
+        - 'requests_per_second': the number of requests answered per second
+    """
+    import asyncio
+    from service import LineupService
+
+    async def run() -> tuple[list[float], float]:
+        service = LineupService(source, max_workers=1)
+        await service.start(port=0)
+        host, port = service.get_address()[:2]
+        team = service.get_teams()[0]
+        graph = service._teams[team].simulation.team_graph  # pylint: disable=protected-access
+        connection = graph.get_connections()[0].player_connection
+        paths = [f'/lineup?team={team}', f'/pie?team={team}', f'/pass_matrix?team={team}',
+                 '/connection?' + urllib.parse.urlencode({'team': team, 'player1': connection[0].name,
+                                                          'player2': connection[1].name})]
+
+        async def client(number: int) -> list[float]:
+            reader, writer = await asyncio.open_connection(host, port)
+            latencies = []
+            for request in range(requests_per_client):
+                path = paths[(number + request) % len(paths)]
+                start = time.perf_counter()
+                writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n'.encode())
+                length = 0
+                while (line := await reader.readline()) not in (b'\r\n', b''):
+                    if line.lower().startswith(b'content-length:'):
+                        length = int(line.split(b':')[1])
+                await reader.readexactly(length)
+                latencies.append(time.perf_counter() - start)
+            writer.close()
+            return latencies
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(client(number) for number in range(clients)))
+        elapsed = time.perf_counter() - start
+        await service.close()
+        return [latency for latencies in results for latency in latencies], elapsed
+
+    latencies, elapsed = asyncio.run(run())
+    latencies.sort()
+    return {'p50': statistics.median(latencies), 'p99': latencies[int(0.99 * (len(latencies) - 1))],
+            'max': latencies[-1], 'requests_per_second': len(latencies) / elapsed}
+
+
+def benchmark_whatif(source: str, repeats: int = 5) -> tuple[dict[str, float], int]:
+    """
+    Return the median number of seconds the what-if engine (see 'whatif.py') of the team datafiles given by
+    source takes to:
+        - 'serial': score every one-for-one trade between two teams, in this process
+        - 'pool': do the same in a pool of worker processes
+        - 'swap_undo': apply the best trade and undo it again
+    alongside the number of trades scored.
+    """
+    from whatif import WhatIfEngine
+
+    engine = WhatIfEngine.from_files(source)
+    serial, pool, swaps = [], [], []
+    scores = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        scores = engine.score_league_swaps(max_workers=1)
+        serial.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        engine.score_league_swaps()
+        pool.append(time.perf_counter() - start)
+
+        best = scores[0]
+        start = time.perf_counter()
+        engine.swap(best.team1, best.player1, best.team2, best.player2)
+        engine.undo()
+        swaps.append(time.perf_counter() - start)
+
+    return {'serial': statistics.median(serial), 'pool': statistics.median(pool),
+            'swap_undo': statistics.median(swaps)}, len(scores)
+
+
+def benchmark_store(sources: dict[str, str], repeats: int = 5) -> dict[str, float]:
+    """
+    Return the number of seconds the season store (see 'store.py') takes to:
+        - 'ingest': add the team datafiles of every season in sources, which maps each season to a directory or
+          glob pattern of its datafiles
+        - 'guards_query': build the graph of every guard with at least 500 minutes in the first season (median)
+        - 'team_lineup': build the LineupSimulation of the first team over every season (median)
+    """
+    from store import SeasonStore
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = SeasonStore(os.path.join(store_dir, 'seasons.db'))
+        start = time.perf_counter()
+        for season, source in sources.items():
+            store.ingest(source, season)
+        results = {'ingest': time.perf_counter() - start}
+
+        first_season, first_team = next(iter(sources)), store.teams()[0]
+        queries, lineups = [], []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            store.query_graph(season=first_season, position='Guard', min_minutes=500)
+            queries.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            LineupSimulation.from_store(store, first_team, team=first_team)
+            lineups.append(time.perf_counter() - start)
+        store.close()
+
+    results.update({'guards_query': statistics.median(queries), 'team_lineup': statistics.median(lineups)})
+    return results
+
+
+def profile_team(filename: str, render: bool = False) -> dict[str, dict]:
+    """
+    Return the instrumentation summary (see 'instrumentation.py') of initializing a LineupSimulation of filename
+    and, if render is True, of writing its heatmap and graph to image files in a temporary directory. Whatever
+    was recorded before is reset, and the spans of this run are kept for export_chrome_trace.
+    """
+    was_enabled = instrumentation.ENABLED
+    instrumentation.reset()
+    instrumentation.enable()
+    try:
+        simulation = LineupSimulation(filename)
+        if render:
+            with tempfile.TemporaryDirectory() as out_dir:
+                simulation.visualize_heatmap(os.path.join(out_dir, 'heatmap.png'))
+                simulation.show_graph(os.path.join(out_dir, 'graph.png'))
+    finally:
+        if not was_enabled:
+            instrumentation.disable()
+    return instrumentation.summary()
+
+
+def _empty_graph(records: list[dict]) -> Graph:
+    """Return a Graph holding a new _Player class for every record, without any connections."""
+    graph = Graph()
+    for record in records:
+        defense = record['defensive_stats']
+        assists = sum(passes['assists'] for passes in record['passes_to'].values())
+        graph.add_player(_Player(record['name'], record['team'], record['positions'], defense['points'],
+                                 defense['rebounds'], assists, defense['minutes'], defense['steals'],
+                                 defense['blocks']))
+    return graph
+
+
+def _add_connections(graph: Graph, records: list[dict]) -> None:
+    """Call Graph.add_connection for every pass in records, like 'LineupSimulation._build_graph'."""
+    for record in records:
+        player = graph.get_player(record['name'])
+        for receiver, passes in record['passes_to'].items():
+            graph.add_connection(player, receiver, passes['assists'], passes['total_passes'],
+                                 passes['minutes_together'])
+
+
+def _measure(setup: Callable[[], tuple], stage: Callable, repeats: int) -> dict[str, float]:
+    """Return the median seconds of stage(*setup()) over repeats runs, and its peak traced memory in bytes.
+    setup is called before every run and is not measured."""
+    times = []
+    for _ in range(repeats):
+        args = setup()
+        start = time.perf_counter()
+        stage(*args)
+        times.append(time.perf_counter() - start)
+
+    args = setup()
+    tracemalloc.start()
+    try:
+        stage(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': statistics.median(times), 'peak_bytes': peak}
+
+
+def _print_suite(results: dict[str, Any]) -> None:
+    """Print the results of benchmark_suite as a table in milliseconds and kilobytes."""
+    for size, stages in results['results'].items():
+        print(f'{size} players')
+        for stage, result in stages.items():
+            print(f'    {stage:<24} {result["seconds"] * 1000:12.3f} ms {result["peak_bytes"] / 1024:12.1f} KiB')
+
+
+def _load_json(filename: str) -> Optional[dict[str, Any]]:
+    """Return the JSON object in the given file, or None if there is no such file."""
+    if not os.path.exists(filename):
+        return None
+    with open(filename, 'r') as f:
+        return json.load(f)
+
+
+def _print_results(title: str, results: dict[str, float]) -> None:
+    """Print the given benchmark results in milliseconds."""
+    print(title)
+    for name, seconds in results.items():
+        print(f'    {name:<12} {seconds * 1000:10.3f} ms')
+
+
+def main() -> None:
+    """Run the benchmarks named on the command line."""
+    parser = argparse.ArgumentParser(description='Benchmarks for the Top Hoops lineup simulation.')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    cache_parser = subparsers.add_parser('cache', help='cold vs. warm LineupSimulation startup')
+    cache_parser.add_argument('filenames', nargs='+')
+    cache_parser.add_argument('--repeats', type=int, default=5)
+
+    startup_parser = subparsers.add_parser('startup', help='import and first-lineup time of a new process')
+    startup_parser.add_argument('filenames', nargs='+')
+    startup_parser.add_argument('--repeats', type=int, default=5)
+
+    memory_parser = subparsers.add_parser('memory', help='bytes per player and per connection of a Graph')
+    memory_parser.add_argument('filenames', nargs='*')
+    memory_parser.add_argument('--players', type=int, nargs='*', default=[],
+                               help='also measure synthetic teams of these sizes')
+    memory_parser.add_argument('--degree', type=float, default=15)
+
+    centrality_parser = subparsers.add_parser('centrality', help='centrality analytics across many teams')
+    centrality_parser.add_argument('filenames', nargs='*')
+    centrality_parser.add_argument('--teams', type=int, default=30,
+                                   help='the number of synthetic teams to use if no datafiles are given')
+    centrality_parser.add_argument('--repeats', type=int, default=5)
+
+    service_parser = subparsers.add_parser('service', help='request latency of the lineup query service')
+    service_parser.add_argument('source', help='a directory, glob pattern or team datafile')
+    service_parser.add_argument('--clients', type=int, default=200)
+    service_parser.add_argument('--requests', type=int, default=20, help='requests sent by each client')
+
+    whatif_parser = subparsers.add_parser('whatif', help='scoring every one-for-one trade across a league')
+    whatif_parser.add_argument('source', nargs='?', help='a directory or glob pattern of team datafiles')
+    whatif_parser.add_argument('--teams', type=int, default=30,
+                               help='the number of synthetic teams to use if no source is given')
+    whatif_parser.add_argument('--repeats', type=int, default=5)
+
+    store_parser = subparsers.add_parser('store', help='ingest and indexed queries of the season store')
+    store_parser.add_argument('--teams', type=int, default=100, help='the number of synthetic teams per season')
+    store_parser.add_argument('--seasons', type=int, default=3)
+    store_parser.add_argument('--repeats', type=int, default=5)
+
+    profile_parser = subparsers.add_parser('profile', help='instrumented spans and counters of loading a datafile')
+    profile_parser.add_argument('filename')
+    profile_parser.add_argument('--render', action='store_true', help='also render the heatmap and the graph')
+    profile_parser.add_argument('--trace', help='write the spans to this file as Chrome trace JSON')
+
+    suite_parser = subparsers.add_parser('suite', help='load, lineup and render stages on synthetic teams')
+    suite_parser.add_argument('--sizes', type=int, nargs='+', default=list(SUITE_SIZES))
+    suite_parser.add_argument('--degree', type=float, default=15)
+    suite_parser.add_argument('--seed', type=int, default=0)
+    suite_parser.add_argument('--repeats', type=int, default=3)
+    suite_parser.add_argument('--output', help='save the results to this JSON file')
+    suite_parser.add_argument('--baseline', help='compare the results to this JSON file of earlier results')
+    suite_parser.add_argument('--save-baseline', action='store_true',
+                              help='save the results as the baseline instead of comparing to it')
+    suite_parser.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE)
+
+    args = parser.parse_args()
+    if args.benchmark == 'cache':
+        for filename in args.filenames:
+            _print_results(os.path.basename(filename), benchmark_cache_startup(filename, args.repeats))
+    elif args.benchmark == 'startup':
+        for filename in args.filenames:
+            results, modules = benchmark_startup(filename, args.repeats)
+            _print_results(os.path.basename(filename), results)
+            print(f'    heavy modules imported: {", ".join(modules) if modules else "none"}')
+    elif args.benchmark == 'memory':
+        _run_memory(args)
+    elif args.benchmark == 'centrality':
+        with tempfile.TemporaryDirectory() as data_dir:
+            filenames = list(args.filenames)
+            if not filenames:
+                for team in range(args.teams):
+                    filenames.append(os.path.join(data_dir, f'synthetic_team_{team}.json'))
+                    write_team_file(filenames[-1], 17, 0.8, team)
+            _print_results(f'{len(filenames)} teams', benchmark_centrality(filenames, args.repeats))
+    elif args.benchmark == 'service':
+        results = benchmark_service(args.source, args.clients, args.requests)
+        requests_per_second = results.pop('requests_per_second')
+        _print_results(f'{args.clients} clients', results)
+        print(f'    {"requests/s":<12} {requests_per_second:10.1f}')
+    elif args.benchmark == 'whatif':
+        with tempfile.TemporaryDirectory() as data_dir:
+            source = args.source
+            if source is None:
+                source = data_dir
+                for team in range(args.teams):
+                    write_team_file(os.path.join(data_dir, f'team_{team}.json'), 17, 0.8, team,
+                                    name_prefix=f'Team {team} Player')
+            results, trades = benchmark_whatif(source, args.repeats)
+            _print_results(f'{trades} trades', results)
+    elif args.benchmark == 'store':
+        with tempfile.TemporaryDirectory() as data_dir:
+            sources = {}
+            for season in range(args.seasons):
+                sources[f'season_{season}'] = os.path.join(data_dir, f'season_{season}')
+                os.makedirs(sources[f'season_{season}'])
+                for team in range(args.teams):
+                    write_team_file(os.path.join(sources[f'season_{season}'], f'team_{team}.json'), 17, 0.8,
+                                    season * args.teams + team, name_prefix=f'Team {team} Player')
+            _print_results(f'{args.seasons * args.teams} datafiles', benchmark_store(sources, args.repeats))
+    elif args.benchmark == 'profile':
+        profile_team(args.filename, args.render)
+        instrumentation.print_summary()
+        if args.trace:
+            instrumentation.export_chrome_trace(args.trace)
+            print(f'Saved the Chrome trace to {args.trace}')
+    elif args.benchmark == 'suite':
+        _run_suite(args)
+
+
+def _run_memory(args: argparse.Namespace) -> None:
+    """Run the memory benchmark with the given command line arguments."""
+    with tempfile.TemporaryDirectory() as data_dir:
+        filenames = list(args.filenames)
+        for size in args.players:
+            filename = os.path.join(data_dir, f'synthetic_{size}.json')
+            write_team_file(filename, size, min(1.0, args.degree / max(size - 1, 1)))
+            filenames.append(filename)
+
+        for filename in filenames:
+            report = benchmark_memory(filename)
+            print(f'{os.path.basename(filename)}: {report["players"]} players, {report["edges"]} connections')
+            print(f'    {"bytes per player":<20} {report["bytes_per_player"]:12.1f}')
+            print(f'    {"bytes per connection":<20} {report["bytes_per_edge"]:12.1f}')
+            print(f'    {"total":<20} {report["total_bytes"] / 1024:12.1f} KiB')
+
+
+def _run_suite(args: argparse.Namespace) -> None:
+    """Run the suite benchmark with the given command line arguments, exiting with status 1 on a regression."""
+    results = benchmark_suite(tuple(args.sizes), args.degree, args.seed, args.repeats)
+    _print_suite(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Saved the baseline to {args.baseline}')
+    elif args.baseline:
+        baseline = _load_json(args.baseline)
+        if baseline is None:
+            print(f'No baseline at {args.baseline}; run again with --save-baseline to create it')
+            return
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION: {regression}')
+        if regressions:
+            sys.exit(1)
+        print('No regressions compared to the baseline')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module contains the bootstrap of the player impact estimates. A player_impact_estimate is calculated from a
+single season of counts, so a player with few minutes can have a high estimate, and make the lineup, by luck. The
+bootstrap measures how much luck is involved: it draws thousands of resamples of every player's counts (points,
+rebounds, assists, steals and blocks) and of every connection's passes and assists, and recalculates everything
+from each resample:
+    - the player impact estimate of every player, giving a confidence interval for each one
+    - the synergy score of every connection, which is the average of the estimates of its two players
+    - the assists per pass and passes per minute of every connection, which 'lineup_optimizer.py' scores pairs with
+    - the lineup of 'LineupSimulation.generate_lineup', giving the probability that each player makes the lineup
+
+Each count is resampled from a Poisson distribution with the season count as its mean, keeping the minutes fixed.
+The passes of each direction of a connection are resampled the same way, and its assists are drawn from those
+passes with the season's assists per pass. A player's assists are the assists of their passes, and adding up the
+resampled assists of their connections gives exactly the same Poisson distribution as resampling their season
+total, so the players and the connections are resampled separately: each interval is right, but the resamples of a
+player and of their connections are independent of each other.
+The resamples are handled as batches of NumPy arrays (see 'impact.py' and 'sweep.py'), split into chunks with
+their own random seeds that are spread across a pool of worker processes. The results only depend on the seed and
+the chunk size, not on the number of processes. A team has many more connections than players, so on a dense graph
+most of the time goes to resampling the connections.
+"""
+from __future__ import annotations
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from array_graph import ArrayGraph, round3, _rounded_ratio
+from classes import Graph
+from impact import POSITIONS, impact_from_stats, weight_matrix
+from main import LineupSimulation
+from sweep import select_lineups
+
+# The _Player totals that are resampled, in the order of STATS in 'impact.py'
+COUNT_ATTRIBUTES = ('total_points', 'total_rebounds', 'total_assists', 'total_steals', 'total_blocks')
+
+# The number of connections whose synergy intervals, or whose resamples of passes and assists, are calculated
+# together, which bounds the memory used
+SYNERGY_BLOCK_SIZE = 1024
+
+
+class BootstrapResult(NamedTuple):
+    """ The result of bootstrapping the players of one team.
+
+    Instance Attributes:
+        - resamples: The number of resamples
+        - confidence: The confidence level of the intervals, such as 0.95
+        - pie_intervals: Maps each player name to the (low, high) confidence interval of their
+                         player_impact_estimate
+        - synergy_intervals: Maps the (player1 name, player2 name) of each connection to the (low, high)
+                             confidence interval of its synergy_score
+        - assists_per_pass_intervals: Maps each connection, in the same way, to the (low, high) confidence interval
+                                      of its max_avg_assists_per_pass
+        - passes_per_minute_intervals: Maps each connection, in the same way, to the (low, high) confidence interval
+                                       of the sum of the average passes per minute of its two players
+        - inclusion: Maps each player name to the fraction of resamples whose lineup includes that player, from
+                     the highest
+        - lineup_counts: Maps each lineup, as a sorted tuple of player names, to the number of resamples that chose
+                         it, from the most to the least often chosen
+    """
+    resamples: int
+    confidence: float
+    pie_intervals: dict[str, tuple[float, float]]
+    synergy_intervals: dict[tuple[str, str], tuple[float, float]]
+    assists_per_pass_intervals: dict[tuple[str, str], tuple[float, float]]
+    passes_per_minute_intervals: dict[tuple[str, str], tuple[float, float]]
+    inclusion: dict[str, float]
+    lineup_counts: dict[tuple[str, ...], int]
+
+
+class _TeamCounts(NamedTuple):
+    """ The counts of the players of one team that every resample starts from.
+
+    Instance Attributes:
+        - names: The player names
+        - counts: counts[i] holds the totals of names[i], in the order of COUNT_ATTRIBUTES
+        - minutes: minutes[i] is the minutes of names[i]
+        - position_ids: position_ids[i] is the index in POSITIONS of the primary position of names[i]
+        - pairs: The (player index, player index) of every connection
+        - passes: passes[k, d] holds the (passes, assists) of connection k passed from pairs[k, d] to the other player
+        - minutes_together: minutes_together[k, d] is the minutes together of the same direction as passes[k, d]
+    """
+    names: list[str]
+    counts: np.ndarray
+    minutes: np.ndarray
+    position_ids: np.ndarray
+    pairs: np.ndarray
+    passes: np.ndarray
+    minutes_together: np.ndarray
+
+
+def bootstrap_graph(graph: Graph | ArrayGraph, resamples: int = 2000, seed: int = 0, confidence: float = 0.95,
+                    max_workers: Optional[int] = None, chunk_size: int = 500) -> BootstrapResult:
+    """
+    Return the BootstrapResult of the players and connections of graph over the given number of resamples.
+
+    >>> graph = LineupSimulation('LAL.json').team_graph
+    >>> result = bootstrap_graph(graph, resamples=200, max_workers=1)
+    >>> connection = graph.get_connection('LeBron James', 'Austin Reaves')
+    >>> low, high = result.assists_per_pass_intervals[('Austin Reaves', 'LeBron James')]
+    >>> low < connection.max_avg_assists_per_pass < high
+    True
+
+    Preconditions:
+        - resamples > 0
+        - 0 < confidence < 1
+        - every lineup position has enough players in graph
+    """
+    return bootstrap_league({'team': graph}, resamples, seed, confidence, max_workers, chunk_size)['team']
+
+
+def bootstrap_league(teams: dict[str, Graph | ArrayGraph | LineupSimulation], resamples: int = 2000, seed: int = 0,
+                     confidence: float = 0.95, max_workers: Optional[int] = None,
+                     chunk_size: int = 500) -> dict[str, BootstrapResult]:
+    """
+    Return a dict mapping each team in teams to the BootstrapResult of its graph (or of the team_graph of its
+    LineupSimulation). The player impact estimates of every team are calculated with the weight table of its graph
+    (see Graph.get_weights in 'classes.py'). The chunks of players and the blocks of SYNERGY_BLOCK_SIZE connections
+    of every team go to one pool of max_workers processes; if there is only one of them in total or max_workers is
+    1, they are all handled in this process.
+
+    Preconditions:
+        - resamples > 0
+        - 0 < confidence < 1
+        - every lineup position has enough players in every team
+    """
+    team_counts, team_weights = {}, {}
+    for team, graph in teams.items():
+        team_graph = graph.team_graph if isinstance(graph, LineupSimulation) else graph
+        team_counts[team] = _team_counts(team_graph)
+        team_weights[team] = weight_matrix(team_graph.get_weights())
+
+    sizes = [min(chunk_size, resamples - start) for start in range(0, resamples, chunk_size)]
+    tasks, blocks = [], []
+    for team, team_seed in zip(team_counts, np.random.SeedSequence(seed).spawn(len(team_counts))):
+        for size, chunk_seed in zip(sizes, team_seed.spawn(len(sizes))):
+            tasks.append((team, size, chunk_seed))
+        starts = range(0, len(team_counts[team].pairs), SYNERGY_BLOCK_SIZE)
+        for start, block_seed in zip(starts, team_seed.spawn(len(starts))):
+            blocks.append((team, slice(start, start + SYNERGY_BLOCK_SIZE), block_seed))
+    block_args = ([team_counts[team].passes[block] for team, block, _ in blocks],
+                  [team_counts[team].minutes_together[block] for team, block, _ in blocks],
+                  [resamples] * len(blocks), [block_seed for _, _, block_seed in blocks], [confidence] * len(blocks))
+
+    if len(tasks) + len(blocks) <= 1 or max_workers == 1:
+        chunks = [_resample_chunk(team_counts[team], size, chunk_seed, team_weights[team])
+                  for team, size, chunk_seed in tasks]
+        block_intervals = list(map(_resample_connections, *block_args))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            chunks = list(executor.map(_resample_chunk, [team_counts[team] for team, _, _ in tasks],
+                                       [size for _, size, _ in tasks], [chunk_seed for _, _, chunk_seed in tasks],
+                                       [team_weights[team] for team, _, _ in tasks]))
+            block_intervals = list(executor.map(_resample_connections, *block_args))
+
+    impacts, lineups = {team: [] for team in team_counts}, {team: [] for team in team_counts}
+    for (team, _, _), (impact, lineup) in zip(tasks, chunks):
+        impacts[team].append(impact)
+        lineups[team].append(lineup)
+
+    rates = {team: ([], []) for team in team_counts}
+    for (team, _, _), (assists_per_pass, passes_per_minute) in zip(blocks, block_intervals):
+        rates[team][0].append(assists_per_pass)
+        rates[team][1].append(passes_per_minute)
+    for team, team_rates in rates.items():
+        rates[team] = [np.concatenate(rate, axis=1) if rate else np.zeros((2, 0)) for rate in team_rates]
+
+    return {team: _summarize(team_counts[team], np.concatenate(impacts[team]), np.concatenate(lineups[team]),
+                             rates[team], confidence) for team in team_counts}
+
+
+def resample_counts(counts: np.ndarray, resamples: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Return resamples Poisson resamples of the given array of counts, as an array with one more leading axis.
+
+    >>> resample_counts(np.array([[0, 0], [0, 0]]), 3, np.random.default_rng(0)).shape
+    (3, 2, 2)
+    """
+    return rng.poisson(counts, size=(resamples,) + np.shape(counts))
+
+
+def _team_counts(graph: Graph | ArrayGraph) -> _TeamCounts:
+    """Return the _TeamCounts of the players and connections of graph."""
+    players = graph.get_players()
+    names = [player.name for player in players]
+    index = {name: i for i, name in enumerate(names)}
+    counts = np.array([[getattr(player, attribute) for attribute in COUNT_ATTRIBUTES] for player in players],
+                      dtype=np.float64).reshape(-1, len(COUNT_ATTRIBUTES))
+    minutes = np.array([player.minutes for player in players], dtype=np.float64)
+    position_ids = np.array([POSITIONS.index(player.position[0]) for player in players], dtype=np.intp)
+    connections = graph.get_connections()
+    pairs = np.array([[index[player.name] for player in connection.player_connection]
+                      for connection in connections], dtype=np.intp).reshape(-1, 2)
+    passes = np.array([[[c.player1_total_passes, c.player1_total_assists],
+                        [c.player2_total_passes, c.player2_total_assists]] for c in connections],
+                      dtype=np.float64).reshape(-1, 2, 2)
+    minutes_together = np.array([[c.player1_minutes_together, c.player2_minutes_together] for c in connections],
+                                dtype=np.float64).reshape(-1, 2)
+    return _TeamCounts(names, counts, minutes, position_ids, pairs, passes, minutes_together)
+
+
+def _resample_chunk(team: _TeamCounts, resamples: int, seed: np.random.SeedSequence,
+                    weights: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return the player impact estimates of every player, calculated with the given weight matrix, as an array
+    of shape (resamples, players), and the lineup of every resample, as an array of shape (resamples, 5), for the
+    given number of resamples."""
+    rng = np.random.default_rng(seed)
+    counts = resample_counts(team.counts, resamples, rng)
+    # Per-minute averages rounded like the avg_ attributes of _Player, so a resample equal to the season gives
+    # exactly the player_impact_estimate of every player
+    averages = round3(counts / team.minutes[:, np.newaxis])
+    impact = impact_from_stats(averages, team.position_ids, weights)
+    return impact, select_lineups(impact, team.position_ids)
+
+
+def _resample_connections(passes: np.ndarray, minutes_together: np.ndarray, resamples: int,
+                          seed: np.random.SeedSequence, confidence: float) -> tuple[np.ndarray, np.ndarray]:
+    """Return the (low, high) confidence intervals of the max_avg_assists_per_pass and of the summed average passes
+    per minute of the connections with the given passes and minutes_together (laid out as in _TeamCounts), each
+    as an array of shape (2, connections), over the given number of resamples."""
+    rng = np.random.default_rng(seed)
+    resampled = resample_counts(passes[:, :, 0], resamples, rng)
+    assist_ratio = np.divide(passes[:, :, 1], passes[:, :, 0], out=np.zeros(passes.shape[:2]),
+                             where=passes[:, :, 0] > 0)
+    assists = rng.binomial(resampled, assist_ratio)
+
+    # Rounded like the attributes of _Connection, so a resample equal to the season gives exactly its statistics
+    assists_per_pass = _rounded_ratio(assists, resampled).max(axis=2)
+    passes_per_minute = _rounded_ratio(resampled, minutes_together).sum(axis=2)
+    tails = [(1 - confidence) / 2 * 100, (1 + confidence) / 2 * 100]
+    return np.percentile(assists_per_pass, tails, axis=0), np.percentile(passes_per_minute, tails, axis=0)
+
+
+def _summarize(team: _TeamCounts, impact: np.ndarray, lineups: np.ndarray, rates: list[np.ndarray],
+               confidence: float) -> BootstrapResult:
+    """Return the BootstrapResult of the player impact estimates and lineups of every resample of team, with the
+    (low, high) intervals of the assists per pass and passes per minute of its connections in rates."""
+    tails = [(1 - confidence) / 2 * 100, (1 + confidence) / 2 * 100]
+    low, high = np.percentile(impact, tails, axis=0)
+    pie_intervals = {name: (a, b) for name, a, b in zip(team.names, low.tolist(), high.tolist())}
+
+    keys = [(team.names[i], team.names[j]) for i, j in team.pairs.tolist()]
+    synergy_intervals = {}
+    for start in range(0, len(team.pairs), SYNERGY_BLOCK_SIZE):
+        pairs = team.pairs[start:start + SYNERGY_BLOCK_SIZE]
+        synergy = (impact[:, pairs[:, 0]] + impact[:, pairs[:, 1]]) / 2
+        low, high = np.percentile(synergy, tails, axis=0)
+        synergy_intervals.update(zip(keys[start:start + SYNERGY_BLOCK_SIZE], zip(low.tolist(), high.tolist())))
+    assists_per_pass_intervals, passes_per_minute_intervals = (dict(zip(keys, zip(low.tolist(), high.tolist())))
+                                                               for low, high in rates)
+
+    picked = np.bincount(lineups.ravel(), minlength=len(team.names)) / len(lineups)
+    inclusion = dict(sorted(zip(team.names, picked.tolist()), key=lambda item: item[1], reverse=True))
+
+    unique, counts = np.unique(np.sort(lineups, axis=1), axis=0, return_counts=True)
+    lineup_counts = Counter()
+    for lineup, count in zip(unique.tolist(), counts.tolist()):
+        lineup_counts[tuple(sorted(team.names[i] for i in lineup))] += count
+
+    return BootstrapResult(len(impact), confidence, pie_intervals, synergy_intervals, assists_per_pass_intervals,
+                           passes_per_minute_intervals, inclusion, dict(lineup_counts.most_common()))
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['collections', 'concurrent.futures', 'numpy', 'array_graph', 'classes', 'impact', 'main',
+                          'sweep'],
+        'disable': ['E9998', 'R0913']
+    })
@@ -0,0 +1,210 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module contains the centrality analytics of a pass network. Each one treats the graph as directed, with the
+edge from player i to player j weighted by the total passes of player i to player j:
+    - weighted_degree: the passes a player made, received, or both
+    - pagerank: how often the ball ends up with a player, if it moves from player to player in proportion to their
+      passes and is occasionally turned over to a random player
+    - betweenness: how often a player is on the strongest passing route between two teammates, where an edge with
+      more passes is shorter
+    - hub_scores and find_hubs: the HITS hub score of every player, which is high for players who pass a lot to
+      the players who receive a lot
+
+Every calculation works on the sparse raw pass matrix of the graph (see 'pass_matrix.py'), with vectorised NumPy
+iterations where possible. Results are cached on the graph with get_cached, so asking again is free until a player
+or passes are added to the graph.
+"""
+from __future__ import annotations
+import heapq
+from typing import Union
+
+import numpy as np
+
+from array_graph import ArrayGraph
+from classes import Graph
+
+DAMPING = 0.85
+TOLERANCE = 1.0e-8
+MAX_ITERATIONS = 1000
+DEGREE_DIRECTIONS = ('out', 'in', 'total')
+
+
+def weighted_degree(graph: Union[Graph, ArrayGraph], direction: str = 'total') -> dict[str, float]:
+    """
+    Return a dict mapping every player name in graph to the total passes they made ('out'), received ('in') or
+    both ('total').
+
+    Preconditions:
+        - direction in DEGREE_DIRECTIONS
+    """
+    if direction not in DEGREE_DIRECTIONS:
+        raise ValueError(f'Unknown direction {direction!r}, expected one of {DEGREE_DIRECTIONS}')
+
+    def compute() -> dict[str, float]:
+        names, rows, columns, passes = _pass_edges(graph)
+        size = len(names)
+        degree = np.zeros(size)
+        if direction in ('out', 'total'):
+            degree += np.bincount(rows, weights=passes, minlength=size)
+        if direction in ('in', 'total'):
+            degree += np.bincount(columns, weights=passes, minlength=size)
+        return dict(zip(names, degree.tolist()))
+
+    return graph.get_cached(('weighted_degree', direction), compute)
+
+
+def pagerank(graph: Union[Graph, ArrayGraph], damping: float = DAMPING) -> dict[str, float]:
+    """
+    Return a dict mapping every player name in graph to their PageRank in the pass network, which add up to 1.
+    The ball moves from a player to each teammate in proportion to their passes with probability damping, and to
+    a random player otherwise. A player who never passes gives the ball to a random player.
+    """
+    def compute() -> dict[str, float]:
+        names, rows, columns, passes = _pass_edges(graph)
+        size = len(names)
+        if size == 0:
+            return {}
+
+        out_degree = np.bincount(rows, weights=passes, minlength=size)
+        edge_share = passes / out_degree[rows]
+        dangling = out_degree == 0
+        rank = np.full(size, 1 / size)
+        for _ in range(MAX_ITERATIONS):
+            previous = rank
+            rank = np.bincount(columns, weights=edge_share * previous[rows], minlength=size)
+            rank = damping * (rank + previous[dangling].sum() / size) + (1 - damping) / size
+            if np.abs(rank - previous).sum() < size * TOLERANCE:
+                break
+        return dict(zip(names, (rank / rank.sum()).tolist()))
+
+    return graph.get_cached(('pagerank', damping), compute)
+
+
+def betweenness(graph: Union[Graph, ArrayGraph], normalized: bool = True) -> dict[str, float]:
+    """
+    Return a dict mapping every player name in graph to their betweenness centrality: the fraction of the
+    shortest passing routes between two other players that go through them, where an edge with p passes has
+    length 1 / p. If normalized is True, the result is divided by (n - 1)(n - 2) for n players.
+
+    Uses Brandes' algorithm, with one Dijkstra search from every player.
+    """
+    def compute() -> dict[str, float]:
+        names, rows, columns, passes = _pass_edges(graph)
+        size = len(names)
+        neighbours = [[] for _ in range(size)]
+        for passer, receiver, length in zip(rows.tolist(), columns.tolist(), (1 / passes).tolist()):
+            neighbours[passer].append((receiver, length))
+
+        centrality = [0.0] * size
+        for source in range(size):
+            _accumulate_from(source, neighbours, centrality)
+
+        scale = 1 / ((size - 1) * (size - 2)) if normalized and size > 2 else 1.0
+        return {name: value * scale for name, value in zip(names, centrality)}
+
+    return graph.get_cached(('betweenness', normalized), compute)
+
+
+def hub_scores(graph: Union[Graph, ArrayGraph]) -> dict[str, float]:
+    """
+    Return a dict mapping every player name in graph to their HITS hub score, which add up to 1 (or are all 0 if
+    there are no passes). A good hub passes a lot to good authorities, and a good authority receives a lot of
+    passes from good hubs.
+    """
+    def compute() -> dict[str, float]:
+        names, rows, columns, passes = _pass_edges(graph)
+        size = len(names)
+        if passes.size == 0:
+            return dict.fromkeys(names, 0.0)
+
+        hubs = np.full(size, 1 / size)
+        for _ in range(MAX_ITERATIONS):
+            previous = hubs
+            authorities = np.bincount(columns, weights=passes * previous[rows], minlength=size)
+            hubs = np.bincount(rows, weights=passes * authorities[columns], minlength=size)
+            hubs = hubs / hubs.max()
+            if np.abs(hubs - previous).sum() < TOLERANCE:
+                break
+        return dict(zip(names, (hubs / hubs.sum()).tolist()))
+
+    return graph.get_cached('hub_scores', compute)
+
+
+def find_hubs(graph: Union[Graph, ArrayGraph], count: int = 3) -> list[str]:
+    """
+    Return the names of the count players with the highest hub scores in graph, from the highest.
+    """
+    scores = hub_scores(graph)
+    return sorted(scores, key=scores.get, reverse=True)[:count]
+
+
+def centrality_table(graph: Union[Graph, ArrayGraph]) -> dict[str, dict[str, float]]:
+    """
+    Return a dict mapping every player name in graph to a dict of their 'degree', 'pagerank', 'betweenness' and
+    'hub' centralities.
+    """
+    measures = {'degree': weighted_degree(graph), 'pagerank': pagerank(graph), 'betweenness': betweenness(graph),
+                'hub': hub_scores(graph)}
+    return {name: {measure: values[name] for measure, values in measures.items()} for name in measures['degree']}
+
+
+def _pass_edges(graph: Union[Graph, ArrayGraph]) -> tuple[list[str], np.ndarray, np.ndarray, np.ndarray]:
+    """Return the player names of graph and the passer, receiver and passes of every directed edge with at least
+    one pass. Cached on graph, since every centrality starts from it."""
+    def compute() -> tuple[list[str], np.ndarray, np.ndarray, np.ndarray]:
+        matrix, names = graph.pass_matrix('raw', sparse=True)
+        rows = np.repeat(np.arange(len(names)), np.diff(matrix.indptr))
+        passed = matrix.data > 0
+        return names, rows[passed], matrix.indices[passed], matrix.data[passed]
+
+    return graph.get_cached('pass_edges', compute)
+
+
+def _accumulate_from(source: int, neighbours: list[list[tuple[int, float]]], centrality: list[float]) -> None:
+    """Add the betweenness of every player on the shortest routes from source, as in Brandes' algorithm."""
+    size = len(neighbours)
+    distance = [float('inf')] * size
+    paths = [0] * size
+    predecessors = [[] for _ in range(size)]
+    order = []
+    distance[source], paths[source] = 0.0, 1
+    heap = [(0.0, source)]
+    done = [False] * size
+
+    while heap:
+        dist, player = heapq.heappop(heap)
+        if done[player]:
+            continue
+        done[player] = True
+        order.append(player)
+        for receiver, length in neighbours[player]:
+            route = dist + length
+            if route < distance[receiver]:
+                distance[receiver] = route
+                paths[receiver] = paths[player]
+                predecessors[receiver] = [player]
+                heapq.heappush(heap, (route, receiver))
+            elif route == distance[receiver]:
+                paths[receiver] += paths[player]
+                predecessors[receiver].append(player)
+
+    dependency = [0.0] * size
+    for player in reversed(order):
+        for predecessor in predecessors[player]:
+            dependency[predecessor] += paths[predecessor] / paths[player] * (1 + dependency[player])
+        if player != source:
+            centrality[player] += dependency[player]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['heapq', 'numpy', 'array_graph', 'classes'],
+        'disable': ['E9998']
+    })
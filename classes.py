@@ -12,10 +12,12 @@ This file also contains the method that creates the graph showing all the intera
 as well as the optimal lineup in the graph.
 """
 from __future__ import annotations
-from typing import Optional
+import copy
+import heapq
+import sys
+from typing import Any, Callable, Optional, Union
 
-import networkx as nx
-import matplotlib.pyplot as plt
+import instrumentation
 
 CENTER_WEIGHTS = {'points': 1, 'rebound': 1.5, 'blocks': 1, 'steals': 1, 'assists': 1.1}
 FORWARD_WEIGHTS = {'points': 1.3, 'rebound': 1.3, 'blocks': 1, 'steals': 1.1, 'assists': 1.3}
@@ -38,6 +40,11 @@ class _Player:
         - avg_steals: The average amount of steals this player has in a minute
         - avg_blocks: The average amount of blocks this player has in a minute
         - minutes: The total number of minutes this player has played
+        - total_points: The total amount of points this player has scored
+        - total_rebounds: The total amount of rebounds this player has
+        - total_assists: The total amount of assists this player has
+        - total_steals: The total amount of steals this player has
+        - total_blocks: The total amount of blocks this player has
         - player_impact_estimate: A rating of the player based on their average statistics and weights
         - connections: A list of _Connection classes this player is a part of
 
@@ -50,6 +57,10 @@ class _Player:
         - self.minutes >= 0
 
     """
+    # Slots instead of a per-instance __dict__, since a league holds many players
+    __slots__ = ('name', 'team', 'position', 'avg_points', 'avg_rebounds', 'avg_assists', 'avg_steals', 'avg_blocks',
+                 'minutes', 'total_points', 'total_rebounds', 'total_assists', 'total_steals', 'total_blocks',
+                 'player_impact_estimate', 'connections')
     name: str
     team: str
     position: list[str]
@@ -59,6 +70,11 @@ class _Player:
     avg_steals: float
     avg_blocks: float
     minutes: int
+    total_points: float
+    total_rebounds: float
+    total_assists: float
+    total_steals: float
+    total_blocks: float
     player_impact_estimate: float
     connections: list[_Connection]
 
@@ -81,25 +97,60 @@ class _Player:
             - steals >= 0
             - blocks >= 0
         """
-        self.name = name
-        self.team = team
-        self.position = position
+        # Interned so that every copy of a name or team (such as in the keys of Graph._connections) is one string
+        self.name = sys.intern(name)
+        self.team = sys.intern(team)
+        self.position = [sys.intern(pos) for pos in position]
         self.avg_points = round(points / minutes, 3)
         self.avg_rebounds = round(rebounds / minutes, 3)
         self.avg_assists = round(assists / minutes, 3)
         self.avg_steals = round(steals / minutes, 3)
         self.avg_blocks = round(blocks / minutes, 3)
         self.minutes = minutes
+        self.total_points = points
+        self.total_rebounds = rebounds
+        self.total_assists = assists
+        self.total_steals = steals
+        self.total_blocks = blocks
         self.connections = []
         self.player_impact_estimate = self.calculate_player_impact()
 
-    def calculate_player_impact(self) -> float:
-        """Compute the Player Impact Estimate using positional weights given in the header
-        of classes.py file."""
+    def add_game(self, points: float, rebounds: float, assists: float, minutes: int, steals: float,
+                 blocks: float, weights: Optional[dict[str, dict[str, float]]] = None) -> None:
+        """
+        Add the statistics of one more game to this player's totals, then recalculate avg_points, avg_rebounds,
+        avg_assists, avg_steals, avg_blocks and player_impact_estimate from the new totals. player_impact_estimate
+        uses the given weight table (see calculate_player_impact).
+
+        >>> p = _Player("Bob", "LAL", ["Center"], 10, 5, 5, 10, 0, 0)
+        >>> p.add_game(30, 5, 5, 10, 0, 0)
+        >>> p.minutes, p.avg_points
+        (20, 2.0)
+
+        Preconditions:
+            - points >= 0 and rebounds >= 0 and assists >= 0 and minutes >= 0 and steals >= 0 and blocks >= 0
+            - self.minutes + minutes > 0
+        """
+        self.minutes += minutes
+        self.total_points += points
+        self.total_rebounds += rebounds
+        self.total_assists += assists
+        self.total_steals += steals
+        self.total_blocks += blocks
+        self.avg_points = round(self.total_points / self.minutes, 3)
+        self.avg_rebounds = round(self.total_rebounds / self.minutes, 3)
+        self.avg_assists = round(self.total_assists / self.minutes, 3)
+        self.avg_steals = round(self.total_steals / self.minutes, 3)
+        self.avg_blocks = round(self.total_blocks / self.minutes, 3)
+        self.player_impact_estimate = self.calculate_player_impact(weights)
+
+    def calculate_player_impact(self, position_weights: Optional[dict[str, dict[str, float]]] = None) -> float:
+        """Compute the Player Impact Estimate using the given weight table, by default the positional weights
+        given in the header of classes.py file."""
         primary_position = self.position[0]
 
         # Get the weight dictionary for this position
-        weights = POSITION_WEIGHTS[primary_position]
+        weights = (POSITION_WEIGHTS if position_weights is None else position_weights)[primary_position]
 
         # Compute player impact
         self.player_impact_estimate = (
@@ -118,13 +169,19 @@ class _Connection:
     Analogous to a class representation of an 'edge'.
 
     Instance Attributes:
-        - player_connection: A list containing the two _Player classes of the two connected players
+        - player_connection: A tuple containing the two _Player classes of the two connected players
         - player1_avg_assists_per_pass: The average amount of assist per pass player 1 has passing to player 2
         - player2_avg_assists_per_pass: The average amount of assist per pass player 2 has passing to player 1
         - max_avg_assists_per_pass: The maximum value of the avg_assists_per_pass of both player 1 and 2
         - avg_passes_per_minute_player1: The average amount of passes per minute player 1 makes to player 2
         - avg_passes_per_minute_player2: The average amount of passes per minute player 2 makes to player 1
         - synergy_score: Average of both players player_impact_estimate attribute
+        - player1_total_passes: The total amount of passes player 1 has made to player 2
+        - player2_total_passes: The total amount of passes player 2 has made to player 1
+        - player1_total_assists: The total amount of assists player 1 has made to player 2
+        - player2_total_assists: The total amount of assists player 2 has made to player 1
+        - player1_minutes_together: The total minutes together counted for player 1's passes to player 2
+        - player2_minutes_together: The total minutes together counted for player 2's passes to player 1
 
 
 
@@ -137,13 +194,24 @@ class _Connection:
         - self.avg_passes_per_minute_player2 >= 0
 
     """
-    player_connection: list[_Player]
+    # Slots instead of a per-instance __dict__, since a league holds many connections
+    __slots__ = ('player_connection', 'player1_avg_assists_per_pass', 'player2_avg_assists_per_pass',
+                 'max_avg_assists_per_pass', 'avg_passes_per_minute_player1', 'avg_passes_per_minute_player2',
+                 'synergy_score', 'player1_total_passes', 'player2_total_passes', 'player1_total_assists',
+                 'player2_total_assists', 'player1_minutes_together', 'player2_minutes_together')
+    player_connection: tuple[_Player, _Player]
     player1_avg_assists_per_pass: Optional[float]
     player2_avg_assists_per_pass: Optional[float]
     max_avg_assists_per_pass: Optional[float]
     avg_passes_per_minute_player1: float
     avg_passes_per_minute_player2: float
     synergy_score: float
+    player1_total_passes: float
+    player2_total_passes: float
+    player1_total_assists: float
+    player2_total_assists: float
+    player1_minutes_together: float
+    player2_minutes_together: float
 
     def __init__(self, player1: _Player, player2: _Player) -> None:
         """
@@ -155,9 +223,18 @@ class _Connection:
         passing statistics which could be different between players. For example, assists per pass for player1
         and player2 could be different if one player scores more assists per pass given.
         """
-        self.player_connection = [player1, player2]
+        self.player_connection = (player1, player2)
         self.player1_avg_assists_per_pass = 0
         self.player2_avg_assists_per_pass = 0
+        self.max_avg_assists_per_pass = 0
+        self.avg_passes_per_minute_player1 = 0
+        self.avg_passes_per_minute_player2 = 0
+        self.player1_total_passes = 0
+        self.player2_total_passes = 0
+        self.player1_total_assists = 0
+        self.player2_total_assists = 0
+        self.player1_minutes_together = 0
+        self.player2_minutes_together = 0
         self.synergy_score = self.calculate_synergy_score()
 
     def tweak_stats(self, player: _Player, assist: [int, float], passes: [int, float],
@@ -166,17 +243,44 @@ class _Connection:
         Determine if given _Player class is player1 or player2 of _Connection class.
         Then change instance attributes as needed.
 
+        assist, passes and minutes_together are the totals of the given player's passes to the other player.
+
         Preconditions:
             - not (minutes_together == 0) or (assist == 0 and passes == 0)
         """
+        assists_per_pass = round(assist / passes, 3) if passes != 0 else 0
+        passes_per_minute = round(passes / minutes_together, 3) if minutes_together != 0 else 0
+
         # Check if this is player 1
         if self.player_connection[0] == player:
-            self.player1_avg_assists_per_pass = round(assist/passes, 3)
-            self.avg_passes_per_minute_player1 = round(passes / minutes_together, 3)
+            self.player1_avg_assists_per_pass = assists_per_pass
+            self.avg_passes_per_minute_player1 = passes_per_minute
+            self.player1_total_assists, self.player1_total_passes = assist, passes
+            self.player1_minutes_together = minutes_together
         # This is player 2
         else:
-            self.player2_avg_assists_per_pass = round(assist/passes, 3)
-            self.avg_passes_per_minute_player2 = round(passes / minutes_together, 3)
+            self.player2_avg_assists_per_pass = assists_per_pass
+            self.avg_passes_per_minute_player2 = passes_per_minute
+            self.player2_total_assists, self.player2_total_passes = assist, passes
+            self.player2_minutes_together = minutes_together
+
+        self.finalize_stats()
+
+    def add_passes(self, player: _Player, assist: [int, float], passes: [int, float],
+                   minutes_together: [int, float]) -> None:
+        """
+        Add the passes of one more game by the given player to the other player in this connection, then
+        recalculate that player's averages from the new totals.
+
+        Preconditions:
+            - player in self.player_connection
+        """
+        if self.player_connection[0] == player:
+            self.tweak_stats(player, self.player1_total_assists + assist, self.player1_total_passes + passes,
+                             self.player1_minutes_together + minutes_together)
+        else:
+            self.tweak_stats(player, self.player2_total_assists + assist, self.player2_total_passes + passes,
+                             self.player2_minutes_together + minutes_together)
 
     def finalize_stats(self) -> None:
         """
@@ -219,15 +323,29 @@ class Graph:
     #                  Maps name to _Player instance.
     #     - _connections: A mapping of a tuple containing the names of two connected players to a _Connection
     #                       class containing the _Player class of the two connected players
+    #     - _adjacency: Maps each player name to a dict mapping the name of every player they are connected to
+    #                   to their _Connection class, in the order the connections were added. Used to find a
+    #                   connection or the neighbours of a player without going through _connections.
+    #     - _version: The number of times a player or the passes of a connection were added to this graph
+    #     - _cache: Maps a key to a result calculated from this graph (see get_cached), since it last changed
+    #     - _weights: The weight table the player_impact_estimate of every player is calculated with
     _players: dict[str, _Player]
     _connections: dict[tuple[str, str], _Connection]
+    _adjacency: dict[str, dict[str, _Connection]]
+    _version: int
+    _cache: dict
+    _weights: dict[str, dict[str, float]]
 
     def __init__(self) -> None:
         """
-        Initializes and empty Graph with dictionaries _players and _connections being empty.
+        Initializes and empty Graph with dictionaries _players, _connections and _adjacency being empty.
         """
         self._players = {}
         self._connections = {}
+        self._adjacency = {}
+        self._version = 0
+        self._cache = {}
+        self._weights = POSITION_WEIGHTS
 
     def add_player(self, player: _Player) -> None:
         """
@@ -242,6 +360,87 @@ class Graph:
         """
         if player.name not in self._players:
             self._players[player.name] = player
+            self._adjacency[player.name] = {}
+            self._changed()
+
+    def remove_player(self, name: str) -> list[_Connection]:
+        """
+        Remove the _Player class with the given name and all of its connections from this graph, and return the
+        removed _Connection classes. The connections are also removed from the connections of the other players.
+        Adding the player back with add_player and the connections with insert_connection undoes this, except that
+        they are added at the end; restore_order with the get_order from before the removal puts them back in place.
+
+        >>> g = Graph()
+        >>> g.add_player(_Player("Bob", "LAL", ["Center"], 5, 5, 5, 5, 5, 5))
+        >>> g.add_player(_Player("Ann", "LAL", ["Guard"], 5, 5, 5, 5, 5, 5))
+        >>> g.add_connection(g.get_player("Bob"), "Ann", 1, 4, 10)
+        >>> len(g.remove_player("Bob")), g.get_player("Ann").connections, g.get_connections()
+        (1, [], [])
+
+        Preconditions:
+            - name in self._players
+        """
+        player = self._players.pop(name)
+        del self._adjacency[name]
+        removed, player.connections = player.connections, []
+        for connection in removed:
+            player1, player2 = connection.player_connection
+            other = player2 if player1 is player else player1
+            del self._connections[(player1.name, player2.name)]
+            del self._adjacency[other.name][name]
+            other.connections.remove(connection)
+        self._changed()
+        return removed
+
+    def get_order(self) -> tuple[list[str], list[tuple[str, str]]]:
+        """
+        Returns the names of the players and the (player1 name, player2 name) of the connections of this graph, in
+        the order of get_players and get_connections.
+        """
+        return list(self._players), list(self._connections)
+
+    def restore_order(self, order: tuple[list[str], list[tuple[str, str]]]) -> None:
+        """
+        Put the players and connections of this graph, and the connections of every player, back in the given
+        order from get_order. This undoes the reordering caused by removing a player and adding it back.
+
+        >>> g = Graph()
+        >>> for name in ("Bob", "Ann", "Cid"):
+        ...     g.add_player(_Player(name, "LAL", ["Center"], 5, 5, 5, 5, 5, 5))
+        >>> g.add_connection(g.get_player("Bob"), "Ann", 1, 4, 10)
+        >>> order = g.get_order()
+        >>> bob, removed = g.get_player("Bob"), g.remove_player("Bob")
+        >>> g.add_player(bob)
+        >>> g.insert_connection(removed[0])
+        >>> g.restore_order(order)
+        >>> g.get_order() == order
+        True
+
+        Preconditions:
+            - set(order[0]) == set(self._players) and set(order[1]) == set(self._connections)
+        """
+        names, keys = order
+        self._players = {name: self._players[name] for name in names}
+        self._connections = {key: self._connections[key] for key in keys}
+        self._adjacency = {name: {} for name in names}
+        for player in self._players.values():
+            player.connections = []
+        # Every player's connections were added in the same order as the connections of this graph
+        for connection in self._connections.values():
+            self._link(connection)
+        self._changed()
+
+    def get_players(self) -> list[_Player]:
+        """
+        Returns a list of every _Player class in this graph, in the order they were added.
+        """
+        return list(self._players.values())
+
+    def get_player(self, name: str) -> Optional[_Player]:
+        """
+        Returns the _Player class with the given name, or None if there is no such player in this graph.
+        """
+        return self._players.get(name)
 
     def add_connection(self, player1: _Player, player2: str, assist: [int, float], passes: [int, float],
                        minutes_together: [int, float]) -> None:
@@ -253,21 +452,77 @@ class Graph:
         """
         if not self.check_exists(player1.name, player2):
             new_connection = _Connection(player1, self._players[player2])
-            self._connections[(player1.name, player2)] = new_connection
+            # Key by the players' own (interned) names rather than the given string, so the key holds no copies
+            self._connections[(player1.name, new_connection.player_connection[1].name)] = new_connection
+            self._link(new_connection)
+            if instrumentation.ENABLED:
+                instrumentation.count('edges_created')
+
+        self._adjacency[player1.name][player2].tweak_stats(player1, assist, passes, minutes_together)
+        self._changed()
+
+    def insert_connection(self, connection: _Connection) -> None:
+        """
+        Adds an already built _Connection class to this graph, for example one restored from 'graph_cache.py'.
 
-        connection_key = self.get_connection_key(player1.name, player2)
-        self._connections[connection_key].tweak_stats(player1, assist, passes, minutes_together)
+        Preconditions:
+            - all(player.name in self._players for player in connection.player_connection)
+            - not self.check_exists(connection.player_connection[0].name, connection.player_connection[1].name)
+        """
+        player1, player2 = connection.player_connection
+        self._connections[(player1.name, player2.name)] = connection
+        self._link(connection)
+        self._changed()
+
+    def apply_game(self, game: list[dict]) -> set[str]:
+        """
+        Add the box score and passes of one game to this graph without rebuilding it, and return the names of the
+        players whose statistics changed. Players that are not in this graph yet are added.
+
+        Only the players in game, their connections and the connections in game are updated, so the time taken
+        is proportional to the size of game rather than the size of this graph.
+
+        Preconditions:
+            - game in same format as the LAL.json and DAL.json files, holding the statistics of a single game
+            - every player in game played more than 0 minutes in total
+        """
+        affected = apply_box_scores(self, game)
+        if affected:
+            # The statistics of some players changed, even if game has no passes. Every player who passed in game
+            # is in affected, so this also covers the passes added below.
+            self._changed()
+
+        for record in game:
+            player = self._players[record['name']]
+            neighbours = self._adjacency[player.name]
+            for receiver, passes in record['passes_to'].items():
+                if receiver in neighbours:
+                    neighbours[receiver].add_passes(player, passes['assists'], passes['total_passes'],
+                                                    passes['minutes_together'])
+                else:
+                    self.add_connection(player, receiver, passes['assists'], passes['total_passes'],
+                                        passes['minutes_together'])
+
+        # Recalculate the synergy score of each connection of the affected players once, from the side of its
+        # first player, or of its second player if the first is not affected
+        for name in affected:
+            for connection in self._players[name].connections:
+                first = connection.player_connection[0].name
+                if first == name or first not in affected:
+                    connection.synergy_score = connection.calculate_synergy_score()
+
+        return affected
 
     def check_exists(self, player1_name: str, player2_name: str) -> bool:
         """
-        Check whether the tuple (player1_name, player2_name) or (player2_name, player1_name) exists
-        in self._connections as a key.
+        Check whether player1_name and player2_name are connected, in either order.
 
         Preconditions:
             - player1_name in self._players and player2_name in self._players
         """
-        keys = self._connections.keys()
-        return (player1_name, player2_name) in keys or (player2_name, player1_name) in keys
+        if instrumentation.ENABLED:
+            instrumentation.count('check_exists_lookups')
+        return player2_name in self._adjacency[player1_name]
 
     def __str__(self) -> str:
         str_so_far = "PLAYERS\n"
@@ -280,36 +535,242 @@ class Graph:
 
         return str_so_far
 
-    def get_passes_per_minute_dict(self, player1_name: str, player_names: list) -> dict:
+    def get_passes_per_minute_dict(self, player1_name: str, player_names: Optional[list] = None) -> dict:
         """
-        Returns a dict of the average passes per minute of the given player1_name to all the players player1_name
-        has passed to
+        Returns a dict of the average passes per minute of the given player1_name to all the players in
+        player_names, by default every player player1_name is connected to.
 
         Preconditions:
             - player1_name in self._players
-            - all([player in self._players for player in player_names])
+            - player_names is None or all([self.check_exists(player1_name, player) for player in player_names])
+        """
+        neighbours = self._adjacency[player1_name]
+        if player_names is None:
+            player_names = list(neighbours)
+        return {name: neighbours[name].get_avg_passes_per_minute(player1_name) for name in player_names}
+
+    def neighbours(self, player_name: str) -> list[str]:
+        """
+        Returns the names of every player connected to player_name, in the order the connections were added.
+        This takes time proportional to the number of connections of player_name, not of this graph.
+
+        >>> g = Graph()
+        >>> for name in ["Bob", "Ann", "Cal"]:
+        ...     g.add_player(_Player(name, "LAL", ["Center"], 5, 5, 5, 5, 5, 5))
+        >>> g.add_connection(g.get_player("Cal"), "Bob", 1, 4, 10)
+        >>> g.add_connection(g.get_player("Bob"), "Ann", 0, 2, 10)
+        >>> g.neighbours("Bob")
+        ['Cal', 'Ann']
+
+        Preconditions:
+            - player_name in self._players
+        """
+        return list(self._adjacency[player_name])
+
+    def top_passing_partners(self, player_name: str, k: int = 5) -> list[tuple[str, float]]:
+        """
+        Returns the (name, average passes per minute) of the k players that player_name passes to the most per
+        minute, from the most. Ties go to the connection that was added first.
+
+        >>> g = Graph()
+        >>> for name in ["Bob", "Ann", "Cal"]:
+        ...     g.add_player(_Player(name, "LAL", ["Center"], 5, 5, 5, 5, 5, 5))
+        >>> g.add_connection(g.get_player("Bob"), "Cal", 1, 4, 10)
+        >>> g.add_connection(g.get_player("Bob"), "Ann", 0, 6, 10)
+        >>> g.top_passing_partners("Bob", 1)
+        [('Ann', 0.6)]
+
+        Preconditions:
+            - player_name in self._players
+            - k >= 0
+        """
+        return heapq.nlargest(k, self.get_passes_per_minute_dict(player_name).items(), key=lambda item: item[1])
+
+    def ego_network(self, player_name: str, radius: int = 1) -> Graph:
         """
-        pass_data = {}
-        for player2_name in player_names:
-            curr_key = self.get_connection_key(player1_name, player2_name)
-            pass_data[player2_name] = self._connections[curr_key].get_avg_passes_per_minute(player1_name)
-        return pass_data
+        Returns a new Graph of player_name, every player within radius connections of player_name, and every
+        connection between those players. The players and connections of the new Graph are copies, so changing
+        it does not change this graph.
+
+        The players are found by going out from player_name one connection at a time, so this takes time
+        proportional to the connections of those players, not of this graph.
+
+        >>> g = Graph()
+        >>> for name in ["Bob", "Ann", "Cal", "Dee"]:
+        ...     g.add_player(_Player(name, "LAL", ["Center"], 5, 5, 5, 5, 5, 5))
+        >>> g.add_connection(g.get_player("Bob"), "Ann", 1, 4, 10)
+        >>> g.add_connection(g.get_player("Ann"), "Cal", 1, 4, 10)
+        >>> g.add_connection(g.get_player("Cal"), "Dee", 1, 4, 10)
+        >>> ego = g.ego_network("Bob")
+        >>> [player.name for player in ego.get_players()], len(ego.get_connections())
+        (['Bob', 'Ann'], 1)
+        >>> [player.name for player in g.ego_network("Bob", 2).get_players()]
+        ['Bob', 'Ann', 'Cal']
+
+        Preconditions:
+            - player_name in self._players
+            - radius >= 0
+        """
+        names = [player_name]
+        found = {player_name}
+        frontier = [player_name]
+        for _ in range(radius):
+            next_frontier = []
+            for name in frontier:
+                for neighbour in self._adjacency[name]:
+                    if neighbour not in found:
+                        found.add(neighbour)
+                        names.append(neighbour)
+                        next_frontier.append(neighbour)
+            frontier = next_frontier
+
+        ego = Graph()
+        ego.set_weights(self._weights)
+        copies = {}
+        for name in names:
+            player = copy.copy(self._players[name])
+            player.connections = []
+            copies[name] = player
+            ego.add_player(player)
+
+        for name in names:
+            for neighbour, connection in self._adjacency[name].items():
+                player1, player2 = connection.player_connection
+                # Each connection between two found players is copied once, from player1's side
+                if neighbour in found and player1.name == name:
+                    connection = copy.copy(connection)
+                    connection.player_connection = (copies[player1.name], copies[player2.name])
+                    ego.insert_connection(connection)
+        return ego
+
+    def pass_matrix(self, normalization: str = 'per_minute', sparse: bool = False,
+                    players: Optional[list[str]] = None) -> tuple:
+        """
+        Returns the pass matrix of this graph with the given normalization (see 'pass_matrix.py'), alongside the
+        list of player names its rows and columns refer to. The matrix is a NumPy array, or a CSRMatrix from
+        'array_graph.py' if sparse is True.
+
+        players chooses the players and their order; by default every player in the order they were added.
+
+        Preconditions:
+            - players is None or all(player in self._players for player in players)
+        """
+        # Imported here so that NumPy is only loaded once a pass matrix is needed
+        import numpy as np
+        from pass_matrix import build_pass_matrix
+
+        names = list(self._players) if players is None else list(players)
+        index = {name: i for i, name in enumerate(names)}
+        connections = list(self._connections.values())
+
+        # One list per attribute instead of one tuple per connection keeps this loop cheap on large graphs
+        first = np.array([index.get(c.player_connection[0].name, -1) for c in connections], dtype=np.intp)
+        second = np.array([index.get(c.player_connection[1].name, -1) for c in connections], dtype=np.intp)
+        kept = (first >= 0) & (second >= 0)
+        rows = np.concatenate([first[kept], second[kept]])
+        columns = np.concatenate([second[kept], first[kept]])
+
+        def directed(attribute1: str, attribute2: str) -> np.ndarray:
+            """Return attribute1 of the kept connections followed by their attribute2, matching rows."""
+            return np.concatenate([np.array([getattr(c, attribute1) for c in connections], dtype=np.float64)[kept],
+                                   np.array([getattr(c, attribute2) for c in connections], dtype=np.float64)[kept]])
+
+        passes = directed('player1_total_passes', 'player2_total_passes')
+        assists = directed('player1_total_assists', 'player2_total_assists')
+        minutes = directed('player1_minutes_together', 'player2_minutes_together')
+        return build_pass_matrix(rows, columns, passes, assists, minutes, len(names), normalization, sparse), names
 
     def get_connection_key(self, player1_name: str, player2_name: str) -> tuple[str, str]:
         """
-        Returns the key in self._connections associated with the given player1_name and player2_name
+        Returns the key in self._connections associated with the given player1_name and player2_name, which is
+        the two names in the order the connection was first added, whichever order they are given in.
 
         Preconditions:
             - player1_name in self._players and player2_name in self._players
         """
-        if (player1_name, player2_name) in self._connections:
-            return (player1_name, player2_name)
-        else:
+        connection = self._adjacency[player1_name].get(player2_name)
+        if connection is None:
             return (player2_name, player1_name)
+        return (connection.player_connection[0].name, connection.player_connection[1].name)
+
+    def get_connection(self, player1_name: str, player2_name: str) -> Optional[_Connection]:
+        """
+        Returns the _Connection class between player1_name and player2_name, or None if the two players
+        have no connection.
+        """
+        return self._adjacency.get(player1_name, {}).get(player2_name)
 
-    def visualize_graph(self, ideal_lineup: list[_Player]) -> None:
+    def get_connections(self) -> list[_Connection]:
+        """
+        Returns a list of every _Connection class in this graph.
         """
-        Function creates a graph and returns it.
+        return list(self._connections.values())
+
+    def get_version(self) -> int:
+        """
+        Returns a number that grows every time a player or the passes of a connection are added to this graph,
+        so results calculated from this graph can tell whether they are out of date.
+        """
+        return self._version
+
+    def get_cached(self, key: object, compute: Callable[[], Any]) -> Any:
+        """
+        Returns the result of compute(), which calculates something from this graph, such as a centrality in
+        'centrality.py'. The result is kept under key and returned again without calling compute, until a player
+        or the passes of a connection are added to this graph.
+
+        >>> g = Graph()
+        >>> g.get_cached('answer', lambda: 42)
+        42
+        >>> g.get_cached('answer', lambda: 0)
+        42
+        >>> g.add_player(_Player("Bob", "LAL", ["Center"], 5, 5, 5, 5, 5, 5))
+        >>> g.get_cached('answer', lambda: 0)
+        0
+        """
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def get_weights(self) -> dict[str, dict[str, float]]:
+        """
+        Returns the weight table, in the same format as POSITION_WEIGHTS, that the player_impact_estimate of every
+        player in this graph is calculated with.
+        """
+        return self._weights
+
+    def set_weights(self, weights: dict[str, dict[str, float]]) -> None:
+        """
+        Record that the player_impact_estimate of every player in this graph is now calculated with the given weight
+        table (see ImpactModel.apply in 'impact.py'), so the players updated by apply_game use it too.
+        """
+        self._weights = weights
+
+    def refresh_synergy_scores(self) -> None:
+        """
+        Recalculate the synergy score of every connection, after the player_impact_estimate of some players changed.
+        """
+        for connection in self._connections.values():
+            connection.synergy_score = connection.calculate_synergy_score()
+
+    def _changed(self) -> None:
+        """Record that a player or the passes of a connection were added, so every cached result is out of date."""
+        self._version += 1
+        self._cache.clear()
+
+    def _link(self, connection: _Connection) -> None:
+        """Add connection to the connections and the adjacency of both of its players."""
+        player1, player2 = connection.player_connection
+        player1.connections.append(connection)
+        player2.connections.append(connection)
+        self._adjacency[player1.name][player2.name] = connection
+        self._adjacency[player2.name][player1.name] = connection
+
+    def visualize_graph(self, ideal_lineup: list[_Player], output_path: Optional[str] = None,
+                        min_passes: float = 0, top_k: Optional[int] = None) -> None:
+        """
+        Function creates a graph and returns it. If output_path is given, the graph is written to that file
+        instead (see 'visualization.py').
         Each player's name is self._players is a blue color nodes. If player name
         is in ideal_lineup, the node is colored blue.
 
@@ -317,38 +778,53 @@ class Graph:
         If connection synergy score is above 1.75: it is colored green
         If it is between 0.75 and 1.75: it is colored purple
         If it is below 0.75: it is colored dark red
+
+        On large graphs, min_passes and top_k leave out the connections with few passes (see draw_graph in
+        'visualization.py').
         """
-        nxgraph = nx.Graph()
+        # Imported here so that the plotting libraries are only loaded once a graph is drawn
+        from visualization import draw_graph
 
-        node_colors = []
-        for vertex in self._players:
-            nxgraph.add_node(vertex)
-            if self._players[vertex] in ideal_lineup:
-                node_colors.append('green')
-            else:
-                node_colors.append('blue')
+        draw_graph(self, ideal_lineup, output_path, min_passes, top_k)
 
-        for connection in self._connections:
-            connection_object = self._connections[connection]
-            connection_score = connection_object.synergy_score
 
-            # init edge color
-            col = None
+def apply_box_scores(graph: Graph, game: list[dict]) -> set[str]:
+    """
+    Add the box score of every player in game to their _Player class in graph, adding the players that are not in
+    graph yet, and return the names of the players in game. Used by the apply_game method of the graph classes.
+    The player_impact_estimate of these players is calculated with the weight table of graph.
+
+    Preconditions:
+        - game in same format as the LAL.json and DAL.json files, holding the statistics of a single game
+    """
+    affected = set()
+    weights = graph.get_weights()
+    for record in game:
+        defense = record['defensive_stats']
+        assists = sum(passes['assists'] for passes in record['passes_to'].values())
+        player = graph.get_player(record['name'])
+        if player is not None:
+            player.add_game(defense['points'], defense['rebounds'], assists, defense['minutes'], defense['steals'],
+                            defense['blocks'], weights)
+        else:
+            player = _Player(record['name'], record['team'], record['positions'], defense['points'],
+                             defense['rebounds'], assists, defense['minutes'], defense['steals'], defense['blocks'])
+            player.player_impact_estimate = player.calculate_player_impact(weights)
+            graph.add_player(player)
+        affected.add(record['name'])
+    return affected
 
-            if connection_score >= 1.75:
-                col = 'green'
-            elif connection_score > 0.75:
-                col = '#8A2BE2'
-            else:
-                col = 'darkred'
 
-            nxgraph.add_edge(connection[0], connection[1])
-            nxgraph.edges[connection[0], connection[1]]['color'] = col
 
-        pos = nx.circular_layout(nxgraph)
-        plt.figure(figsize=(10, 7))
-        edge_colors_for_drawing = [nxgraph.edges[edge]['color'] for edge in nxgraph.edges]
-        nx.draw(nxgraph, pos, with_labels=True, edge_color=edge_colors_for_drawing, node_color=node_colors, font_size=10, alpha=0.7)
+def whole_number(value: float) -> Union[int, float]:
+    """
+    Return value as an int if it is a whole number, so that totals read back as floats, such as the sums of
+    SQLite REAL columns or NumPy arrays, are ints again like the totals in the datafiles.
+
+    >>> whole_number(12.0), whole_number(2.5)
+    (12, 2.5)
+    """
+    return int(value) if float(value).is_integer() else value
 
 
 if __name__ == '__main__':
@@ -358,6 +834,6 @@ if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config={
         'max-line-length': 200,
-        'extra-imports': ['networkx', 'matplotlib.pyplot'],
-        'disable': ['E9998', 'R0914', 'R0902', 'R0913', 'E9959', 'C0201', 'E9972', 'E9989']
+        'extra-imports': ['copy', 'heapq', 'sys', 'instrumentation', 'visualization', 'pass_matrix'],
+        'disable': ['E9998', 'R0914', 'R0902', 'R0913', 'E9959', 'C0201', 'E9972', 'E9989', 'C0415']
     })
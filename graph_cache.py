@@ -0,0 +1,206 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module contains the compiled graph cache. After a datafile is loaded once, the built graph is saved as a
+snapshot of NumPy arrays: a player table, an edge table and the derived statistics (the per-minute averages,
+player impact estimates and synergy scores). Later loads of the same datafile read those arrays and rebuild the
+graph from them, skipping the JSON parsing and all the statistics arithmetic.
+
+Snapshots are keyed by a hash of the datafile's contents, so editing the datafile automatically invalidates its
+snapshot. The cache directory is kept under a size limit by evicting the least recently used snapshots.
+"""
+from __future__ import annotations
+import gc
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+from typing import Optional
+
+import numpy as np
+
+from classes import Graph, _Player, _Connection
+
+# Bump this whenever the layout of a snapshot changes, so that older snapshots are no longer used
+CACHE_VERSION = 2
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+PLAYER_STATS = ('avg_points', 'avg_rebounds', 'avg_assists', 'avg_steals', 'avg_blocks', 'minutes',
+                'player_impact_estimate', 'total_points', 'total_rebounds', 'total_assists', 'total_steals',
+                'total_blocks')
+CONNECTION_STATS = ('player1_avg_assists_per_pass', 'player2_avg_assists_per_pass', 'max_avg_assists_per_pass',
+                    'avg_passes_per_minute_player1', 'avg_passes_per_minute_player2', 'synergy_score',
+                    'player1_total_passes', 'player2_total_passes', 'player1_total_assists',
+                    'player2_total_assists', 'player1_minutes_together', 'player2_minutes_together')
+
+# The arrays of a snapshot, each saved as its own .npy file
+SNAPSHOT_ARRAYS = ('names', 'teams', 'positions', 'player_stats', 'edge_players', 'edge_stats', 'partners')
+
+
+def source_key(filename: str) -> str:
+    """Return the cache key of the datafile with the given filename, which changes whenever its contents do."""
+    digest = hashlib.sha256(f'v{CACHE_VERSION}:'.encode())
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_cached_graph(key: str, cache_dir: str) -> Optional[tuple[Graph, dict[str, tuple[_Player, list[str]]]]]:
+    """
+    Return the graph saved in cache_dir under key, alongside a dict mapping each player name to a tuple of its
+    _Player class and the names of the players it passed to. Return None if there is no such snapshot.
+    """
+    entry = os.path.join(cache_dir, key)
+    if not os.path.isdir(entry):
+        return None
+
+    # The snapshot creates many objects at once, none of which can be garbage yet, so pause the cyclic garbage
+    # collector instead of letting it rescan them over and over
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        try:
+            arrays = {name: np.load(os.path.join(entry, f'{name}.npy')) for name in SNAPSHOT_ARRAYS}
+        except (OSError, ValueError):
+            # A snapshot that was only partly written or is otherwise unreadable is treated as missing
+            return None
+
+        graph = Graph()
+        players = snapshot_players(arrays)
+        for player in players:
+            graph.add_player(player)
+        for connection in snapshot_connections(arrays, players):
+            graph.insert_connection(connection)
+
+        partner_names = {player.name: (player, []) for player in players}
+        for passer, receiver in arrays['partners'].tolist():
+            partner_names[players[passer].name][1].append(players[receiver].name)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    # Mark this snapshot as recently used, so it is the last to be evicted
+    os.utime(entry)
+    return graph, partner_names
+
+
+def store_cached_graph(key: str, cache_dir: str, graph: Graph, players: dict[str, tuple[_Player, list[str]]],
+                       max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+    """
+    Save a snapshot of graph in cache_dir under key, then evict the least recently used snapshots until the cache
+    directory is at most max_bytes in size.
+
+    Preconditions:
+        - players maps every player in graph to a tuple of its _Player class and the names it passed to
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    arrays = snapshot_arrays(graph, players)
+
+    # Write into a temporary directory first, so other processes never see a partly written snapshot
+    staging = tempfile.mkdtemp(dir=cache_dir, prefix='.tmp-')
+    for name, array in arrays.items():
+        np.save(os.path.join(staging, f'{name}.npy'), array)
+    try:
+        os.replace(staging, os.path.join(cache_dir, key))
+    except OSError:
+        # Another process stored the same snapshot first
+        shutil.rmtree(staging, ignore_errors=True)
+
+    evict(cache_dir, max_bytes)
+
+
+def snapshot_arrays(graph: Graph, players: dict[str, tuple[_Player, list[str]]]) -> dict[str, np.ndarray]:
+    """
+    Return the arrays of a snapshot of graph, mapping each name in SNAPSHOT_ARRAYS to its array. The players are
+    in the order of players, and the connections in the order of graph.get_connections().
+
+    Preconditions:
+        - players maps every player in graph to a tuple of its _Player class and the names it passed to
+    """
+    player_list = [players[name][0] for name in players]
+    index = {player.name: i for i, player in enumerate(player_list)}
+    connections = graph.get_connections()
+
+    return {
+        'names': np.array([player.name for player in player_list], dtype=str),
+        'teams': np.array([player.team for player in player_list], dtype=str),
+        'positions': np.array([','.join(player.position) for player in player_list], dtype=str),
+        'player_stats': np.array([[getattr(player, attribute) for attribute in PLAYER_STATS]
+                                  for player in player_list], dtype=np.float64).reshape(-1, len(PLAYER_STATS)),
+        'edge_players': np.array([[index[player.name] for player in connection.player_connection]
+                                  for connection in connections], dtype=np.int32).reshape(-1, 2),
+        'edge_stats': np.array([[getattr(connection, attribute) for attribute in CONNECTION_STATS]
+                                for connection in connections], dtype=np.float64).reshape(-1, len(CONNECTION_STATS)),
+        'partners': np.array([[index[name], index[partner]] for name in players for partner in players[name][1]],
+                             dtype=np.int32).reshape(-1, 2),
+    }
+
+
+def snapshot_players(arrays: dict[str, np.ndarray]) -> list[_Player]:
+    """
+    Return the _Player classes of the snapshot with the given arrays, in order, with their statistics set from the
+    snapshot instead of calculated again. Their connections are left empty.
+    """
+    players = []
+    for name, team, position, stats in zip(arrays['names'].tolist(), arrays['teams'].tolist(),
+                                           arrays['positions'].tolist(), arrays['player_stats'].tolist()):
+        player = _Player.__new__(_Player)
+        player.name, player.team, player.connections = sys.intern(name), sys.intern(team), []
+        player.position = [sys.intern(pos) for pos in position.split(',')]
+        (player.avg_points, player.avg_rebounds, player.avg_assists, player.avg_steals, player.avg_blocks,
+         player.minutes, player.player_impact_estimate, player.total_points, player.total_rebounds,
+         player.total_assists, player.total_steals, player.total_blocks) = stats
+        player.minutes = int(player.minutes)
+        players.append(player)
+    return players
+
+
+def snapshot_connections(arrays: dict[str, np.ndarray], players: list[_Player]) -> list[_Connection]:
+    """
+    Return the _Connection classes of the snapshot with the given arrays, in order, between the given players
+    from snapshot_players, with their statistics set from the snapshot.
+    """
+    connections = []
+    for (index1, index2), stats in zip(arrays['edge_players'].tolist(), arrays['edge_stats'].tolist()):
+        connection = _Connection.__new__(_Connection)
+        connection.player_connection = (players[index1], players[index2])
+        (connection.player1_avg_assists_per_pass, connection.player2_avg_assists_per_pass,
+         connection.max_avg_assists_per_pass, connection.avg_passes_per_minute_player1,
+         connection.avg_passes_per_minute_player2, connection.synergy_score, connection.player1_total_passes,
+         connection.player2_total_passes, connection.player1_total_assists, connection.player2_total_assists,
+         connection.player1_minutes_together, connection.player2_minutes_together) = stats
+        connections.append(connection)
+    return connections
+
+
+def evict(cache_dir: str, max_bytes: int) -> None:
+    """Remove the least recently used snapshots in cache_dir until its total size is at most max_bytes."""
+    entries = []
+    for key in os.listdir(cache_dir):
+        entry = os.path.join(cache_dir, key)
+        if os.path.isdir(entry) and not key.startswith('.'):
+            size = sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry))
+            entries.append((os.path.getmtime(entry), size, entry))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, entry in sorted(entries):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['gc', 'hashlib', 'os', 'shutil', 'sys', 'tempfile', 'numpy', 'classes'],
+        'disable': ['E9998', 'R0914', 'W0212']
+    })
@@ -0,0 +1,149 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module contains the batch Player Impact Estimate (PIE) calculation. Instead of calling
+_Player.calculate_player_impact once per player, ImpactModel keeps the per-minute statistics of every player in a
+single matrix and calculates every player's PIE at once for any table of positional weights. Re-weighting a whole
+league then only costs a few array operations, without reloading any datafile.
+"""
+from __future__ import annotations
+from typing import Optional, Union
+
+import numpy as np
+
+from array_graph import ArrayGraph, round3
+from classes import Graph, _Player, POSITION_WEIGHTS
+
+# The rows of a weight matrix, and the columns of both the stats matrix and a weight matrix
+POSITIONS = ('Center', 'Forward', 'Guard')
+STATS = ('points', 'rebound', 'assists', 'steals', 'blocks')
+PLAYER_ATTRIBUTES = ('avg_points', 'avg_rebounds', 'avg_assists', 'avg_steals', 'avg_blocks')
+
+
+def weight_matrix(position_weights: dict[str, dict[str, float]]) -> np.ndarray:
+    """
+    Return the weight matrix of the given weight table, which is in the same format as POSITION_WEIGHTS in
+    'classes.py'. Row i holds the weights of POSITIONS[i], in the order of STATS.
+
+    >>> weight_matrix(POSITION_WEIGHTS)[2].tolist()
+    [1.6, 0.9, 1.7, 1.6, 0.7]
+    """
+    return np.array([[position_weights[position][stat] for stat in STATS] for position in POSITIONS])
+
+
+def weight_table(weights: np.ndarray) -> dict[str, dict[str, float]]:
+    """
+    Return the weight table of the given weight matrix, which is the inverse of weight_matrix.
+
+    >>> weight_table(weight_matrix(POSITION_WEIGHTS)) == POSITION_WEIGHTS
+    True
+    """
+    return {position: dict(zip(STATS, row)) for position, row in zip(POSITIONS, np.asarray(weights).tolist())}
+
+
+def impact_from_stats(stats: np.ndarray, position_ids: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Return the player impact estimates of the players with the given stats matrix and primary positions, using the
+    given weight matrix, or stack of weight matrices. See ImpactModel for the meaning of stats and position_ids.
+    stats can also be a stack of stats matrices (such as one per window of games in 'windows.py') used with a
+    single weight matrix.
+    """
+    # The weight of each statistic for each player, picked by the player's primary position
+    player_weights = np.asarray(weights)[..., position_ids, :]
+
+    # Add up the statistics in the same order as _Player.calculate_player_impact, so the results match exactly
+    impact = stats[..., 0] * player_weights[..., 0]
+    for column in range(1, len(STATS)):
+        impact = impact + stats[..., column] * player_weights[..., column]
+    return round3(impact)
+
+
+class ImpactModel:
+    """ The per-minute statistics of a fixed group of players, used to calculate all of their player impact
+    estimates at once.
+
+    Instance Attributes:
+        - players: The players of this model, in the order of the rows of stats
+        - stats: stats[i] holds the per-minute statistics of players[i], in the order of PLAYER_ATTRIBUTES
+        - position_ids: position_ids[i] is the index in POSITIONS of the primary position of players[i]
+
+    Representation Invariants:
+        - self.stats.shape == (len(self.players), len(PLAYER_ATTRIBUTES))
+        - self.position_ids.shape == (len(self.players),)
+    """
+    players: list[_Player]
+    stats: np.ndarray
+    position_ids: np.ndarray
+
+    def __init__(self, players: list[_Player]) -> None:
+        """
+        Initialize a new ImpactModel of the given players.
+
+        Preconditions:
+            - all(player.position[0] in POSITIONS for player in players)
+        """
+        self.players = players
+        self.stats = np.array([[getattr(player, attribute) for attribute in PLAYER_ATTRIBUTES]
+                               for player in players], dtype=np.float64).reshape(-1, len(PLAYER_ATTRIBUTES))
+        self.position_ids = np.array([POSITIONS.index(player.position[0]) for player in players], dtype=np.intp)
+
+    def compute(self, weights: Union[None, dict[str, dict[str, float]], np.ndarray] = None) -> np.ndarray:
+        """
+        Return the player impact estimate of every player, using the given weight table or weight matrix.
+        The default weights are POSITION_WEIGHTS in 'classes.py'.
+
+        The weights of many tables can be given at once as an array of shape (k, len(POSITIONS), len(STATS)),
+        in which case an array of shape (k, len(self.players)) is returned.
+        """
+        if weights is None:
+            weights = POSITION_WEIGHTS
+        if isinstance(weights, dict):
+            weights = weight_matrix(weights)
+
+        return impact_from_stats(self.stats, self.position_ids, weights)
+
+    def apply(self, graph: Graph | ArrayGraph,
+              weights: Union[None, dict[str, dict[str, float]], np.ndarray] = None) -> np.ndarray:
+        """
+        Calculate the player impact estimate of every player with the given weights, write them back into the
+        players and update the synergy scores of graph. graph records the weights, so that players updated later
+        by its apply_game method use them too. Return the calculated player impact estimates.
+
+        Preconditions:
+            - all(player in graph.get_players() for player in self.players)
+            - weights is None or not isinstance(weights, np.ndarray) or weights.ndim == 2
+        """
+        impact = self.compute(weights)
+        for player, value in zip(self.players, impact.tolist()):
+            player.player_impact_estimate = value
+        if weights is None:
+            graph.set_weights(POSITION_WEIGHTS)
+        else:
+            graph.set_weights(weight_table(weights) if isinstance(weights, np.ndarray) else weights)
+        graph.refresh_synergy_scores()
+        return impact
+
+
+def batch_player_impact(graph: Graph | ArrayGraph, weights: Optional[dict[str, dict[str, float]]] = None,
+                        write_back: bool = True) -> np.ndarray:
+    """
+    Return the player impact estimate of every player in graph, in the order of graph.get_players(), using the
+    given weight table. If write_back is True, also store them in the players and update the synergy scores.
+    """
+    model = ImpactModel(graph.get_players())
+    if write_back:
+        return model.apply(graph, weights)
+    return model.compute(weights)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['numpy', 'array_graph', 'classes'],
+        'disable': ['E9998']
+    })
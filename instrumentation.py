@@ -0,0 +1,195 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module contains the instrumentation of this project: named timing spans and counters around the stages of
+loading a datafile, generating a lineup and drawing the visualizations. It is off by default, and then a span is
+a shared object that does nothing and a counter is never touched, so it can stay in the code of production runs.
+
+Turn it on with enable() (or by setting the TOPHOOPS_INSTRUMENT environment variable to 1), run the code, then
+look at the results with summary() or print_summary(), or write them as Chrome trace JSON with
+export_chrome_trace and open the file at chrome://tracing or https://ui.perfetto.dev. For example:
+
+    >>> enable()
+    >>> with span('example'):
+    ...     count('example_items', 3)
+    >>> summary()['counters']
+    {'example_items': 3}
+    >>> summary()['spans']['example']['calls']
+    1
+    >>> disable()
+    >>> reset()
+
+The code being measured uses span for stages and count for counters. A counter inside a loop should be guarded
+with 'if instrumentation.ENABLED:', so that a disabled counter costs a single attribute lookup.
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from typing import Any, NamedTuple
+
+# Whether spans and counters are recorded. Read it as instrumentation.ENABLED, since enable and disable change it.
+ENABLED = os.environ.get('TOPHOOPS_INSTRUMENT', '') == '1'
+
+
+class SpanRecord(NamedTuple):
+    """ One finished timing span.
+
+    Instance Attributes:
+        - name: The name of the span
+        - start_ns: When the span started, in nanoseconds of time.perf_counter_ns
+        - duration_ns: How long the span took, in nanoseconds
+        - thread_id: The identifier of the thread the span ran in
+    """
+    name: str
+    start_ns: int
+    duration_ns: int
+    thread_id: int
+
+
+# The finished spans and the counters recorded since the last reset, and when that reset was
+_spans = []
+_counters = {}
+_origin_ns = time.perf_counter_ns()
+
+
+class _Span:
+    """ A context manager recording how long its block took as a SpanRecord. """
+    # Private Instance Attributes:
+    #     - _name: The name of the span
+    #     - _start_ns: When the block started, in nanoseconds of time.perf_counter_ns
+    __slots__ = ('_name', '_start_ns')
+    _name: str
+    _start_ns: int
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._start_ns = 0
+
+    def __enter__(self) -> _Span:
+        self._start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        end_ns = time.perf_counter_ns()
+        _spans.append(SpanRecord(self._name, self._start_ns, end_ns - self._start_ns, threading.get_ident()))
+
+
+class _NullSpan:
+    """ The context manager returned by span while instrumentation is off, which does nothing. """
+    __slots__ = ()
+
+    def __enter__(self) -> _NullSpan:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def enable() -> None:
+    """Start recording spans and counters."""
+    global ENABLED
+    ENABLED = True
+
+
+def disable() -> None:
+    """Stop recording spans and counters. What was recorded so far is kept until reset."""
+    global ENABLED
+    ENABLED = False
+
+
+def reset() -> None:
+    """Forget every recorded span and counter."""
+    global _origin_ns
+    _spans.clear()
+    _counters.clear()
+    _origin_ns = time.perf_counter_ns()
+
+
+def span(name: str) -> _Span | _NullSpan:
+    """
+    Return a context manager that records how long its block takes under the given name, or one that does nothing
+    if instrumentation is off.
+    """
+    return _Span(name) if ENABLED else _NULL_SPAN
+
+
+def count(name: str, amount: int = 1) -> None:
+    """Add amount to the counter with the given name, if instrumentation is on."""
+    if ENABLED:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def get_spans() -> list[SpanRecord]:
+    """Return the spans recorded since the last reset, in the order they finished."""
+    return list(_spans)
+
+
+def summary() -> dict[str, dict]:
+    """
+    Return a dict with:
+        - 'spans': a dict mapping each span name to its 'calls' and its 'total_seconds', 'mean_seconds' and
+          'max_seconds', in the order the names first finished
+        - 'counters': a dict mapping each counter name to its value
+    """
+    spans = {}
+    for record in _spans:
+        seconds = record.duration_ns / 1e9
+        if record.name not in spans:
+            spans[record.name] = {'calls': 0, 'total_seconds': 0.0, 'max_seconds': 0.0}
+        stats = spans[record.name]
+        stats['calls'] += 1
+        stats['total_seconds'] += seconds
+        stats['max_seconds'] = max(stats['max_seconds'], seconds)
+
+    for stats in spans.values():
+        stats['mean_seconds'] = stats['total_seconds'] / stats['calls']
+    return {'spans': spans, 'counters': dict(_counters)}
+
+
+def print_summary() -> None:
+    """Print the spans and counters of summary as a table."""
+    results = summary()
+    print(f'{"span":<32} {"calls":>8} {"total ms":>12} {"mean ms":>12} {"max ms":>12}')
+    for name, stats in results['spans'].items():
+        print(f'{name:<32} {stats["calls"]:>8} {stats["total_seconds"] * 1000:>12.3f} '
+              f'{stats["mean_seconds"] * 1000:>12.3f} {stats["max_seconds"] * 1000:>12.3f}')
+    for name, value in results['counters'].items():
+        print(f'{name:<32} {value:>8}')
+
+
+def chrome_trace() -> dict[str, list[dict]]:
+    """
+    Return the recorded spans and counters in the Chrome trace event format: one complete ('X') event per span,
+    with times in microseconds since the last reset, and one counter ('C') event holding every counter.
+    """
+    pid = os.getpid()
+    events = [{'name': record.name, 'ph': 'X', 'ts': (record.start_ns - _origin_ns) / 1000,
+               'dur': record.duration_ns / 1000, 'pid': pid, 'tid': record.thread_id} for record in _spans]
+    if _counters:
+        end = max((event['ts'] + event['dur'] for event in events), default=0)
+        events.append({'name': 'counters', 'ph': 'C', 'ts': end, 'pid': pid, 'tid': 0, 'args': dict(_counters)})
+    return {'traceEvents': events}
+
+
+def export_chrome_trace(filename: str) -> None:
+    """Write chrome_trace to a JSON file with the given filename."""
+    with open(filename, 'w') as f:
+        json.dump(chrome_trace(), f)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['json', 'os', 'threading', 'time'],
+        'disable': ['E9998', 'W0603']
+    })
@@ -0,0 +1,214 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module contains the league loader. It loads many team datafiles (like LAL.json and DAL.json) in a pool of
+worker processes and merges them into a single LineupSimulation whose graph holds every player in the league.
+
+Each worker does the whole load of its datafiles: it parses the JSON, builds the team's graph with all of its
+statistics and sends it back as the compact NumPy arrays of a graph cache snapshot (see 'graph_cache.py'). This
+process then only combines the snapshots, setting the statistics of every player and connection from the arrays
+instead of calculating them again.
+
+Players who show up in more than one datafile (for example after a trade) are merged into one player: their
+statistics and passes are added together, and their team is the team they played the most minutes for. Only
+their statistics, and those of their connections, are calculated again.
+"""
+from __future__ import annotations
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from classes import Graph, _Player, _Connection
+from main import LineupSimulation
+
+
+def find_team_files(source: str) -> list[str]:
+    """
+    Return the sorted list of team datafiles given by source. source can be a directory (every .json file in it
+    is used), a glob pattern such as 'data/*.json', or the name of a single datafile.
+    """
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, '*.json')))
+    return sorted(glob.glob(source))
+
+
+def team_name(filename: str) -> str:
+    """
+    Return the name of the team in the given datafile, which is its file name without the extension.
+
+    >>> team_name('data/LAL.json')
+    'LAL'
+    """
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+def load_league(source: str, max_workers: Optional[int] = None) -> tuple[LineupSimulation, dict[str, float]]:
+    """
+    Load every team datafile given by source in parallel and return a LineupSimulation of the whole league,
+    alongside a dict mapping each datafile to the number of seconds its worker took to load it (parsing it,
+    building its graph and turning that into a snapshot).
+
+    The merged league graph is the team_graph attribute of the returned LineupSimulation. If max_workers is 1,
+    the datafiles are loaded one at a time in this process.
+
+    Preconditions:
+        - find_team_files(source) != []
+        - max_workers is None or max_workers >= 1
+    """
+    filenames = find_team_files(source)
+    if not filenames:
+        raise FileNotFoundError(f'No team datafiles found for {source!r}')
+
+    if max_workers == 1:
+        results = [_load_team_file(filename) for filename in filenames]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_load_team_file, filenames))
+
+    timings = {filename: seconds for filename, _, seconds in results}
+    graph, players = merge_snapshots([arrays for _, arrays, _ in results])
+    return LineupSimulation.from_graph(graph, players, source), timings
+
+
+def merge_snapshots(snapshots: list[dict]) -> tuple[Graph, dict[str, tuple[_Player, list[str]]]]:
+    """
+    Return a single graph from the graph cache snapshots of many datafiles (see snapshot_arrays in
+    'graph_cache.py'), alongside a dict mapping each player name to a tuple of its _Player class and the names of
+    the players it passed to. This gives the same players and connections as building a graph from the
+    merge_records of the datafiles' records, although the connections of a player whose name appears in more than
+    one snapshot, who is merged, can be in a different order.
+    """
+    from graph_cache import snapshot_players, snapshot_connections
+
+    players, connections = {}, {}
+    team_minutes, merged = {}, set()
+    for arrays in snapshots:
+        local = []
+        for player in snapshot_players(arrays):
+            minutes = team_minutes.setdefault(player.name, {})
+            minutes[player.team] = minutes.get(player.team, 0) + player.minutes
+            if player.name in players:
+                merged.add(player.name)
+                _merge_player(players[player.name][0], player)
+            else:
+                players[player.name] = (player, [])
+            local.append(players[player.name][0])
+
+        for passer, receiver in arrays['partners'].tolist():
+            partners = players[local[passer].name][1]
+            if local[passer].name not in merged or local[receiver].name not in partners:
+                partners.append(local[receiver].name)
+
+        # snapshot_connections already points every connection at the merged _Player classes in local
+        for connection in snapshot_connections(arrays, local):
+            player1, player2 = connection.player_connection
+            existing = connections.get((player1.name, player2.name), connections.get((player2.name, player1.name)))
+            if existing is None:
+                connections[(player1.name, player2.name)] = connection
+            else:
+                existing.add_passes(player1, connection.player1_total_assists, connection.player1_total_passes,
+                                    connection.player1_minutes_together)
+                existing.add_passes(player2, connection.player2_total_assists, connection.player2_total_passes,
+                                    connection.player2_minutes_together)
+
+    for name in merged:
+        players[name][0].team = max(team_minutes[name], key=team_minutes[name].get)
+
+    graph = Graph()
+    for player, _ in players.values():
+        graph.add_player(player)
+    for connection in connections.values():
+        player1, player2 = connection.player_connection
+        if player1.name in merged or player2.name in merged:
+            connection.synergy_score = connection.calculate_synergy_score()
+        graph.insert_connection(connection)
+    return graph, players
+
+
+def _load_team_file(filename: str) -> tuple[str, dict, float]:
+    """Return the filename, the graph cache snapshot arrays of the given datafile and the seconds it took to
+    load it into them."""
+    from graph_cache import snapshot_arrays
+
+    start = time.perf_counter()
+    simulation = LineupSimulation.__new__(LineupSimulation)
+    simulation.players = {}
+    graph = simulation._load_game_data(filename)
+    arrays = snapshot_arrays(graph, simulation.players)
+    return filename, arrays, time.perf_counter() - start
+
+
+def _merge_player(merged: _Player, player: _Player) -> None:
+    """Add the positions and statistics of player into merged, which is the merged _Player class of the same
+    player from an earlier datafile."""
+    for position in player.position:
+        if position not in merged.position:
+            merged.position.append(position)
+    merged.add_game(player.total_points, player.total_rebounds, player.total_assists, player.minutes,
+                    player.total_steals, player.total_blocks)
+
+
+def merge_records(team_data: list[list[dict]]) -> list[dict]:
+    """
+    Return a single list of player records from the records of many datafiles. A player whose name appears in
+    more than one datafile gets one merged record. This is the merge that merge_snapshots gives the same graph as.
+
+    >>> first = [{'name': 'A', 'positions': ['Guard'], 'team': 'X', 'passes_to': {},
+    ...           'defensive_stats': {'minutes': 10, 'points': 4, 'rebounds': 1, 'steals': 0, 'blocks': 0}}]
+    >>> second = [{'name': 'A', 'positions': ['Guard'], 'team': 'Y', 'passes_to': {},
+    ...            'defensive_stats': {'minutes': 30, 'points': 6, 'rebounds': 2, 'steals': 1, 'blocks': 0}}]
+    >>> merged = merge_records([first, second])
+    >>> merged[0]['team'], merged[0]['defensive_stats']['minutes'], merged[0]['defensive_stats']['points']
+    ('Y', 40, 10)
+    """
+    merged = {}
+    team_minutes = {}
+
+    for data in team_data:
+        for record in data:
+            name = record['name']
+            minutes = record['defensive_stats']['minutes']
+            team_minutes.setdefault(name, {})
+            team_minutes[name][record['team']] = team_minutes[name].get(record['team'], 0) + minutes
+
+            if name not in merged:
+                merged[name] = {'name': name, 'positions': list(record['positions']), 'team': record['team'],
+                                'passes_to': {}, 'defensive_stats': dict.fromkeys(record['defensive_stats'], 0)}
+            _merge_record(merged[name], record)
+
+    for name, record in merged.items():
+        record['team'] = max(team_minutes[name], key=team_minutes[name].get)
+
+    return list(merged.values())
+
+
+def _merge_record(merged: dict, record: dict) -> None:
+    """Add the statistics and passes of record into merged, which is the merged record of the same player."""
+    for position in record['positions']:
+        if position not in merged['positions']:
+            merged['positions'].append(position)
+
+    for stat, value in record['defensive_stats'].items():
+        merged['defensive_stats'][stat] = merged['defensive_stats'].get(stat, 0) + value
+
+    for receiver, passes in record['passes_to'].items():
+        if receiver not in merged['passes_to']:
+            merged['passes_to'][receiver] = dict(passes)
+        else:
+            for stat in ('total_passes', 'assists', 'minutes_together'):
+                merged['passes_to'][receiver][stat] += passes[stat]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['glob', 'os', 'time', 'concurrent.futures', 'classes', 'graph_cache', 'main'],
+        'disable': ['E9998', 'C0415', 'W0212']
+    })
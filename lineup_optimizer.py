@@ -0,0 +1,241 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module contains the synergy-aware lineup optimizer. Unlike 'LineupSimulation.generate_lineup', which picks
+the best players one position at a time, this optimizer scores whole 5-man units: the player impact estimate of
+every player plus a pairwise term for every pair of players built from their _Connection.
+
+The search is an exact branch-and-bound over the lineup slots. Pair scores are precomputed into a sparse table and
+every branch is pruned against an optimistic upper bound: the best optimistic gains of the players that can still
+fill each remaining position, calculated over the whole pool at once with NumPy arrays. A pool of 450 players is
+searched in well under a second at a connection density of up to about 0.5 (about half a second at the sparse
+density of 0.2, where the bound is loosest).
+"""
+from __future__ import annotations
+from heapq import nlargest
+from typing import Optional
+
+import numpy as np
+
+from classes import Graph, _Player, _Connection
+
+LINEUP_SLOTS = ('Guard', 'Guard', 'Forward', 'Forward', 'Center')
+
+PAIR_WEIGHTS = {'synergy': 0.1, 'assists_per_pass': 1.0, 'passes_per_minute': 0.02}
+
+
+def pair_score(connection: _Connection, weights: dict[str, float]) -> float:
+    """
+    Return the pairwise score of the two players in connection using the given weights.
+
+    Preconditions:
+        - all(key in weights for key in PAIR_WEIGHTS)
+    """
+    passes_per_minute = connection.avg_passes_per_minute_player1 + connection.avg_passes_per_minute_player2
+    return (connection.synergy_score * weights['synergy'] +
+            connection.max_avg_assists_per_pass * weights['assists_per_pass'] +
+            passes_per_minute * weights['passes_per_minute'])
+
+
+def build_pair_table(graph: Graph, players: list[_Player], weights: dict[str, float]) -> list[dict[int, float]]:
+    """
+    Return a sparse table of pair scores, where table[i][j] is the pair score of players[i] and players[j].
+    Pairs of players without a connection are left out of the table (their pair score is 0).
+    """
+    index = {player.name: i for i, player in enumerate(players)}
+    table = [{} for _ in players]
+
+    for connection in graph.get_connections():
+        player1, player2 = connection.player_connection
+        if player1.name in index and player2.name in index:
+            i, j = index[player1.name], index[player2.name]
+            score = pair_score(connection, weights)
+            table[i][j] = score
+            table[j][i] = score
+
+    return table
+
+
+def optimal_lineup(players: list[_Player], graph: Graph, weights: Optional[dict[str, float]] = None,
+                   slots: tuple[str, ...] = LINEUP_SLOTS) -> tuple[list[_Player], float]:
+    """
+    Return the lineup of players that maximizes the total player impact estimate plus the pair scores of every
+    pair in the lineup, along with that total score. A player may fill any slot matching one of their positions.
+
+    The returned lineup is ordered the same way as slots. weights may be negative, to penalize some pairs.
+    Raise ValueError if the players cannot fill every slot, even when each position alone has enough of them:
+
+    >>> pool = [_Player(f'Swing {i}', 'LAL', ['Guard', 'Forward'], 5, 5, 5, 5, 5, 5) for i in range(3)]
+    >>> pool.append(_Player('Big', 'LAL', ['Center'], 5, 5, 5, 5, 5, 5))
+    >>> g = Graph()
+    >>> for p in pool:
+    ...     g.add_player(p)
+    >>> optimal_lineup(pool, g)
+    Traceback (most recent call last):
+    ValueError: Not enough players to fill every slot
+
+    Preconditions:
+        - all(player.name in graph._players for player in players)
+    """
+    weights = PAIR_WEIGHTS if weights is None else weights
+    pairs = build_pair_table(graph, players, weights)
+    search = _LineupSearch(players, pairs, slots)
+    return search.run()
+
+
+class _LineupSearch:
+    """ The state of a single branch-and-bound search for the optimal lineup.
+
+    Instance Attributes:
+        - players: The pool of players the lineup is chosen from
+        - pairs: The sparse pair score table of players
+        - neighbours: neighbours[i] holds the indices of the players with a pair score with players[i]
+        - pair_scores: pair_scores[i][m] is the pair score of players[i] and players[neighbours[i][m]]
+        - order: The slots to fill, as (slot index, position) sorted from the most to least constrained position
+        - eligible: Maps each position to whether each player can play it
+        - rank: Maps each position to the place of each player among the players that can play it
+        - gain: gain[i] is the player impact estimate of players[i] plus its pair scores with the chosen players
+        - available: available[i] is whether players[i] is not chosen yet
+        - half_optimism: half_optimism[m, i] is half the sum of the m largest pair scores players[i] has with
+                         any player, where a negative pair score counts as 0 (the score of a pair without a
+                         connection, which is always possible)
+        - best_score: The score of the best lineup found so far
+        - best_lineup: The slot assignment of the best lineup found so far
+    """
+    players: list[_Player]
+    pairs: list[dict[int, float]]
+    neighbours: list[np.ndarray]
+    pair_scores: list[np.ndarray]
+    order: list[tuple[int, str]]
+    eligible: dict[str, np.ndarray]
+    rank: dict[str, np.ndarray]
+    gain: np.ndarray
+    available: np.ndarray
+    half_optimism: np.ndarray
+    best_score: float
+    best_lineup: Optional[list[int]]
+
+    def __init__(self, players: list[_Player], pairs: list[dict[int, float]], slots: tuple[str, ...]) -> None:
+        """Initialize the search over players for the given slots."""
+        self.players = players
+        self.pairs = pairs
+        self.neighbours = [np.fromiter(row.keys(), dtype=np.intp, count=len(row)) for row in pairs]
+        self.pair_scores = [np.fromiter(row.values(), dtype=np.float64, count=len(row)) for row in pairs]
+        self.gain = np.array([player.player_impact_estimate for player in players], dtype=np.float64)
+        self.available = np.ones(len(players), dtype=bool)
+
+        optimism = np.zeros((len(slots), len(players)))
+        for i, row in enumerate(pairs):
+            largest = [max(value, 0.0) for value in nlargest(len(slots) - 1, row.values())]
+            for m, value in enumerate(largest, start=1):
+                optimism[m:, i] += value
+        self.half_optimism = optimism / 2
+
+        self.eligible, self.rank = {}, {}
+        for position in set(slots):
+            eligible = np.array([position in player.position for player in players], dtype=bool)
+            if eligible.sum() < slots.count(position):
+                raise ValueError(f'Not enough players to fill every {position} slot')
+            self.eligible[position] = eligible
+            self.rank[position] = np.cumsum(eligible) - 1
+
+        self.order = sorted(enumerate(slots), key=lambda slot: (int(self.eligible[slot[1]].sum()), slot[1]))
+        self.best_score = float('-inf')
+        self.best_lineup = None
+
+    def run(self) -> tuple[list[_Player], float]:
+        """Search every lineup and return the best one alongside its score."""
+        # The number of slots of each position still to be filled at each depth of the search
+        remaining_slots = []
+        for depth in range(len(self.order)):
+            counts = {}
+            for _, position in self.order[depth:]:
+                counts[position] = counts.get(position, 0) + 1
+            remaining_slots.append(counts)
+
+        self._search(0, 0.0, [-1] * len(self.order), remaining_slots, {})
+        if self.best_lineup is None:
+            # Every position has enough players on its own, but not enough different players for every slot
+            raise ValueError('Not enough players to fill every slot')
+
+        # Added up again one player at a time, since the gains summed in the search can differ in the last digits
+        score, chosen = 0.0, []
+        for slot_index, _ in self.order:
+            c = self.best_lineup[slot_index]
+            gain = self.players[c].player_impact_estimate
+            for other in chosen:
+                gain += self.pairs[c].get(other, 0.0)
+            score += gain
+            chosen.append(c)
+
+        lineup = [self.players[i] for i in self.best_lineup]
+        return lineup, round(score, 3)
+
+    def _search(self, depth: int, score: float, assignment: list[int], remaining_slots: list[dict[str, int]],
+                last_rank: dict[str, int]) -> None:
+        """Fill the slot at the given depth and recurse into the remaining slots."""
+        if depth == len(self.order):
+            if score > self.best_score:
+                self.best_score = score
+                self.best_lineup = list(assignment)
+            return
+
+        # Each pair among the k players still to be chosen is at most the average of the two players' largest
+        # pair scores, so half of every candidate's k - 1 largest pair scores is an upper bound on its share.
+        k = len(self.order) - depth
+        optimistic = self.gain + self.half_optimism[k - 1]
+
+        # The remaining slots of each position are filled by distinct players of increasing rank, so the largest
+        # optimistic gains of each position, added over the positions, bound the rest of the lineup
+        slot_index, position = self.order[depth]
+        bound, rest_bound, slot_candidates = score, score, None
+        for slot_position, count in remaining_slots[depth].items():
+            candidates = self.eligible[slot_position] & self.available
+            if slot_position in last_rank:
+                candidates &= self.rank[slot_position] > last_rank[slot_position]
+            values = optimistic[candidates]
+            if len(values) < count:
+                return
+            top = np.partition(values, len(values) - count)[len(values) - count:]
+            bound += top.sum()
+            rest_bound += top.sum() - top.min() if slot_position == position else top.sum()
+            if slot_position == position:
+                slot_candidates = candidates
+        if bound <= self.best_score:
+            return
+
+        candidates = np.flatnonzero(slot_candidates & (optimistic + rest_bound > self.best_score))
+        candidates = candidates[np.argsort(-optimistic[candidates], kind='stable')]
+
+        for c, optimistic_gain in zip(candidates.tolist(), optimistic[candidates].tolist()):
+            if optimistic_gain + rest_bound <= self.best_score:
+                break
+
+            self.available[c] = False
+            assignment[slot_index] = c
+            previous_rank = last_rank.get(position)
+            last_rank[position] = int(self.rank[position][c])
+            self.gain[self.neighbours[c]] += self.pair_scores[c]
+
+            self._search(depth + 1, score + float(self.gain[c]), assignment, remaining_slots, last_rank)
+
+            self.gain[self.neighbours[c]] -= self.pair_scores[c]
+            if previous_rank is None:
+                del last_rank[position]
+            else:
+                last_rank[position] = previous_rank
+            self.available[c] = True
+            assignment[slot_index] = -1
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['heapq', 'numpy', 'classes'],
+        'disable': ['E9998', 'R0913', 'R0902']
+    })
@@ -8,10 +8,35 @@ run 'visualize_heatmap()' and 'show_graph()' to see the passes made between play
 players as well as the optimal lineup based on this program calculating each player's player impact estimate.
 """
 from __future__ import annotations
+import importlib
 import json
+import sys
+from typing import Optional, TYPE_CHECKING
 
+import instrumentation
 from classes import Graph, _Player
-from visualization import create_heatmap
+from streaming import load_ndjson
+
+# The modules below need NumPy (and 'visualization.py' also needs matplotlib, pandas and seaborn), so they
+# are only imported inside the methods that use them. Loading a datafile and generating a lineup never needs them.
+if TYPE_CHECKING:
+    from array_graph import ArrayGraph
+    from possession import SimulationResult
+    from store import SeasonStore
+
+# The graph classes a LineupSimulation can store its players and connections in, as (module name, class name)
+GRAPH_BACKENDS = {'dict': ('classes', 'Graph'), 'array': ('array_graph', 'ArrayGraph')}
+
+
+def graph_backend(backend: str) -> type:
+    """
+    Return the graph class of the given backend in GRAPH_BACKENDS, importing its module if needed.
+
+    >>> graph_backend('dict') is Graph
+    True
+    """
+    module_name, class_name = GRAPH_BACKENDS[backend]
+    return getattr(importlib.import_module(module_name), class_name)
 
 
 class LineupSimulation:
@@ -20,55 +45,168 @@ class LineupSimulation:
         Instance Attributes:
             - team_graph: Graph object of given datafile
             - lineup: List of top 5 players as _Player classes based on their positions and player_impact_estimate
-            - players: Dictionary mapping player name to a tuple consisting of the player object and its interactions
+            - players: Dictionary mapping player name to a tuple consisting of the player object and the names of the
+                       players it passed to
             - team_name: Name of the datafile team
         """
-    team_graph: Graph
+    team_graph: Graph | ArrayGraph
     lineup: list[_Player]
     players: dict
     team_name: str
 
-    def __init__(self, filename: str) -> None:
+    def __init__(self, filename: str, cache_dir: Optional[str] = None, backend: str = 'dict') -> None:
         """
         Initialize a new LineupSimulation class with given filename.
+
+        If cache_dir is given, the built graph is saved there as a compiled snapshot (see 'graph_cache.py'), and
+        later LineupSimulation classes of the same unchanged datafile are loaded from that snapshot instead.
+
+        backend chooses the graph class the players and connections are stored in. It is 'dict' for Graph in
+        'classes.py' or 'array' for ArrayGraph in 'array_graph.py'.
+
+        Preconditions:
+            - backend in GRAPH_BACKENDS
         """
-        self.players = {}
-        self.team_graph = self._load_game_data(filename)
-        self.lineup = self.generate_lineup()
-        self.team_name = filename
+        with instrumentation.span('LineupSimulation.__init__'):
+            self.players = {}
+            if cache_dir is None:
+                self.team_graph = self._load_game_data(filename, graph_backend(backend))
+            else:
+                self.team_graph = self._load_cached_game_data(filename, cache_dir)
+                if backend != 'dict':
+                    self.team_graph = graph_backend(backend).from_graph(self.team_graph)
+            self.lineup = self.generate_lineup()
+            self.team_name = filename
+
+    @classmethod
+    def from_records(cls, records: list[dict], team_name: str) -> LineupSimulation:
+        """
+        Return a new LineupSimulation class built from records that are already in memory, instead of from a
+        datafile. This is used when the records come from several datafiles, as in 'league.py'.
+
+        Preconditions:
+            - records in same format as the LAL.json and DAL.json files
+        """
+        simulation = cls.__new__(cls)
+        simulation.players = {}
+        simulation.team_graph = simulation._build_graph(records)
+        simulation.lineup = simulation.generate_lineup()
+        simulation.team_name = team_name
+        return simulation
+
+    @classmethod
+    def from_graph(cls, graph: Graph, players: dict[str, tuple[_Player, list[str]]],
+                   team_name: str) -> LineupSimulation:
+        """
+        Return a new LineupSimulation class of a graph that is already built, such as the league graph merged in
+        'league.py'.
+
+        Preconditions:
+            - players maps every player in graph to a tuple of its _Player class and the names it passed to
+        """
+        simulation = cls.__new__(cls)
+        simulation.players = players
+        simulation.team_graph = graph
+        simulation.lineup = simulation.generate_lineup()
+        simulation.team_name = team_name
+        return simulation
+
+    @classmethod
+    def from_ndjson(cls, filename: str) -> LineupSimulation:
+        """
+        Return a new LineupSimulation class streamed from the NDJSON datafile with the given filename. Call on
+        function 'load_ndjson' in 'streaming.py', which reads the datafile one line at a time.
+        """
+        simulation = cls.__new__(cls)
+        simulation.team_graph, simulation.players = load_ndjson(filename)
+        simulation.lineup = simulation.generate_lineup()
+        simulation.team_name = filename
+        return simulation
+
+    @classmethod
+    def from_store(cls, store: SeasonStore, team_name: str, backend: str = 'dict', **filters) -> LineupSimulation:
+        """
+        Return a new LineupSimulation class of the players in store chosen by filters, such as
+        season='2024-25' and team='LAL'. Call on method 'query_graph' in 'store.py', which reads the players and
+        passes from the indexes of store instead of from the datafiles.
+
+        Preconditions:
+            - backend in GRAPH_BACKENDS
+            - filters are keyword arguments of SeasonStore.query_graph other than graph_class
+            - the chosen players include at least two guards, two forwards and one center
+        """
+        simulation = cls.__new__(cls)
+        simulation.team_graph, simulation.players = store.query_graph(graph_class=graph_backend(backend), **filters)
+        simulation.lineup = simulation.generate_lineup()
+        simulation.team_name = team_name
+        return simulation
 
-    def _load_game_data(self, filename: str) -> Graph:
+    def _load_game_data(self, filename: str, graph_class: type = Graph) -> Graph | ArrayGraph:
         """Load players from a JSON file with the given filename and
-        return a Graph object"""
+        return a graph_class object"""
 
-        with open(filename, 'r') as f:
+        with open(filename, 'r') as f, instrumentation.span('parse_json'):
             data = json.load(f)  # This loads all the data from the JSON file
 
-        graph = Graph()
+        return self._build_graph(data, graph_class)
 
-        # Instanciating player objects
-        for loc_data in data:
-            passes = loc_data['passes_to']
-            defense_stats = loc_data['defensive_stats']
-            assists, interactions = self.process_assists(passes)
-            defense = self.process_defense(defense_stats)
+    def _load_cached_game_data(self, filename: str, cache_dir: str) -> Graph:
+        """Load players from the compiled snapshot of the given filename in cache_dir and return a Graph object.
+        If there is no up-to-date snapshot, load the JSON file and save a snapshot of it."""
+        from graph_cache import source_key, load_cached_graph, store_cached_graph
+
+        key = source_key(filename)
+        with instrumentation.span('load_cached_graph'):
+            cached = load_cached_graph(key, cache_dir)
+        if cached is not None:
+            graph, self.players = cached
+            return graph
 
-            player_obj = _Player(loc_data['name'], loc_data['team'], loc_data['positions'], defense['points'],
-                                 defense['rebounds'], assists, defense['minutes'],
-                                 defense['steals'], defense['blocks'])
-            graph.add_player(player_obj)
+        graph = self._load_game_data(filename)
+        store_cached_graph(key, cache_dir, graph, self.players)
+        return graph
 
-            # Maps name to a tuple of _Player object and the passes_to dict seen in the json files
-            self.players[player_obj.name] = (player_obj, interactions)
+    def _build_graph(self, data: list[dict], graph_class: type = Graph) -> Graph | ArrayGraph:
+        """Return a graph_class object built from the given player records, adding each player to self.players
 
-        for player in self.players:
-            player_interactions = self.players[player][1]
+        Preconditions:
+            - data in same format as the LAL.json and DAL.json files
+            - graph_class in {graph_backend(backend) for backend in GRAPH_BACKENDS}
+        """
+        graph = graph_class()
 
-            for player_name in self.players[player][1]:
-                assists = player_interactions[player_name]['assists']
-                total_passes = player_interactions[player_name]['total_passes']
-                minutes_together = player_interactions[player_name]['minutes_together']
-                graph.add_connection(self.players[player][0], player_name, assists, total_passes, minutes_together)
+        # Instanciating player objects
+        with instrumentation.span('build_players'):
+            # One span around every player's assists, since a span per player would cost more than it measures
+            with instrumentation.span('process_assists'):
+                processed = [self.process_assists(loc_data['passes_to']) for loc_data in data]
+
+            for loc_data, (assists, interactions) in zip(data, processed):
+                defense_stats = loc_data['defensive_stats']
+                defense = self.process_defense(defense_stats)
+
+                player_obj = _Player(loc_data['name'], loc_data['team'], loc_data['positions'], defense['points'],
+                                     defense['rebounds'], assists, defense['minutes'],
+                                     defense['steals'], defense['blocks'])
+                graph.add_player(player_obj)
+
+                # Maps name to a tuple of _Player object and the passes_to dict seen in the json files
+                self.players[player_obj.name] = (player_obj, interactions)
+
+        with instrumentation.span('build_connections'):
+            for player in self.players:
+                player_interactions = self.players[player][1]
+
+                for player_name in self.players[player][1]:
+                    assists = player_interactions[player_name]['assists']
+                    total_passes = player_interactions[player_name]['total_passes']
+                    minutes_together = player_interactions[player_name]['minutes_together']
+                    graph.add_connection(self.players[player][0], player_name, assists, total_passes,
+                                         minutes_together)
+
+                # The passes_to dict is no longer needed once the connections are built, so only keep the names,
+                # interned so they are the same strings as the players' own names
+                self.players[player] = (self.players[player][0], [sys.intern(name) for name in player_interactions])
 
         return graph
 
@@ -107,18 +245,19 @@ class LineupSimulation:
         Return a list of 5 _Player class, two guards, two forwards, one center. Call on function 'highest_in_position'
         to return the top players in each position.
         """
-        lst = []
+        with instrumentation.span('generate_lineup'):
+            lst = []
 
-        guards = self.highest_in_position("Guard")
-        lst.append(guards[0])
-        lst.append(guards[1])
+            guards = self.highest_in_position("Guard")
+            lst.append(guards[0])
+            lst.append(guards[1])
 
-        forwards = self.highest_in_position("Forward")
-        lst.append(forwards[0])
-        lst.append(forwards[1])
+            forwards = self.highest_in_position("Forward")
+            lst.append(forwards[0])
+            lst.append(forwards[1])
 
-        center = self.highest_in_position("Center")
-        lst.append(center[0])
+            center = self.highest_in_position("Center")
+            lst.append(center[0])
 
         return lst
 
@@ -131,6 +270,7 @@ class LineupSimulation:
             p = self.players[player][0]
             if p.position[0] == pos:
                 lst.append(p)
+        instrumentation.count('highest_in_position_scanned', len(self.players))
 
         max_player = lst[0]
         max_pie = max_player.player_impact_estimate
@@ -152,31 +292,164 @@ class LineupSimulation:
         player_pos2 = max_player
         return player_pos1, player_pos2
 
-    def visualize_heatmap(self) -> None:
+    def apply_game(self, game: list[dict]) -> None:
+        """
+        Add the box score and passes of one game to this simulation without reloading the datafile. Call on the
+        'apply_game' method of self.team_graph, then update self.lineup.
+
+        Preconditions:
+            - game in same format as the LAL.json and DAL.json files, holding the statistics of a single game
+        """
+        previous_impact = {player.name: player.player_impact_estimate for player in self.lineup}
+        affected = self.team_graph.apply_game(game)
+
+        for record in game:
+            if record['name'] not in self.players:
+                self.players[record['name']] = (self.team_graph.get_player(record['name']), [])
+            partners = self.players[record['name']][1]
+            for receiver in record['passes_to']:
+                if receiver not in partners:
+                    partners.append(receiver)
+
+        self._refresh_lineup(affected, previous_impact)
+
+    def apply_games(self, games: list[list[dict]]) -> None:
+        """
+        Add the box scores and passes of many games at once, such as the rest of a season replayed from a game log.
+        The games are first added up into one game with 'merge_records' in 'league.py', so the statistics of each
+        player and connection are recalculated and the lineup is updated only once, instead of once per game.
+
+        This gives the same statistics and lineup as calling apply_game on every game in order, or as loading the
+        whole season at once, except that a new player's team and positions come from all of their games:
+
+        >>> from synthetic import generate_season
+        >>> from league import merge_records
+        >>> season = generate_season(20, num_games=6, density=0.4)
+        >>> replayed = LineupSimulation.from_records(season[0], 'Replayed')
+        >>> batched = LineupSimulation.from_records(season[0], 'Batched')
+        >>> for game in season[1:]:
+        ...     replayed.apply_game(game)
+        >>> batched.apply_games(season[1:])
+        >>> bulk = LineupSimulation.from_records(merge_records(season), 'C')
+        >>> def summary(simulation):
+        ...     graph = simulation.team_graph
+        ...     players = sorted((p.name, p.minutes, p.player_impact_estimate) for p in graph.get_players())
+        ...     passes = sorted((sorted(p.name for p in c.player_connection), c.synergy_score)
+        ...                     for c in graph.get_connections())
+        ...     return players, passes, sorted(p.name for p in simulation.lineup)
+        >>> summary(replayed) == summary(batched) == summary(bulk)
+        True
+
+        Preconditions:
+            - every game in games is in same format as the LAL.json and DAL.json files, holding the statistics of a
+              single game
+        """
+        from league import merge_records
+
+        if games:
+            self.apply_game(merge_records(games))
+
+    def _refresh_lineup(self, affected: set[str], previous_impact: dict[str, float]) -> None:
+        """
+        Update self.lineup after the player_impact_estimate of the affected players changed, where previous_impact
+        maps each player of self.lineup to their player_impact_estimate before the change.
+
+        A position only needs its full 'highest_in_position' search again if one of its lineup players got worse.
+        Otherwise every other player is still behind the position's lineup players, so only the lineup players
+        and the affected players of that position are compared.
+        """
+        lineup = []
+        for position, holders in (('Guard', self.lineup[0:2]), ('Forward', self.lineup[2:4]),
+                                  ('Center', self.lineup[4:5])):
+            changed = [self.players[name][0] for name in affected if self.players[name][0].position[0] == position]
+            if not changed:
+                lineup.extend(holders)
+                continue
+
+            threshold = min(previous_impact[player.name] for player in holders)
+            candidates = holders + [player for player in changed if player not in holders]
+            candidates.sort(key=lambda player: player.player_impact_estimate, reverse=True)
+            top = candidates[:len(holders)]
+
+            # Fall back to the full search whenever a tie or a worse lineup player could change the result
+            impacts = [player.player_impact_estimate for player in candidates[:len(holders) + 1]]
+            if (any(player.player_impact_estimate < previous_impact[player.name] for player in holders)
+                    or len(set(impacts)) < len(impacts)
+                    or any(player.player_impact_estimate <= threshold for player in top if player not in holders)):
+                top = self.highest_in_position(position)
+
+            lineup.extend(top[:len(holders)])
+
+        self.lineup = lineup
+
+    def generate_synergy_lineup(self, weights: Optional[dict[str, float]] = None) -> list[_Player]:
+        """
+        Return a list of 5 _Player class, two guards, two forwards, one center, chosen by scoring whole lineups
+        instead of one position at a time. Call on function 'optimal_lineup' in 'lineup_optimizer.py', which adds
+        the pair scores of every _Connection in the lineup to the players' player_impact_estimate.
+
+        Unlike 'generate_lineup', players with more than one position may fill any of their positions.
+        """
+        from lineup_optimizer import optimal_lineup
+
+        players = [self.players[player][0] for player in self.players]
+        lineup, _ = optimal_lineup(players, self.team_graph, weights)
+        return lineup
+
+    def simulate(self, possessions: int = 1_000_000, seed: int = 0,
+                 lineup: Optional[list[_Player]] = None) -> SimulationResult:
+        """
+        Simulate the given number of possessions of lineup (self.lineup by default) using the pass network of
+        self.team_graph, and return the expected points per 100 possessions. Call on function
+        'simulate_possessions' in 'possession.py'.
+        """
+        from possession import simulate_possessions
+
+        return simulate_possessions(self.team_graph, self.lineup if lineup is None else lineup, possessions, seed)
+
+    def reweight(self, weights: dict[str, dict[str, float]]) -> None:
+        """
+        Recalculate the player_impact_estimate of every player with the given weight table, which is in the same
+        format as POSITION_WEIGHTS in 'classes.py', then update self.lineup. Call on function
+        'batch_player_impact' in 'impact.py', which calculates every player at once.
+        """
+        from impact import batch_player_impact
+
+        batch_player_impact(self.team_graph, weights)
+        self.lineup = self.generate_lineup()
+
+    def visualize_heatmap(self, output_path: Optional[str] = None) -> None:
         """
         Open a GUI displaying heatmap of passes between players. Call on function in 'visualization.py' that
-        creates the heatmap.
+        creates the heatmap. If output_path is given, write the heatmap to that file instead of opening a GUI.
         """
-        pass_data = {}
-        for player in self.players:
-            pass_data[player] = self.team_graph.get_passes_per_minute_dict(player, self.players[player][1])
+        with instrumentation.span('visualize_heatmap'):
+            from visualization import create_heatmap
 
-        # Calls visuaize_heatmap from visualization.py
-        create_heatmap(pass_data, self.team_name)
+            with instrumentation.span('pass_matrix'):
+                matrix, player_names = self.team_graph.pass_matrix('per_minute', players=sorted(self.players))
+            create_heatmap(matrix, player_names, self.team_name, output_path)
 
-    def show_graph(self) -> None:
+    def show_graph(self, output_path: Optional[str] = None, min_passes: float = 0,
+                   top_k: Optional[int] = None) -> None:
         """
         Open a GUI displaying the connections between players. Call on function in 'classes.py' that creates
-        the graph.
+        the graph. If output_path is given, write the graph to that file instead of opening a GUI.
+
+        min_passes and top_k leave out connections with few passes, for graphs with many players.
         """
-        self.team_graph.visualize_graph(self.lineup)
+        with instrumentation.span('show_graph'):
+            self.team_graph.visualize_graph(self.lineup, output_path, min_passes, top_k)
 
 
 if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
 
     import python_ta
     python_ta.check_all(config={
         'max-line-length': 120,
-        'extra-imports': ['json', 'classes', 'visualization'],
-        'disable': ['E9998', 'R0914']
+        'extra-imports': ['importlib', 'json', 'sys', 'array_graph', 'classes', 'instrumentation', 'graph_cache',
+                          'impact', 'lineup_optimizer', 'possession', 'store', 'streaming', 'visualization'],
+        'disable': ['E9998', 'R0914', 'C0415']
     })
@@ -0,0 +1,107 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module contains the pass matrix, which holds the passes between every two players of a graph in a single
+NumPy array instead of one _Connection class at a time. Row i and column j refer to the i-th player name, and the
+entry [i, j] describes the passes of player i to player j. Both Graph and ArrayGraph build it with their
+pass_matrix method, in one pass over their connections, and the heatmap, the CSV export and the possession
+simulator all use it.
+
+The entries of a pass matrix can be normalized in any of the ways in PASS_NORMALIZATIONS:
+    - 'raw': the total passes
+    - 'per_minute': the average passes per minute the two players played together, the same as
+      _Connection.get_avg_passes_per_minute
+    - 'per_possession': the average passes per possession the two players played together, estimating
+      POSSESSIONS_PER_MINUTE possessions in every minute
+    - 'assist_ratio': the average assists per pass, the same as the avg_assists_per_pass of a _Connection
+"""
+from __future__ import annotations
+import csv
+from typing import Optional, Union
+
+import numpy as np
+
+from array_graph import CSRMatrix, _rounded_ratio
+
+PASS_NORMALIZATIONS = ('raw', 'per_minute', 'per_possession', 'assist_ratio')
+
+# About 100 possessions per team in a 48 minute NBA game
+POSSESSIONS_PER_MINUTE = 100 / 48
+
+
+def build_pass_matrix(rows: np.ndarray, columns: np.ndarray, passes: np.ndarray, assists: np.ndarray,
+                      minutes: np.ndarray, size: int, normalization: str = 'per_minute',
+                      sparse: bool = False) -> Union[np.ndarray, CSRMatrix]:
+    """
+    Return the size by size pass matrix whose entry [rows[k], columns[k]] is the given normalization of the
+    passes[k], assists[k] and minutes together[k] of one directed connection. Entries without a connection are 0,
+    and are not stored at all if sparse is True.
+
+    >>> build_pass_matrix(np.array([0, 1]), np.array([1, 0]), np.array([6, 0]), np.array([2, 0]),
+    ...                   np.array([4, 4]), 2).tolist()
+    [[0.0, 1.5], [0.0, 0.0]]
+    >>> build_pass_matrix(np.array([0, 1]), np.array([1, 0]), np.array([6, 0]), np.array([2, 0]),
+    ...                   np.array([4, 4]), 2, 'assist_ratio', sparse=True).data.tolist()
+    [0.333, 0.0]
+
+    Preconditions:
+        - normalization in PASS_NORMALIZATIONS
+        - no (rows[k], columns[k]) appears twice
+    """
+    if normalization not in PASS_NORMALIZATIONS:
+        raise ValueError(f'Unknown normalization {normalization!r}, expected one of {PASS_NORMALIZATIONS}')
+
+    rows, columns = np.asarray(rows, dtype=np.intp), np.asarray(columns, dtype=np.intp)
+    passes = np.asarray(passes, dtype=np.float64)
+    if normalization == 'raw':
+        values = passes
+    elif normalization == 'per_minute':
+        values = _rounded_ratio(passes, np.asarray(minutes, dtype=np.float64))
+    elif normalization == 'per_possession':
+        values = _ratio(passes, np.asarray(minutes, dtype=np.float64) * POSSESSIONS_PER_MINUTE)
+    else:
+        values = _rounded_ratio(np.asarray(assists, dtype=np.float64), passes)
+
+    if not sparse:
+        matrix = np.zeros((size, size))
+        matrix[rows, columns] = values
+        return matrix
+
+    order = np.lexsort((columns, rows))
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=size))))
+    return CSRMatrix(values[order], columns[order], indptr, (size, size))
+
+
+def write_pass_matrix_csv(graph: object, filename: str, normalization: str = 'per_minute',
+                          players: Optional[list[str]] = None) -> None:
+    """
+    Write the pass matrix of graph (a Graph or an ArrayGraph) with the given normalization to a CSV file with
+    the given filename. The first row and the first column hold the player names, so row i, column j is the
+    entry of the i-th player passing to the j-th player. See Graph.pass_matrix for players.
+    """
+    matrix, names = graph.pass_matrix(normalization, players=players)
+    with open(filename, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['passer'] + names)
+        for name, row in zip(names, matrix.tolist()):
+            writer.writerow([name] + row)
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Return numerator / denominator, with 0 wherever denominator is 0."""
+    ratio = np.zeros(np.shape(numerator))
+    np.divide(numerator, denominator, out=ratio, where=denominator > 0)
+    return ratio
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['csv', 'numpy', 'array_graph'],
+        'disable': ['E9998', 'R0913']
+    })
@@ -0,0 +1,209 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module contains the Monte Carlo possession simulator, which plays out possessions of a 5-player lineup using
+its pass network:
+    - A possession starts with a player chosen in proportion to how often they pass (the ball handlers).
+    - The player with the ball either passes to a teammate, in proportion to their average passes per minute to
+      that teammate, or shoots, in proportion to their average points per minute.
+    - A pass ends in an assist (2 points, possession over) with the passer's average assists per pass to that
+      teammate. Otherwise the teammate now has the ball.
+    - A shot is made (2 points) with BASE_MAKE_PROBABILITY, scaled by how the shooter's points per minute compare
+      to the rest of the lineup. After MAX_PASSES passes the player with the ball has to shoot.
+
+Possessions are simulated in large batches of NumPy arrays, and the batches are spread across a pool of worker
+processes. The result is the expected points per 100 possessions, with a confidence interval, so that candidate
+lineups can be compared.
+"""
+from __future__ import annotations
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from array_graph import ArrayGraph
+from classes import Graph, _Player
+
+POINTS_PER_BASKET = 2
+BASE_MAKE_PROBABILITY = 0.45
+MIN_MAKE_PROBABILITY = 0.25
+MAX_MAKE_PROBABILITY = 0.65
+MAX_PASSES = 10
+
+# The z-score of a two-sided 95% confidence interval
+CONFIDENCE_Z = 1.96
+
+
+class PossessionModel(NamedTuple):
+    """ The probabilities a possession of a lineup is simulated with. Row and column i refer to lineup[i].
+
+    Instance Attributes:
+        - pass_rates: pass_rates[i, j] is the average passes per minute of player i to player j
+        - assist_rates: assist_rates[i, j] is the average assists per pass of player i passing to player j
+        - shot_rates: shot_rates[i] is the average points per minute of player i
+        - make_probabilities: make_probabilities[i] is the probability a shot by player i goes in
+        - start_probabilities: start_probabilities[i] is the probability a possession starts with player i
+    """
+    pass_rates: np.ndarray
+    assist_rates: np.ndarray
+    shot_rates: np.ndarray
+    make_probabilities: np.ndarray
+    start_probabilities: np.ndarray
+
+
+class SimulationResult(NamedTuple):
+    """ The result of simulating many possessions of a lineup.
+
+    Instance Attributes:
+        - possessions: The number of simulated possessions
+        - points_per_100: The average points scored per 100 possessions
+        - ci_low: The lower end of the 95% confidence interval of points_per_100
+        - ci_high: The upper end of the 95% confidence interval of points_per_100
+    """
+    possessions: int
+    points_per_100: float
+    ci_low: float
+    ci_high: float
+
+
+def build_possession_model(graph: Graph | ArrayGraph, lineup: list[_Player]) -> PossessionModel:
+    """
+    Return the PossessionModel of the given lineup, using the connections between its players in graph.
+
+    >>> g = Graph()
+    >>> lineup = [_Player(name, 'LAL', ['Guard'], 20, 5, 5, 40, 1, 1) for name in ('Bob', 'Ann')]
+    >>> for player in lineup:
+    ...     g.add_player(player)
+    >>> g.add_connection(lineup[0], 'Ann', 2, 20, 40)
+    >>> model = build_possession_model(g, lineup)
+    >>> model.pass_rates.tolist(), model.assist_rates.tolist(), model.start_probabilities.tolist()
+    ([[0.0, 0.5], [0.0, 0.0]], [[0.0, 0.1], [0.0, 0.0]], [1.0, 0.0])
+
+    Preconditions:
+        - all(player in graph.get_players() for player in lineup)
+    """
+    size = len(lineup)
+    names = [player.name for player in lineup]
+    pass_rates, _ = graph.pass_matrix('per_minute', players=names)
+    assist_rates, _ = graph.pass_matrix('assist_ratio', players=names)
+
+    shot_rates = np.array([player.avg_points for player in lineup], dtype=np.float64)
+    mean_shot_rate = shot_rates.mean() if shot_rates.mean() > 0 else 1.0
+    make_probabilities = np.clip(BASE_MAKE_PROBABILITY * shot_rates / mean_shot_rate,
+                                 MIN_MAKE_PROBABILITY, MAX_MAKE_PROBABILITY)
+
+    handling = pass_rates.sum(axis=1)
+    if handling.sum() > 0:
+        start_probabilities = handling / handling.sum()
+    else:
+        start_probabilities = np.full(size, 1 / size)
+
+    return PossessionModel(pass_rates, np.clip(assist_rates, 0, 1), shot_rates, make_probabilities,
+                           start_probabilities)
+
+
+def simulate_possessions(graph: Graph | ArrayGraph, lineup: list[_Player], possessions: int = 1_000_000,
+                         seed: int = 0, max_workers: Optional[int] = None,
+                         chunk_size: int = 250_000) -> SimulationResult:
+    """
+    Simulate the given number of possessions of lineup and return the expected points per 100 possessions.
+
+    The possessions are split into chunks of chunk_size, each with its own random seed derived from seed, so the
+    result only depends on seed and chunk_size and not on max_workers. If there is only one chunk or max_workers
+    is 1, every chunk is simulated in this process.
+
+    >>> g = Graph()
+    >>> lineup = [_Player(name, 'LAL', ['Guard'], 20, 5, 5, 40, 1, 1) for name in ('Bob', 'Ann')]
+    >>> for player in lineup:
+    ...     g.add_player(player)
+    >>> g.add_connection(lineup[0], 'Ann', 2, 20, 40)
+    >>> result = simulate_possessions(g, lineup, 10_000, seed=1, max_workers=1, chunk_size=4_000)
+    >>> result.possessions, result.ci_low < result.points_per_100 < result.ci_high
+    (10000, True)
+    >>> result == simulate_possessions(g, lineup, 10_000, seed=1, max_workers=1, chunk_size=4_000)
+    True
+
+    Preconditions:
+        - possessions > 0
+        - all(player in graph.get_players() for player in lineup)
+    """
+    model = build_possession_model(graph, lineup)
+    sizes = [min(chunk_size, possessions - start) for start in range(0, possessions, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if len(sizes) <= 1 or max_workers == 1:
+        results = [_simulate_chunk(model, size, chunk_seed) for size, chunk_seed in zip(sizes, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_simulate_chunk, [model] * len(sizes), sizes, seeds))
+
+    total = sum(result[0] for result in results)
+    total_squares = sum(result[1] for result in results)
+    mean = total / possessions
+    variance = max(total_squares / possessions - mean ** 2, 0.0)
+    margin = CONFIDENCE_Z * math.sqrt(variance / possessions)
+    return SimulationResult(possessions, mean * 100, (mean - margin) * 100, (mean + margin) * 100)
+
+
+def compare_lineups(graph: Graph | ArrayGraph, lineups: list[list[_Player]], possessions: int = 1_000_000,
+                    seed: int = 0, max_workers: Optional[int] = None) -> list[SimulationResult]:
+    """
+    Return the SimulationResult of every lineup in lineups, each simulated with the same seed.
+    """
+    return [simulate_possessions(graph, lineup, possessions, seed, max_workers) for lineup in lineups]
+
+
+def _simulate_chunk(model: PossessionModel, possessions: int,
+                    seed: np.random.SeedSequence) -> tuple[float, float]:
+    """Simulate the given number of possessions and return the total points and the total squared points."""
+    rng = np.random.default_rng(seed)
+    size = len(model.shot_rates)
+
+    # Row i holds the cumulative probabilities of player i passing to each teammate, then shooting
+    weights = np.concatenate([model.pass_rates, model.shot_rates[:, np.newaxis]], axis=1)
+    weights[weights.sum(axis=1) == 0, size] = 1.0
+    cumulative = np.cumsum(weights / weights.sum(axis=1, keepdims=True), axis=1)
+    cumulative[:, size] = 1.0
+
+    holder = rng.choice(size, size=possessions, p=model.start_probabilities)
+    points = np.zeros(possessions)
+    active = np.arange(possessions)
+
+    for passes in range(MAX_PASSES + 1):
+        if active.size == 0:
+            break
+
+        current = holder[active]
+        if passes == MAX_PASSES:
+            actions = np.full(active.size, size)
+        else:
+            actions = (rng.random(active.size)[:, np.newaxis] >= cumulative[current]).sum(axis=1)
+
+        shooting = actions == size
+        shooters = active[shooting]
+        made = rng.random(shooters.size) < model.make_probabilities[holder[shooters]]
+        points[shooters[made]] = POINTS_PER_BASKET
+
+        passers = active[~shooting]
+        receivers = actions[~shooting]
+        assisted = rng.random(passers.size) < model.assist_rates[holder[passers], receivers]
+        points[passers[assisted]] = POINTS_PER_BASKET
+
+        holder[passers] = receivers
+        active = passers[~assisted]
+
+    return float(points.sum()), float((points ** 2).sum())
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['math', 'concurrent.futures', 'numpy', 'array_graph', 'classes'],
+        'disable': ['E9998', 'R0913', 'R0914']
+    })
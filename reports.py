@@ -0,0 +1,89 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module contains the batch report renderer. For every team datafile (like LAL.json and DAL.json) it builds the
+LineupSimulation and writes its passing heatmap and its graph of players to image files, without opening any
+window. The teams are rendered in a pool of worker processes, so a whole league can be rendered on a server.
+
+The images of the team in 'LAL.json' are written as 'LAL_heatmap.png' and 'LAL_graph.png' in the output directory.
+"""
+from __future__ import annotations
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from league import find_team_files, team_name
+from main import LineupSimulation
+
+REPORT_FORMATS = ('png', 'svg', 'pdf')
+
+
+def render_team_report(filename: str, out_dir: str, fmt: str = 'png') -> list[str]:
+    """
+    Render the heatmap and the graph of the team in the given datafile to out_dir and return the paths written.
+
+    >>> import tempfile
+    >>> out_dir = tempfile.mkdtemp()
+    >>> [os.path.basename(path) for path in render_team_report('LAL.json', out_dir, 'svg')]
+    ['LAL_heatmap.svg', 'LAL_graph.svg']
+    >>> render_team_report('LAL.json', out_dir, 'jpg')
+    Traceback (most recent call last):
+    ValueError: Unknown report format 'jpg', expected one of ('png', 'svg', 'pdf')
+
+    Preconditions:
+        - fmt in REPORT_FORMATS
+    """
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f'Unknown report format {fmt!r}, expected one of {REPORT_FORMATS}')
+
+    os.makedirs(out_dir, exist_ok=True)
+    team = team_name(filename)
+    simulation = LineupSimulation(filename)
+
+    heatmap_path = os.path.join(out_dir, f'{team}_heatmap.{fmt}')
+    graph_path = os.path.join(out_dir, f'{team}_graph.{fmt}')
+    simulation.visualize_heatmap(heatmap_path)
+    simulation.show_graph(graph_path)
+    return [heatmap_path, graph_path]
+
+
+def render_reports(source: str, out_dir: str, fmt: str = 'png',
+                   max_workers: Optional[int] = None) -> dict[str, list[str]]:
+    """
+    Render the report of every team datafile given by source (see league.find_team_files) and return a dict
+    mapping each datafile to the paths written for it. If max_workers is 1, or there is only one datafile, the
+    reports are rendered one at a time in this process.
+
+    >>> import tempfile
+    >>> render_reports(os.path.join(tempfile.mkdtemp(), '*.json'), tempfile.mkdtemp())  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    FileNotFoundError: No team datafiles found for ...
+
+    Preconditions:
+        - max_workers is None or max_workers >= 1
+    """
+    filenames = find_team_files(source)
+    if not filenames:
+        raise FileNotFoundError(f'No team datafiles found for {source!r}')
+
+    if len(filenames) == 1 or max_workers == 1:
+        paths = [render_team_report(filename, out_dir, fmt) for filename in filenames]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            paths = list(executor.map(render_team_report, filenames, [out_dir] * len(filenames),
+                                      [fmt] * len(filenames)))
+
+    return dict(zip(filenames, paths))
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['os', 'concurrent.futures', 'league', 'main'],
+        'disable': ['E9998']
+    })
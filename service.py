@@ -0,0 +1,467 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module contains the lineup query service. It is a long-running asyncio HTTP server that keeps a
+LineupSimulation of every team datafile in memory, so dashboards and other programs can ask for lineups and
+statistics without parsing the datafiles themselves. Run it as a script, for example:
+
+    python service.py 'data/*.json' --port 8111
+    python service.py LAL.json --unix /tmp/tophoops.sock
+
+Run without arguments, it runs the doctests and PythonTA checks of this module instead.
+
+Every query is a GET request whose answer is JSON. The team is the name of its datafile without '.json':
+    - /teams: the loaded teams
+    - /lineup?team=LAL: the lineup of generate_lineup, with every player's player impact estimate
+    - /pie?team=LAL (&player=NAME): the player impact estimate of every player, or of one player
+    - /pass_matrix?team=LAL (&normalization=per_minute): the pass matrix (see 'pass_matrix.py')
+    - /connection?team=LAL&player1=NAME&player2=NAME: the statistics of one connection
+    - /synergy_lineup?team=LAL: the lineup of generate_synergy_lineup
+    - /simulate?team=LAL (&possessions=100000&seed=0): the possession simulation of the lineup
+
+The first four are answered straight away from memory. The last two take much longer, so they run in a pool of
+worker processes and never hold up the other requests. The service checks the datafiles every poll_interval
+seconds, and when one changes (or a new one appears) it loads the new LineupSimulation in the background and then
+swaps it in at once, so a request always sees either the old or the new team and never a half-loaded one.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, NamedTuple, Optional
+
+from league import find_team_files, team_name
+from main import LineupSimulation
+
+DEFAULT_PORT = 8111
+DEFAULT_POLL_INTERVAL = 1.0
+MAX_POSSESSIONS = 5_000_000
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                500: 'Internal Server Error'}
+
+# The LineupSimulation classes of the worker processes, mapping each datafile to (its mtime_ns when the worker
+# loaded it, the simulation)
+_worker_simulations = {}
+
+
+class TeamState(NamedTuple):
+    """ A loaded team datafile.
+
+    Instance Attributes:
+        - filename: The team datafile
+        - mtime_ns: The modification time of the datafile when it was loaded, in nanoseconds
+        - simulation: The LineupSimulation of the datafile
+    """
+    filename: str
+    mtime_ns: int
+    simulation: LineupSimulation
+
+
+class LineupService:
+    """ An asyncio HTTP service answering lineup queries about the team datafiles given by source.
+
+    Instance Attributes:
+        - source: The directory, glob pattern or datafile of the teams (see league.find_team_files)
+        - poll_interval: The number of seconds between checks of the datafiles for changes
+        - max_workers: The number of worker processes for the slow queries, or None for one per CPU
+
+    Representation Invariants:
+        - self.poll_interval > 0
+    """
+    # Private Instance Attributes:
+    #     - _teams: Maps each team name to its TeamState. It is replaced as a whole, never changed in place.
+    #     - _server: The running asyncio server, or None before start
+    #     - _pool: The worker processes of the slow queries, or None before start
+    #     - _watcher: The task checking the datafiles for changes, or None before start
+    source: str
+    poll_interval: float
+    max_workers: Optional[int]
+    _teams: dict[str, TeamState]
+    _server: Optional[asyncio.AbstractServer]
+    _pool: Optional[ProcessPoolExecutor]
+    _watcher: Optional[asyncio.Task]
+
+    def __init__(self, source: str, poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 max_workers: Optional[int] = None) -> None:
+        """
+        Initialize a new LineupService of the team datafiles given by source. Nothing is loaded until start.
+        """
+        self.source = source
+        self.poll_interval = poll_interval
+        self.max_workers = max_workers
+        self._teams = {}
+        self._server = None
+        self._pool = None
+        self._watcher = None
+
+    async def start(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+                    unix_path: Optional[str] = None) -> None:
+        """
+        Load every team datafile, then start listening on host and port, or on the Unix socket unix_path if it
+        is given. A port of 0 picks any free port (see get_address).
+        """
+        await self.reload()
+        # Forking a process that already runs threads (the loader threads, NumPy) can deadlock the worker
+        self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                         mp_context=multiprocessing.get_context('spawn'))
+        if unix_path is not None:
+            self._server = await asyncio.start_unix_server(self._handle_connection, path=unix_path)
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, host, port)
+        self._watcher = asyncio.create_task(self._watch())
+
+    async def serve_forever(self) -> None:
+        """
+        Answer requests until this service is closed.
+        """
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """
+        Stop listening, stop watching the datafiles and shut down the worker processes.
+        """
+        if self._watcher is not None:
+            self._watcher.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+
+    def get_address(self) -> Any:
+        """
+        Return the address this service listens on: a (host, port) tuple, or the path of its Unix socket.
+        """
+        return self._server.sockets[0].getsockname()
+
+    def get_teams(self) -> list[str]:
+        """
+        Return the names of the loaded teams, sorted.
+        """
+        return sorted(self._teams)
+
+    async def reload(self) -> list[str]:
+        """
+        Load every team datafile that is new or changed since it was last loaded, and drop the teams whose
+        datafile is gone. Return the names of the teams that were loaded or dropped.
+
+        The datafiles are parsed in a background thread, and the new teams are swapped in all at once.
+
+        >>> service = LineupService('LAL.json')
+        >>> asyncio.run(service.reload()), asyncio.run(service.reload()), service.get_teams()
+        (['LAL'], [], ['LAL'])
+        """
+        teams = dict(self._teams)
+        changed = []
+        current = {}
+        for filename in find_team_files(self.source):
+            try:
+                current[team_name(filename)] = (filename, os.stat(filename).st_mtime_ns)
+            except FileNotFoundError:
+                continue
+
+        loop = asyncio.get_running_loop()
+        for name, (filename, mtime_ns) in current.items():
+            state = teams.get(name)
+            if state is None or state.mtime_ns != mtime_ns or state.filename != filename:
+                try:
+                    simulation = await loop.run_in_executor(None, _load_team, filename)
+                except (OSError, ValueError, KeyError, IndexError, ZeroDivisionError):
+                    # The datafile may be partly written, or not have enough players of every position for
+                    # generate_lineup; keep the old team and try again on the next check
+                    continue
+                teams[name] = TeamState(filename, mtime_ns, simulation)
+                changed.append(name)
+
+        for name in set(teams) - set(current):
+            del teams[name]
+            changed.append(name)
+
+        if changed:
+            self._teams = teams
+        return changed
+
+    async def handle_request(self, path: str, params: dict[str, str]) -> tuple[int, Any]:
+        """
+        Return the HTTP status and the JSON payload of the query with the given path and parameters.
+
+        >>> service = LineupService('LAL.json')
+        >>> _ = asyncio.run(service.reload())
+        >>> asyncio.run(service.handle_request('/pie', {'team': 'LAL', 'player': 'LeBron James'}))
+        (200, {'LeBron James': 1.495})
+        >>> asyncio.run(service.handle_request('/pie', {'team': 'BOS'}))
+        (404, {'error': 'Unknown team BOS'})
+        >>> asyncio.run(service.handle_request('/pie', {}))
+        (400, {'error': 'Missing parameter team'})
+        """
+        try:
+            if path == '/teams':
+                return 200, {'teams': self.get_teams()}
+            if path not in QUERIES and path not in WORKER_QUERIES:
+                raise LookupError(f'Unknown query {path}')
+
+            state = self._get_team(params)
+            if path in QUERIES:
+                return 200, _run_query(QUERIES, path, state.simulation, params)
+
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._pool, _worker_query, state.filename, path, params)
+            return 200, result
+        except LookupError as error:
+            return 404, {'error': str(error).strip("'\"")}
+        except ValueError as error:
+            return 400, {'error': str(error)}
+
+    def _get_team(self, params: dict[str, str]) -> TeamState:
+        """Return the TeamState of the team in params."""
+        if 'team' not in params:
+            raise ValueError('Missing parameter team')
+        teams = self._teams
+        if params['team'] not in teams:
+            raise LookupError(f'Unknown team {params["team"]}')
+        return teams[params['team']]
+
+    async def _watch(self) -> None:
+        """Reload the changed datafiles every poll_interval seconds, forever. An error while reloading is
+        printed to standard error and the datafiles are checked again at the next interval."""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.reload()
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                print(f'Reloading {self.source} failed: {error!r}', file=sys.stderr)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer the HTTP requests of one client connection, keeping it open between requests if asked to."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = await _read_headers(reader)
+                parts = request_line.decode('latin-1').split()
+                keep_alive = len(parts) == 3 and parts[2] == 'HTTP/1.1' and headers.get('connection') != 'close'
+
+                if len(parts) != 3:
+                    status, payload = 400, {'error': 'Malformed request line'}
+                elif parts[0] != 'GET':
+                    status, payload = 405, {'error': f'Method {parts[0]} is not allowed'}
+                else:
+                    url = urllib.parse.urlsplit(parts[1])
+                    params = dict(urllib.parse.parse_qsl(url.query))
+                    try:
+                        status, payload = await self.handle_request(url.path, params)
+                    except Exception as error:  # pylint: disable=broad-exception-caught
+                        status, payload = 500, {'error': repr(error)}
+
+                writer.write(_http_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def lineup_query(simulation: LineupSimulation) -> dict:
+    """Return the lineup of simulation, with the position and player impact estimate of every player.
+
+    >>> lineup_query(LineupSimulation('LAL.json'))['lineup'][2]
+    {'name': 'LeBron James', 'positions': ['Forward'], 'player_impact_estimate': 1.495}
+    """
+    return {'lineup': [{'name': player.name, 'positions': player.position,
+                        'player_impact_estimate': player.player_impact_estimate} for player in simulation.lineup]}
+
+
+def pie_query(simulation: LineupSimulation, params: dict[str, str]) -> dict:
+    """Return the player impact estimate of the player in params, or of every player if none is given.
+
+    >>> pie_query(LineupSimulation('LAL.json'), {'player': 'LeBron James'})
+    {'LeBron James': 1.495}
+    """
+    if 'player' in params:
+        player = simulation.team_graph.get_player(params['player'])
+        if player is None:
+            raise LookupError(f'Unknown player {params["player"]}')
+        return {player.name: player.player_impact_estimate}
+    return {player.name: player.player_impact_estimate for player in simulation.team_graph.get_players()}
+
+
+def pass_matrix_query(simulation: LineupSimulation, params: dict[str, str]) -> dict:
+    """Return the pass matrix of simulation with the normalization in params ('per_minute' by default).
+
+    >>> simulation = LineupSimulation('LAL.json')
+    >>> answer = pass_matrix_query(simulation, {'normalization': 'raw'})
+    >>> answer['players'][:2], len(answer['matrix']) == len(simulation.team_graph.get_players())
+    (['Alex Len', 'Cam Reddish'], True)
+    >>> pass_matrix_query(simulation, {'normalization': 'raw'}) is answer
+    True
+    """
+    normalization = params.get('normalization', 'per_minute')
+    graph = simulation.team_graph
+
+    def compute() -> dict:
+        matrix, names = graph.pass_matrix(normalization)
+        return {'players': names, 'normalization': normalization, 'matrix': matrix.tolist()}
+
+    # The answer only changes with the graph, so it is kept on the graph like the centralities
+    return graph.get_cached(('service_pass_matrix', normalization), compute)
+
+
+def connection_query(simulation: LineupSimulation, params: dict[str, str]) -> dict:
+    """Return the statistics of the connection between player1 and player2 in params.
+
+    >>> answer = connection_query(LineupSimulation('LAL.json'), {'player1': 'LeBron James', 'player2': 'Austin Reaves'})
+    >>> answer['players'], answer['passes'], answer['minutes_together']
+    (['Austin Reaves', 'LeBron James'], [934, 882], [1328, 1328])
+    """
+    for key in ('player1', 'player2'):
+        if key not in params:
+            raise ValueError(f'Missing parameter {key}')
+        if simulation.team_graph.get_player(params[key]) is None:
+            raise LookupError(f'Unknown player {params[key]}')
+
+    connection = simulation.team_graph.get_connection(params['player1'], params['player2'])
+    if connection is None:
+        raise LookupError(f'{params["player1"]} and {params["player2"]} have no connection')
+
+    player1, player2 = connection.player_connection
+    return {'players': [player1.name, player2.name],
+            'synergy_score': connection.synergy_score,
+            'max_avg_assists_per_pass': connection.max_avg_assists_per_pass,
+            'passes': [connection.player1_total_passes, connection.player2_total_passes],
+            'assists': [connection.player1_total_assists, connection.player2_total_assists],
+            'minutes_together': [connection.player1_minutes_together, connection.player2_minutes_together],
+            'avg_passes_per_minute': [connection.avg_passes_per_minute_player1,
+                                      connection.avg_passes_per_minute_player2],
+            'avg_assists_per_pass': [connection.player1_avg_assists_per_pass,
+                                     connection.player2_avg_assists_per_pass]}
+
+
+def synergy_lineup_query(simulation: LineupSimulation) -> dict:
+    """Return the lineup of generate_synergy_lineup."""
+    return {'lineup': [player.name for player in simulation.generate_synergy_lineup()]}
+
+
+def simulate_query(simulation: LineupSimulation, params: dict[str, str]) -> dict:
+    """Return the possession simulation of the lineup of simulation, with the possessions and seed in params."""
+    from possession import simulate_possessions
+
+    possessions, seed = int(params.get('possessions', 100_000)), int(params.get('seed', 0))
+    if not 0 < possessions <= MAX_POSSESSIONS:
+        raise ValueError(f'possessions must be between 1 and {MAX_POSSESSIONS}')
+    # This already runs in a worker process, so simulate every chunk right here
+    result = simulate_possessions(simulation.team_graph, simulation.lineup, possessions, seed, max_workers=1)
+    return result._asdict()
+
+
+# The queries answered straight away, and the queries answered by the worker processes
+QUERIES = {'/lineup': lineup_query, '/pie': pie_query, '/pass_matrix': pass_matrix_query,
+           '/connection': connection_query}
+WORKER_QUERIES = {'/synergy_lineup': synergy_lineup_query, '/simulate': simulate_query}
+
+# The queries that only need the team, so they are called without the query parameters
+TEAM_ONLY_QUERIES = frozenset({'/lineup', '/synergy_lineup'})
+
+
+def _run_query(queries: dict[str, Callable[..., dict]], path: str, simulation: LineupSimulation,
+               params: dict[str, str]) -> dict:
+    """Return the answer of the query with the given path in queries about simulation, passing it params unless it
+    is in TEAM_ONLY_QUERIES."""
+    if path in TEAM_ONLY_QUERIES:
+        return queries[path](simulation)
+    return queries[path](simulation, params)
+
+
+def _load_team(filename: str) -> LineupSimulation:
+    """Return the LineupSimulation of the given datafile, with its default pass matrix already cached, so that
+    the first requests for the team do not wait for it (or for NumPy to be imported)."""
+    simulation = LineupSimulation(filename)
+    pass_matrix_query(simulation, {})
+    return simulation
+
+
+def _worker_query(filename: str, path: str, params: dict[str, str]) -> Any:
+    """Answer a slow query in a worker process, loading the datafile only if this worker has not loaded this
+    version of it yet.
+
+    The version is the modification time this worker reads itself before loading the datafile, since the datafile
+    may have changed since the service loaded it. If it changes again while it is being loaded, the next query
+    sees a newer modification time and loads it again."""
+    mtime_ns = os.stat(filename).st_mtime_ns
+    cached = _worker_simulations.get(filename)
+    if cached is None or cached[0] != mtime_ns:
+        cached = (mtime_ns, LineupSimulation(filename))
+        _worker_simulations[filename] = cached
+    return _run_query(WORKER_QUERIES, path, cached[1], params)
+
+
+async def _read_headers(reader: asyncio.StreamReader) -> dict[str, str]:
+    """Read the headers of an HTTP request up to the blank line, with lowercase names and values."""
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            return headers
+        key, _, value = line.decode('latin-1').partition(':')
+        headers[key.strip().lower()] = value.strip().lower()
+
+
+def _http_response(status: int, payload: Any, keep_alive: bool) -> bytes:
+    """Return the HTTP response with the given status and JSON payload."""
+    body = json.dumps(payload).encode()
+    head = (f'HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n'
+            f'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+    return head.encode('latin-1') + body
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    """Run a LineupService with the given command line arguments until interrupted."""
+    service = LineupService(args.source, args.poll, args.workers)
+    await service.start(args.host, args.port, args.unix)
+    print(f'Serving {", ".join(service.get_teams())} on {service.get_address()}')
+    try:
+        await service.serve_forever()
+    finally:
+        await service.close()
+
+
+def main() -> None:
+    """Start the service from the command line."""
+    parser = argparse.ArgumentParser(description='Serve Top Hoops lineup queries over HTTP.')
+    parser.add_argument('source', help='a directory, glob pattern or team datafile')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', help='listen on this Unix socket instead of a port')
+    parser.add_argument('--poll', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help='seconds between checks of the datafiles for changes')
+    parser.add_argument('--workers', type=int, help='worker processes for the slow queries')
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main()
+    else:
+        import doctest
+        doctest.testmod()
+
+        import python_ta
+        python_ta.check_all(config={
+            'max-line-length': 120,
+            'extra-imports': ['argparse', 'asyncio', 'json', 'multiprocessing', 'os', 'sys', 'urllib.parse',
+                              'concurrent.futures', 'league', 'main', 'possession'],
+            'disable': ['E9998', 'C0415']
+        })
@@ -0,0 +1,202 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module contains the player similarity index, used to find replacements for a player, such as an injured lineup
+player. Two players are similar when their per-minute statistics (avg_points, avg_rebounds, avg_assists,
+avg_steals and avg_blocks) are close. Each statistic is first z-normalised over all the players of the index, so
+a statistic with small numbers like blocks counts as much as one with large numbers like points.
+
+A replacement must be able to play the position they replace, so only players listing the primary position of
+the player being replaced are considered. The distances from many players at once are calculated as blocks of a
+distance matrix, and lineup_replacements finds the replacements of every lineup player of every team in one call.
+"""
+from __future__ import annotations
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from array_graph import ArrayGraph
+from classes import Graph, _Player
+from impact import PLAYER_ATTRIBUTES, POSITIONS
+from main import LineupSimulation
+
+# The number of players whose distances are calculated together, which bounds the memory of a query
+BLOCK_SIZE = 512
+
+
+class Replacement(NamedTuple):
+    """ A player similar to the player being replaced.
+
+    Instance Attributes:
+        - name: The name of the replacement
+        - team: The team of the replacement
+        - distance: The distance between the z-normalised statistics of the two players, where 0 is identical
+    """
+    name: str
+    team: str
+    distance: float
+
+
+class SimilarityIndex:
+    """ The z-normalised per-minute statistics of a group of players, for finding the most similar players.
+
+    Instance Attributes:
+        - players: The players of this index, in the order of the rows of vectors
+        - vectors: vectors[i] holds the z-normalised statistics of players[i], in the order of PLAYER_ATTRIBUTES
+        - means: The mean of every statistic over the players
+        - scales: The standard deviation of every statistic over the players, or 1 where it is 0
+
+    Representation Invariants:
+        - self.vectors.shape == (len(self.players), len(PLAYER_ATTRIBUTES))
+    """
+    # Private Instance Attributes:
+    #     - _positions: _positions[i, j] is whether players[i] plays POSITIONS[j]
+    #     - _names: Maps each player name to its row
+    #     - _norms: The squared length of every row of vectors
+    players: list[_Player]
+    vectors: np.ndarray
+    means: np.ndarray
+    scales: np.ndarray
+    _positions: np.ndarray
+    _names: dict[str, int]
+    _norms: np.ndarray
+
+    def __init__(self, players: list[_Player]) -> None:
+        """
+        Initialize a new SimilarityIndex of the given players.
+
+        Preconditions:
+            - all(position in POSITIONS for player in players for position in player.position)
+        """
+        self.players = list(players)
+        stats = self._stats(self.players)
+        self.means = stats.mean(axis=0) if self.players else np.zeros(len(PLAYER_ATTRIBUTES))
+        scales = stats.std(axis=0) if self.players else np.ones(len(PLAYER_ATTRIBUTES))
+        self.scales = np.where(scales > 0, scales, 1.0)
+        self.vectors = (stats - self.means) / self.scales
+        self._norms = (self.vectors ** 2).sum(axis=1)
+        self._positions = np.array([[position in player.position for position in POSITIONS]
+                                    for player in self.players], dtype=bool).reshape(-1, len(POSITIONS))
+        self._names = {player.name: i for i, player in enumerate(self.players)}
+
+    @classmethod
+    def from_graph(cls, graph: Graph | ArrayGraph) -> SimilarityIndex:
+        """
+        Return a new SimilarityIndex of every player in graph, such as the league graph of 'league.py'.
+        """
+        return cls(graph.get_players())
+
+    @classmethod
+    def from_simulations(cls, simulations: list[LineupSimulation]) -> SimilarityIndex:
+        """
+        Return a new SimilarityIndex of every player of the given LineupSimulation classes, such as one per team.
+        """
+        return cls([player for simulation in simulations for player in simulation.team_graph.get_players()])
+
+    def query(self, player: _Player, k: int = 5, position: Optional[str] = None,
+              exclude: Optional[set[str]] = None) -> list[Replacement]:
+        """
+        Return the k players of this index most similar to player, from the most similar, who play position (by
+        default the primary position of player). player and the players named in exclude are left out.
+
+        Preconditions:
+            - k >= 1
+            - position is None or position in POSITIONS
+        """
+        return self.query_many([player], k, [position or player.position[0]], [exclude or set()])[0]
+
+    def query_many(self, targets: list[_Player], k: int = 5, positions: Optional[list[str]] = None,
+                   excludes: Optional[list[set[str]]] = None) -> list[list[Replacement]]:
+        """
+        Return the result of query for every player in targets, with positions[i] and excludes[i] as the position
+        and exclude of targets[i]. The distances are calculated BLOCK_SIZE targets at a time.
+
+        Preconditions:
+            - positions is None or len(positions) == len(targets)
+            - excludes is None or len(excludes) == len(targets)
+        """
+        if positions is None:
+            positions = [target.position[0] for target in targets]
+        if excludes is None:
+            excludes = [set()] * len(targets)
+
+        results = []
+        for start in range(0, len(targets), BLOCK_SIZE):
+            block = targets[start:start + BLOCK_SIZE]
+            distances = self._block_distances(block, positions[start:start + BLOCK_SIZE],
+                                              excludes[start:start + BLOCK_SIZE])
+            results.extend(self._nearest(distances, k))
+        return results
+
+    def lineup_replacements(self, simulations: dict[str, LineupSimulation],
+                            k: int = 5) -> dict[str, dict[str, list[Replacement]]]:
+        """
+        Return a dict mapping each team in simulations to a dict mapping every player of its lineup to their k
+        most similar replacements of the same position, leaving out the rest of that lineup.
+        """
+        targets, positions, excludes, keys = [], [], [], []
+        for team, simulation in simulations.items():
+            lineup_names = {player.name for player in simulation.lineup}
+            for player in simulation.lineup:
+                targets.append(player)
+                positions.append(player.position[0])
+                excludes.append(lineup_names)
+                keys.append((team, player.name))
+
+        replacements = {team: {} for team in simulations}
+        for (team, name), result in zip(keys, self.query_many(targets, k, positions, excludes)):
+            replacements[team][name] = result
+        return replacements
+
+    def _stats(self, players: list[_Player]) -> np.ndarray:
+        """Return the per-minute statistics of players as rows, in the order of PLAYER_ATTRIBUTES."""
+        return np.array([[getattr(player, attribute) for attribute in PLAYER_ATTRIBUTES] for player in players],
+                        dtype=np.float64).reshape(-1, len(PLAYER_ATTRIBUTES))
+
+    def _block_distances(self, targets: list[_Player], positions: list[str],
+                         excludes: list[set[str]]) -> np.ndarray:
+        """Return the distance from every player in targets to every player of this index, with inf for the
+        players that cannot replace them."""
+        vectors = (self._stats(targets) - self.means) / self.scales
+        # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b, for the whole block at once
+        squared = ((vectors ** 2).sum(axis=1)[:, np.newaxis] + self._norms[np.newaxis, :]
+                   - 2 * (vectors @ self.vectors.T))
+        distances = np.sqrt(np.maximum(squared, 0))
+
+        position_ids = np.array([POSITIONS.index(position) for position in positions], dtype=np.intp)
+        distances[~self._positions[:, position_ids].T] = np.inf
+        for row, (target, exclude) in enumerate(zip(targets, excludes)):
+            for name in exclude | {target.name}:
+                if name in self._names:
+                    distances[row, self._names[name]] = np.inf
+        return distances
+
+    def _nearest(self, distances: np.ndarray, k: int) -> list[list[Replacement]]:
+        """Return the Replacement of the k closest players of every row of distances, leaving out inf."""
+        k = min(k, distances.shape[1])
+        if k == 0:
+            return [[] for _ in range(len(distances))]
+
+        closest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        closest_distances = np.take_along_axis(distances, closest, axis=1)
+        # From the closest, with ties going to the player that comes first
+        order = np.lexsort((closest, closest_distances))
+        closest = np.take_along_axis(closest, order, axis=1)
+        closest_distances = np.take_along_axis(closest_distances, order, axis=1)
+
+        return [[Replacement(self.players[i].name, self.players[i].team, distance)
+                 for i, distance in zip(columns, row) if distance != np.inf]
+                for columns, row in zip(closest.tolist(), closest_distances.tolist())]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['numpy', 'array_graph', 'classes', 'impact', 'main'],
+        'disable': ['E9998']
+    })
@@ -0,0 +1,336 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module contains SeasonStore, a local SQLite database of many team datafiles (like LAL.json and DAL.json) over
+many seasons. Each datafile is read once, when it is ingested, and split into tables:
+    - files: every ingested datafile, with its season, its team (the file name without the extension) and the time
+      it was last changed
+    - players: every player name
+    - stats: the statistics of one player in one datafile
+    - positions: the positions of one player in one datafile
+    - passes: the passes of one player to another in one datafile
+
+The tables are indexed on team, season, position and player pair, so a question such as "every guard with at least
+500 minutes in 2024-25" is answered from the indexes without reading any datafile again. query_graph builds a Graph
+(or ArrayGraph) of the answer, and LineupSimulation.from_store in 'main.py' builds a LineupSimulation of it.
+
+A player who appears in more than one of the chosen datafiles (for example in several seasons, or after a trade)
+becomes one player whose statistics and passes are added together, like in 'league.py'.
+"""
+from __future__ import annotations
+import json
+import os
+import sqlite3
+from typing import Optional, Union, TYPE_CHECKING
+
+from classes import Graph, _Player, whole_number
+from league import find_team_files, team_name
+
+if TYPE_CHECKING:
+    from array_graph import ArrayGraph
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    file_id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    season TEXT NOT NULL,
+    team TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS players (
+    player_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS stats (
+    stat_id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files ON DELETE CASCADE,
+    player_id INTEGER NOT NULL REFERENCES players,
+    season TEXT NOT NULL,
+    team TEXT NOT NULL,
+    minutes REAL NOT NULL,
+    points REAL NOT NULL,
+    rebounds REAL NOT NULL,
+    assists REAL NOT NULL,
+    steals REAL NOT NULL,
+    blocks REAL NOT NULL,
+    UNIQUE (file_id, player_id)
+);
+CREATE TABLE IF NOT EXISTS positions (
+    stat_id INTEGER NOT NULL REFERENCES stats ON DELETE CASCADE,
+    ordinal INTEGER NOT NULL,
+    position TEXT NOT NULL,
+    PRIMARY KEY (stat_id, ordinal)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS passes (
+    pass_id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files ON DELETE CASCADE,
+    passer_id INTEGER NOT NULL REFERENCES players,
+    receiver_id INTEGER NOT NULL REFERENCES players,
+    total_passes REAL NOT NULL,
+    assists REAL NOT NULL,
+    minutes_together REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_team ON files (team, season);
+CREATE INDEX IF NOT EXISTS stats_season_team ON stats (season, team);
+CREATE INDEX IF NOT EXISTS stats_team ON stats (team);
+CREATE INDEX IF NOT EXISTS stats_player ON stats (player_id, season);
+CREATE INDEX IF NOT EXISTS positions_position ON positions (position, stat_id);
+CREATE INDEX IF NOT EXISTS passes_file ON passes (file_id, passer_id);
+CREATE INDEX IF NOT EXISTS passes_pair ON passes (passer_id, receiver_id);
+"""
+
+# The statistics of a player in the stats table, in the order of their columns
+STAT_COLUMNS = ('minutes', 'points', 'rebounds', 'assists', 'steals', 'blocks')
+
+
+class SeasonStore:
+    """ A SQLite database of team datafiles over many seasons.
+
+    Instance Attributes:
+        - path: The file the database is kept in, or ':memory:' for a database that is only kept in memory
+    """
+    # Private Instance Attributes:
+    #     - _connection: The open connection to the database
+    path: str
+    _connection: sqlite3.Connection
+
+    def __init__(self, path: str = ':memory:') -> None:
+        """
+        Open the database in the file with the given path, creating it and its tables if needed.
+        """
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        self._connection.execute('PRAGMA foreign_keys = ON')
+        if path != ':memory:':
+            # Readers do not wait for an ingest to finish, and an ingest only syncs the disk once
+            self._connection.execute('PRAGMA journal_mode = WAL')
+            self._connection.execute('PRAGMA synchronous = NORMAL')
+        self._connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the connection to the database."""
+        self._connection.close()
+
+    def ingest(self, source: str, season: str) -> int:
+        """
+        Add every team datafile given by source (a directory, a glob pattern or a single datafile, as in
+        'league.py') to this store as the given season, and return the number of datafiles added.
+
+        Every datafile is added in one transaction. A datafile that is already in this store and has not changed
+        since is skipped; one that has changed, or is ingested again for another season, replaces its old rows.
+
+        Preconditions:
+            - every datafile given by source is in same format as the LAL.json and DAL.json files
+        """
+        filenames = find_team_files(source)
+        if not filenames:
+            raise FileNotFoundError(f'No team datafiles found for {source!r}')
+
+        ingested = 0
+        with self._connection:
+            known = dict(self._connection.execute('SELECT path, mtime_ns || \'/\' || season FROM files'))
+            player_ids = {name: player_id for player_id, name in self._connection.execute(
+                'SELECT player_id, name FROM players')}
+            for filename in filenames:
+                path = os.path.abspath(filename)
+                mtime_ns = os.stat(path).st_mtime_ns
+                if known.get(path) == f'{mtime_ns}/{season}':
+                    continue
+
+                with open(path, 'r') as f:
+                    records = json.load(f)
+                self._connection.execute('DELETE FROM files WHERE path = ?', (path,))
+                file_id = self._connection.execute(
+                    'INSERT INTO files (path, season, team, mtime_ns) VALUES (?, ?, ?, ?)',
+                    (path, season, team_name(path), mtime_ns)).lastrowid
+                self._insert_records(file_id, season, records, player_ids)
+                ingested += 1
+        return ingested
+
+    def seasons(self) -> list[str]:
+        """Return every season in this store, in sorted order."""
+        return [season for (season,) in self._connection.execute('SELECT DISTINCT season FROM files ORDER BY 1')]
+
+    def teams(self, season: Optional[str] = None) -> list[str]:
+        """Return the team of every datafile in this store, or only of the given season, in sorted order."""
+        if season is None:
+            rows = self._connection.execute('SELECT DISTINCT team FROM files ORDER BY 1')
+        else:
+            rows = self._connection.execute('SELECT DISTINCT team FROM files WHERE season = ? ORDER BY 1', (season,))
+        return [team for (team,) in rows]
+
+    def query_graph(self, season: Union[str, list[str], None] = None, team: Union[str, list[str], None] = None,
+                    position: Union[str, list[str], None] = None, min_minutes: float = 0,
+                    names: Optional[list[str]] = None,
+                    graph_class: type = Graph) -> tuple[Graph | ArrayGraph, dict[str, tuple[_Player, list[str]]]]:
+        """
+        Return a new graph_class object of the players chosen by the given filters, alongside a dict mapping each
+        player name to a tuple of its _Player class and the names of the chosen players it passed to. Every filter
+        that is None chooses everything; a list chooses any of the values in it.
+            - season: the seasons to use
+            - team: the teams to use, either the team of a datafile (like 'LAL') or the team of a player record
+              (like 'Los Angeles Lakers')
+            - position: the players listing at least one of these positions
+            - min_minutes: the players with at least this many minutes over the chosen seasons and teams
+            - names: the players with these names
+
+        The player statistics include all their assists, but only the passes between two chosen players become
+        connections.
+
+        >>> store = SeasonStore()
+        >>> store.ingest('LAL.json', '2024-25')
+        1
+        >>> graph, players = store.query_graph(season='2024-25', position='Guard', min_minutes=500)
+        >>> sorted(players) == sorted(player.name for player in graph.get_players())
+        True
+        >>> all('Guard' in player.position and player.minutes >= 500 for player in graph.get_players())
+        True
+
+        Preconditions:
+            - graph_class in {Graph, ArrayGraph}
+        """
+        rows = self._chosen_rows(season, team, position, min_minutes, names)
+        graph = graph_class()
+        players = {}
+        player_names = {}
+        for player_id, name, record_team, positions, totals in self._merge_rows(rows):
+            minutes, points, rebounds, assists, steals, blocks = totals
+            player = _Player(name, record_team, positions, points, rebounds, assists, whole_number(minutes), steals,
+                             blocks)
+            graph.add_player(player)
+            players[player.name] = (player, [])
+            player_names[player_id] = player.name
+
+        for passer_id, receiver_id, total_passes, assists, minutes_together in self._chosen_passes(rows):
+            passer, receiver = player_names[passer_id], player_names[receiver_id]
+            graph.add_connection(players[passer][0], receiver, whole_number(assists), whole_number(total_passes),
+                                 whole_number(minutes_together))
+            players[passer][1].append(receiver)
+
+        return graph, players
+
+    def _insert_records(self, file_id: int, season: str, records: list[dict], player_ids: dict[str, int]) -> None:
+        """Insert the rows of the given records of one datafile, adding every new player name to player_ids."""
+        names = [record['name'] for record in records]
+        names += [receiver for record in records for receiver in record['passes_to']]
+        new_names = list(dict.fromkeys(name for name in names if name not in player_ids))
+        if new_names:
+            self._connection.executemany('INSERT OR IGNORE INTO players (name) VALUES (?)',
+                                         [(name,) for name in new_names])
+            for start in range(0, len(new_names), 500):
+                chunk = new_names[start:start + 500]
+                player_ids.update((name, player_id) for player_id, name in self._connection.execute(
+                    f'SELECT player_id, name FROM players WHERE name IN ({",".join("?" * len(chunk))})', chunk))
+
+        first_stat_id = self._connection.execute('SELECT COALESCE(MAX(stat_id), 0) + 1 FROM stats').fetchone()[0]
+        stats, positions, passes = [], [], []
+        for stat_id, record in enumerate(records, start=first_stat_id):
+            defense = record['defensive_stats']
+            assists = sum(passes_to['assists'] for passes_to in record['passes_to'].values())
+            stats.append((stat_id, file_id, player_ids[record['name']], season, record['team'], defense['minutes'],
+                          defense['points'], defense['rebounds'], assists, defense['steals'], defense['blocks']))
+            positions.extend((stat_id, ordinal, position) for ordinal, position in enumerate(record['positions']))
+            passes.extend((file_id, player_ids[record['name']], player_ids[receiver], passes_to['total_passes'],
+                           passes_to['assists'], passes_to['minutes_together'])
+                          for receiver, passes_to in record['passes_to'].items())
+
+        self._connection.executemany(f'INSERT INTO stats VALUES ({",".join("?" * 11)})', stats)
+        self._connection.executemany('INSERT INTO positions VALUES (?, ?, ?)', positions)
+        self._connection.executemany('INSERT INTO passes (file_id, passer_id, receiver_id, total_passes, assists, '
+                                     'minutes_together) VALUES (?, ?, ?, ?, ?, ?)', passes)
+
+    def _chosen_rows(self, season: Union[str, list[str], None], team: Union[str, list[str], None],
+                     position: Union[str, list[str], None], min_minutes: float,
+                     names: Optional[list[str]]) -> list[tuple]:
+        """Return the (stat_id, file_id, player_id, name, team, minutes, points, rebounds, assists, steals, blocks)
+        of every stats row chosen by the filters of query_graph, in the order they were ingested."""
+        conditions, parameters = [], []
+        if season is not None:
+            conditions.append(_any_of('s.season', _as_list(season), parameters))
+        if team is not None:
+            teams = _as_list(team)
+            conditions.append(f'({_any_of("s.team", teams, parameters)} OR {_any_of("f.team", teams, parameters)})')
+        if position is not None:
+            conditions.append('EXISTS (SELECT 1 FROM positions q WHERE q.stat_id = s.stat_id AND '
+                              f'{_any_of("q.position", _as_list(position), parameters)})')
+        if names is not None:
+            conditions.append(_any_of('p.name', list(names), parameters))
+
+        tables = 'stats s JOIN files f ON f.file_id = s.file_id JOIN players p ON p.player_id = s.player_id'
+        where = ' AND '.join(conditions) or '1'
+        if min_minutes > 0:
+            # The minutes are added up over the rows chosen by the other filters, so a player traded mid-season
+            # counts the minutes of every chosen team
+            where += (f' AND s.player_id IN (SELECT s.player_id FROM {tables} WHERE {where} '
+                      'GROUP BY s.player_id HAVING SUM(s.minutes) >= ?)')
+            parameters += parameters + [min_minutes]
+        query = (f'SELECT s.stat_id, s.file_id, s.player_id, p.name, s.team, '
+                 f'{", ".join("s." + c for c in STAT_COLUMNS)} FROM {tables} WHERE {where}')
+        return self._connection.execute(f'{query} ORDER BY stat_id', parameters).fetchall()
+
+    def _merge_rows(self, rows: list[tuple]) -> list[tuple[int, str, str, list[str], list[float]]]:
+        """Return the (player_id, name, team, positions, totals of STAT_COLUMNS) of every player in the given stats
+        rows, adding together the rows of the same player. The team is the one the player played the most minutes
+        for, and the positions are in the order they were first listed."""
+        positions = {}
+        stat_ids = [row[0] for row in rows]
+        for start in range(0, len(stat_ids), 500):
+            chunk = stat_ids[start:start + 500]
+            for stat_id, position in self._connection.execute(
+                    f'SELECT stat_id, position FROM positions WHERE stat_id IN ({",".join("?" * len(chunk))}) '
+                    'ORDER BY stat_id, ordinal', chunk):
+                positions.setdefault(stat_id, []).append(position)
+
+        merged = {}
+        for stat_id, _, player_id, name, team, *stats in rows:
+            if player_id not in merged:
+                merged[player_id] = (name, {}, [], [0] * len(STAT_COLUMNS))
+            _, team_minutes, player_positions, totals = merged[player_id]
+            team_minutes[team] = team_minutes.get(team, 0) + stats[0]
+            player_positions.extend(p for p in positions.get(stat_id, []) if p not in player_positions)
+            for i, value in enumerate(stats):
+                totals[i] += value
+
+        return [(player_id, name, max(team_minutes, key=team_minutes.get), player_positions, totals)
+                for player_id, (name, team_minutes, player_positions, totals) in merged.items()]
+
+    def _chosen_passes(self, rows: list[tuple]) -> list[tuple[int, int, float, float, float]]:
+        """Return the (passer_id, receiver_id, total_passes, assists, minutes_together) of the passes between the
+        players of the given stats rows in the same datafile, added together over the datafiles, in the order they
+        were ingested."""
+        self._connection.execute('CREATE TEMP TABLE IF NOT EXISTS chosen (file_id INTEGER, player_id INTEGER, '
+                                 'PRIMARY KEY (file_id, player_id)) WITHOUT ROWID')
+        try:
+            self._connection.executemany('INSERT INTO chosen VALUES (?, ?)', [(row[1], row[2]) for row in rows])
+            return self._connection.execute(
+                'SELECT a.passer_id, a.receiver_id, SUM(a.total_passes), SUM(a.assists), SUM(a.minutes_together) '
+                'FROM chosen c JOIN passes a ON a.file_id = c.file_id AND a.passer_id = c.player_id '
+                'JOIN chosen r ON r.file_id = a.file_id AND r.player_id = a.receiver_id '
+                'GROUP BY a.passer_id, a.receiver_id ORDER BY MIN(a.pass_id)').fetchall()
+        finally:
+            self._connection.execute('DELETE FROM chosen')
+            self._connection.commit()
+
+
+def _as_list(value: Union[str, list[str]]) -> list[str]:
+    """Return value as a list of strings, putting a single string in a list."""
+    return [value] if isinstance(value, str) else list(value)
+
+
+def _any_of(column: str, values: list, parameters: list) -> str:
+    """Return an SQL condition that column is any of values, adding values to parameters."""
+    parameters.extend(values)
+    return f'{column} IN ({",".join("?" * len(values))})'
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['json', 'os', 'sqlite3', 'array_graph', 'classes', 'league'],
+        'disable': ['E9998', 'R0913', 'R0914']
+    })
@@ -0,0 +1,137 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module contains the streaming (NDJSON) datafile format. Instead of one JSON list holding every player and
+their passes_to dict, an NDJSON datafile has one JSON object per line. Each line is either a player record:
+
+    {"type": "player", "name": "Alex Len", "positions": ["Center"], "team": "Los Angeles Lakers",
+     "defensive_stats": {"minutes": 85, "points": 8, ...}, "assists": 5}
+
+or a pass edge:
+
+    {"type": "pass", "from": "Alex Len", "to": "Bronny James", "total_passes": 5, "assists": 0,
+     "minutes_together": 15}
+
+A player must appear before any pass edge that names them. The file is read one line at a time, so memory use
+does not grow with the number of lines, only with the number of distinct players and connections.
+"""
+from __future__ import annotations
+import json
+from typing import Iterator
+
+from classes import Graph, _Player
+
+
+def iter_ndjson(filename: str) -> Iterator[dict]:
+    """Yield the JSON object on every non-blank line of the NDJSON datafile with the given filename."""
+    with open(filename, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_ndjson(records: list[dict], filename: str) -> None:
+    """
+    Write records to an NDJSON datafile with the given filename, writing every player line before the pass lines.
+
+    Preconditions:
+        - records in same format as the LAL.json and DAL.json files
+    """
+    with open(filename, 'w') as f:
+        for record in records:
+            player_line = {'type': 'player', 'name': record['name'], 'positions': record['positions'],
+                           'team': record['team'], 'defensive_stats': record['defensive_stats'],
+                           'assists': sum(passes['assists'] for passes in record['passes_to'].values())}
+            f.write(json.dumps(player_line) + '\n')
+
+        for record in records:
+            for receiver, passes in record['passes_to'].items():
+                pass_line = {'type': 'pass', 'from': record['name'], 'to': receiver,
+                             'total_passes': passes['total_passes'], 'assists': passes['assists'],
+                             'minutes_together': passes['minutes_together']}
+                f.write(json.dumps(pass_line) + '\n')
+
+
+def convert_to_ndjson(json_filename: str, ndjson_filename: str) -> None:
+    """Convert a JSON datafile (like LAL.json) into an NDJSON datafile."""
+    with open(json_filename, 'r') as f:
+        records = json.load(f)
+    write_ndjson(records, ndjson_filename)
+
+
+def load_ndjson(filename: str) -> tuple[Graph, dict[str, tuple[_Player, list[str]]]]:
+    """
+    Stream the NDJSON datafile with the given filename into a new Graph. Return the graph alongside a dict
+    mapping each player name to a tuple of its _Player class and the names of the players it passed to.
+
+    Pass edges for the same two players on several lines (for example one line per game) are added together.
+    Player lines without an "assists" total get their assists from the pass edges instead.
+
+    Preconditions:
+        - every player line comes before the pass lines that name that player
+    """
+    graph = Graph()
+    players = {}
+    # Running totals of (total_passes, assists, minutes_together) for pairs seen on more than one line
+    pass_totals = {}
+    # Running assist totals of the players whose player line had no "assists" total
+    missing_assists = {}
+
+    for line_number, line in enumerate(iter_ndjson(filename), start=1):
+        if line['type'] == 'player':
+            defense = line['defensive_stats']
+            player = _Player(line['name'], line['team'], line['positions'], defense['points'], defense['rebounds'],
+                             line.get('assists', 0), defense['minutes'], defense['steals'], defense['blocks'])
+            graph.add_player(player)
+            players[player.name] = (player, [])
+            if 'assists' not in line:
+                missing_assists[player.name] = 0
+
+        elif line['type'] == 'pass':
+            passer, receiver = line['from'], line['to']
+            if passer not in players or receiver not in players:
+                raise ValueError(f'Line {line_number} of {filename} passes between unknown players')
+
+            totals = (line['total_passes'], line['assists'], line['minutes_together'])
+            if (passer, receiver) in pass_totals:
+                previous = pass_totals[(passer, receiver)]
+                totals = (previous[0] + totals[0], previous[1] + totals[1], previous[2] + totals[2])
+            else:
+                players[passer][1].append(players[receiver][0].name)
+            pass_totals[(passer, receiver)] = totals
+
+            graph.add_connection(players[passer][0], receiver, totals[1], totals[0], totals[2])
+            if passer in missing_assists:
+                missing_assists[passer] += line['assists']
+
+        else:
+            raise ValueError(f'Line {line_number} of {filename} has unknown type {line["type"]!r}')
+
+    if missing_assists:
+        _apply_assists(graph, players, missing_assists)
+
+    return graph, players
+
+
+def _apply_assists(graph: Graph, players: dict[str, tuple[_Player, list[str]]], assists: dict[str, int]) -> None:
+    """Set the assists of the given players and update the statistics that depend on them."""
+    for name, total in assists.items():
+        player = players[name][0]
+        player.total_assists = total
+        player.avg_assists = round(total / player.minutes, 3)
+        player.player_impact_estimate = player.calculate_player_impact(graph.get_weights())
+
+    graph.refresh_synergy_scores()
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['json', 'classes'],
+        'disable': ['E9998', 'R0914']
+    })
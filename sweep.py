@@ -0,0 +1,142 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module contains the weight-sensitivity sweep. It answers how robust the lineup from
+'LineupSimulation.generate_lineup' is to the hard-coded POSITION_WEIGHTS in 'classes.py': given thousands of
+weight tables, it calculates the player impact estimates and the lineup for every table, then counts how often
+each player and each 5-player lineup is chosen.
+
+Every weight table is handled as a batch of NumPy arrays, and the batches are spread across a pool of worker
+processes.
+"""
+from __future__ import annotations
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from classes import _Player, POSITION_WEIGHTS
+from impact import ImpactModel, POSITIONS, STATS, impact_from_stats, weight_matrix
+
+# The positions of the lineup chosen by 'LineupSimulation.generate_lineup', and how many players each one gets
+LINEUP_POSITIONS = (('Guard', 2), ('Forward', 2), ('Center', 1))
+
+
+class SweepResult(NamedTuple):
+    """ The result of a weight-sensitivity sweep.
+
+    Instance Attributes:
+        - configurations: The number of weight tables in the sweep
+        - player_counts: Maps each player name to the number of weight tables whose lineup includes that player,
+                         from the most to the least often chosen
+        - lineup_counts: Maps each lineup, as a sorted tuple of player names, to the number of weight tables that
+                         chose it, from the most to the least often chosen
+    """
+    configurations: int
+    player_counts: dict[str, int]
+    lineup_counts: dict[tuple[str, ...], int]
+
+
+def grid_configurations(factors: list[float],
+                        base: Optional[dict[str, dict[str, float]]] = None) -> np.ndarray:
+    """
+    Return a stack of weight matrices scaling every statistic of base by every combination of the given factors.
+    Each statistic is scaled by the same factor for every position, so there are len(factors) ** len(STATS)
+    weight matrices. The default base is POSITION_WEIGHTS in 'classes.py'.
+
+    >>> grid_configurations([0.5, 1.0]).shape
+    (32, 3, 5)
+    """
+    base_matrix = weight_matrix(POSITION_WEIGHTS if base is None else base)
+    scales = np.stack(np.meshgrid(*[factors] * len(STATS), indexing='ij'), axis=-1).reshape(-1, len(STATS))
+    return base_matrix[np.newaxis, :, :] * scales[:, np.newaxis, :]
+
+
+def random_configurations(count: int, spread: float = 0.5, seed: int = 0,
+                          base: Optional[dict[str, dict[str, float]]] = None) -> np.ndarray:
+    """
+    Return a stack of count weight matrices, each multiplying every weight of base by an independent random factor
+    between 1 - spread and 1 + spread. The default base is POSITION_WEIGHTS in 'classes.py'.
+
+    >>> random_configurations(10, seed=1).shape
+    (10, 3, 5)
+    """
+    base_matrix = weight_matrix(POSITION_WEIGHTS if base is None else base)
+    rng = np.random.default_rng(seed)
+    return base_matrix * rng.uniform(1 - spread, 1 + spread, size=(count, len(POSITIONS), len(STATS)))
+
+
+def select_lineups(impact: np.ndarray, position_ids: np.ndarray) -> np.ndarray:
+    """
+    Return the lineups chosen the same way as 'LineupSimulation.generate_lineup' for every row of impact, which
+    holds one player impact estimate per player. Each row of the result holds the indices of two guards, two
+    forwards and one center, where ties go to the player that comes first, like in 'highest_in_position'.
+
+    Preconditions:
+        - impact.ndim == 2
+        - every position in LINEUP_POSITIONS has enough players in position_ids
+    """
+    lineups = []
+    for position, count in LINEUP_POSITIONS:
+        columns = np.flatnonzero(position_ids == POSITIONS.index(position))
+        order = np.argsort(-impact[:, columns], axis=1, kind='stable')[:, :count]
+        lineups.append(columns[order])
+    return np.concatenate(lineups, axis=1)
+
+
+def sweep_lineups(players: list[_Player], configurations: np.ndarray, max_workers: Optional[int] = None,
+                  chunk_size: int = 2000) -> SweepResult:
+    """
+    Return how often each player and each lineup of players is chosen across the given stack of weight matrices,
+    which has shape (k, len(POSITIONS), len(STATS)).
+
+    The weight matrices are split into chunks of chunk_size that are handled by a pool of max_workers processes.
+    If there is only one chunk or max_workers is 1, everything is handled in this process.
+    """
+    model = ImpactModel(players)
+    chunks = [configurations[start:start + chunk_size] for start in range(0, len(configurations), chunk_size)]
+
+    if len(chunks) <= 1 or max_workers == 1:
+        results = [_count_lineups(model.stats, model.position_ids, chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_count_lineups, [model.stats] * len(chunks),
+                                        [model.position_ids] * len(chunks), chunks))
+
+    lineup_counts = Counter()
+    for lineups, counts in results:
+        for lineup, count in zip(lineups.tolist(), counts.tolist()):
+            lineup_counts[tuple(lineup)] += count
+
+    player_counts = Counter()
+    named_lineups = Counter()
+    for lineup, count in lineup_counts.items():
+        names = tuple(sorted(players[i].name for i in lineup))
+        named_lineups[names] += count
+        for name in names:
+            player_counts[name] += count
+
+    return SweepResult(len(configurations), dict(player_counts.most_common()), dict(named_lineups.most_common()))
+
+
+def _count_lineups(stats: np.ndarray, position_ids: np.ndarray,
+                   configurations: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return the distinct lineups chosen across the given weight matrices, as sorted rows of player indices,
+    alongside how many weight matrices chose each one."""
+    impact = impact_from_stats(stats, position_ids, configurations)
+    lineups = np.sort(select_lineups(impact, position_ids), axis=1)
+    return np.unique(lineups, axis=0, return_counts=True)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['collections', 'concurrent.futures', 'numpy', 'classes', 'impact'],
+        'disable': ['E9998']
+    })
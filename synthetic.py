@@ -0,0 +1,165 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module contains the synthetic league generator. It writes team datafiles in the same format as LAL.json and
+DAL.json, with any number of made-up players, so that the code can be tested and benchmarked (see 'benchmarks.py')
+on rosters much larger than a real team. generate_season makes up the single games of a season instead, for the
+game logs in 'windows.py'.
+
+The generator is seeded, so the same arguments always give the same datafile. Every pair of players has played
+together with probability density; such a pair gets the same minutes_together in both directions and a random
+number of passes (and assists, at most the passes) each way.
+"""
+from __future__ import annotations
+import json
+import math
+import random
+from typing import Optional
+
+SYNTHETIC_POSITIONS = (['Guard'], ['Guard'], ['Forward'], ['Forward'], ['Center'], ['Guard', 'Forward'],
+                       ['Forward', 'Center'])
+
+
+def generate_team(num_players: int, density: float = 0.5, seed: int = 0,
+                  team_name: str = 'Synthetic Team', name_prefix: str = 'Player') -> list[dict]:
+    """
+    Return the records of a made-up team of num_players players, in the same format as the LAL.json and DAL.json
+    files. Each pair of players is connected with probability density. The players are named name_prefix followed
+    by a number, so teams with different prefixes have no players in common.
+
+    Positions cycle through SYNTHETIC_POSITIONS, so there are always enough guards, forwards and centers for a
+    lineup.
+
+    >>> team = generate_team(7, density=1.0)
+    >>> len(team), len(team[0]['passes_to'])
+    (7, 6)
+    >>> team == generate_team(7, density=1.0)
+    True
+
+    Preconditions:
+        - num_players >= 5
+        - 0 <= density <= 1
+    """
+    rng = random.Random(seed)
+    width = len(str(num_players))
+    records = []
+    for i in range(num_players):
+        minutes = rng.randint(100, 2500)
+        records.append({
+            'name': f'{name_prefix} {i + 1:0{width}d}',
+            'positions': list(SYNTHETIC_POSITIONS[i % len(SYNTHETIC_POSITIONS)]),
+            'team': team_name,
+            'passes_to': {},
+            'defensive_stats': {'minutes': minutes,
+                                'points': rng.randint(0, minutes),
+                                'rebounds': rng.randint(0, minutes // 3),
+                                'steals': rng.randint(0, minutes // 20),
+                                'blocks': rng.randint(0, minutes // 25)}
+        })
+
+    for i, j in _connected_pairs(num_players, density, rng):
+        minutes_together = rng.randint(1, min(records[i]['defensive_stats']['minutes'],
+                                              records[j]['defensive_stats']['minutes']))
+        for passer, receiver in ((records[i], records[j]), (records[j], records[i])):
+            passes = rng.randint(0, minutes_together)
+            passer['passes_to'][receiver['name']] = {'positions': list(receiver['positions']),
+                                                     'total_passes': passes,
+                                                     'assists': rng.randint(0, passes // 4),
+                                                     'minutes_together': minutes_together}
+    return records
+
+
+def generate_season(num_players: int, num_games: int = 82, density: float = 0.5, seed: int = 0,
+                    team_name: str = 'Synthetic Team', name_prefix: str = 'Player') -> list[list[dict]]:
+    """
+    Return the games of a made-up season of a team of num_players players, where each game is a list of records
+    in the same format as the LAL.json and DAL.json files, holding only the players who played in that game. Each
+    pair of players is connected with probability density, and connected players pass to each other in the games
+    they both played.
+
+    >>> season = generate_season(10, num_games=3)
+    >>> len(season), all(record['defensive_stats']['minutes'] > 0 for game in season for record in game)
+    (3, True)
+
+    Preconditions:
+        - num_players >= 5
+        - 0 <= density <= 1
+    """
+    rng = random.Random(seed)
+    width = len(str(num_players))
+    names = [f'{name_prefix} {i + 1:0{width}d}' for i in range(num_players)]
+    partners = [[] for _ in range(num_players)]
+    for i, j in _connected_pairs(num_players, density, rng):
+        partners[i].append(j)
+        partners[j].append(i)
+
+    season = []
+    for _ in range(num_games):
+        minutes = [rng.randint(5, 40) if rng.random() < 0.85 else 0 for _ in range(num_players)]
+        game = []
+        for i in range(num_players):
+            if minutes[i] == 0:
+                continue
+            passes_to = {}
+            for j in partners[i]:
+                if minutes[j] > 0:
+                    minutes_together = rng.randint(1, min(minutes[i], minutes[j]))
+                    passes = rng.randint(0, minutes_together)
+                    passes_to[names[j]] = {'positions': list(SYNTHETIC_POSITIONS[j % len(SYNTHETIC_POSITIONS)]),
+                                           'total_passes': passes, 'assists': rng.randint(0, passes // 4),
+                                           'minutes_together': minutes_together}
+            game.append({'name': names[i], 'positions': list(SYNTHETIC_POSITIONS[i % len(SYNTHETIC_POSITIONS)]),
+                         'team': team_name, 'passes_to': passes_to,
+                         'defensive_stats': {'minutes': minutes[i], 'points': rng.randint(0, minutes[i]),
+                                             'rebounds': rng.randint(0, minutes[i] // 3),
+                                             'steals': rng.randint(0, minutes[i] // 20),
+                                             'blocks': rng.randint(0, minutes[i] // 25)}})
+        season.append(game)
+    return season
+
+
+def write_team_file(filename: str, num_players: int, density: float = 0.5, seed: int = 0,
+                    team_name: Optional[str] = None, name_prefix: str = 'Player') -> None:
+    """
+    Write the records of generate_team to a JSON datafile with the given filename. The default team_name
+    includes the number of players and the seed.
+    """
+    if team_name is None:
+        team_name = f'Synthetic {num_players} ({seed})'
+    with open(filename, 'w') as f:
+        json.dump(generate_team(num_players, density, seed, team_name, name_prefix), f)
+
+
+def _connected_pairs(num_players: int, density: float, rng: random.Random) -> list[tuple[int, int]]:
+    """Return the pairs (i, j) with i < j of the players that played together, each chosen with probability
+    density. Sparse teams skip ahead by a geometric gap instead of testing every pair."""
+    if density >= 1:
+        return [(i, j) for i in range(num_players) for j in range(i + 1, num_players)]
+    if density <= 0:
+        return []
+
+    pairs = []
+    log_miss = math.log1p(-density)
+    i, j = 0, 0
+    while True:
+        # The gap to the next chosen pair is geometric, as if every pair in between was tested and rejected
+        j += 1 + int(math.log(1 - rng.random()) / log_miss)
+        while j >= num_players:
+            i += 1
+            j = j - num_players + i + 1
+            if i >= num_players - 1:
+                return pairs
+        pairs.append((i, j))
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['json', 'math', 'random'],
+        'disable': ['E9998']
+    })
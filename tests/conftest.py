@@ -0,0 +1,32 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module holds the pytest fixtures shared by the tests in this folder. The project modules are at the top of
+the repository rather than in a package, so that folder is put on the import path here, and the datafiles are
+found relative to it.
+"""
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(params=['LAL.json', 'DAL.json'])
+def datafile(request: pytest.FixtureRequest) -> str:
+    """Return the path of one of the team datafiles of the project."""
+    return os.path.join(ROOT, request.param)
+
+
+
+@pytest.fixture
+def league_dir(tmp_path: object) -> str:
+    """Return a temporary folder holding a copy of every team datafile of the project."""
+    for filename in ('LAL.json', 'DAL.json'):
+        shutil.copy(os.path.join(ROOT, filename), tmp_path)
+    return str(tmp_path)
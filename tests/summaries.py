@@ -0,0 +1,35 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module holds the functions the tests in this folder use to compare two graphs, whatever graph class they are
+and whatever order their players and connections were added in.
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from array_graph import ArrayGraph
+    from classes import Graph
+
+
+def connection_summary(graph: Graph | ArrayGraph) -> dict[tuple[str, str], tuple]:
+    """Return every connection of graph as a dict mapping (passer, receiver) to the passing statistics of that
+    direction and the synergy score, so that graphs which added the same connection the other way around still
+    compare equal."""
+    summary = {}
+    for connection in graph.get_connections():
+        player1, player2 = (player.name for player in connection.player_connection)
+        summary[(player1, player2)] = (connection.player1_total_passes, connection.player1_total_assists,
+                                       connection.player1_minutes_together, connection.avg_passes_per_minute_player1,
+                                       connection.player1_avg_assists_per_pass, connection.synergy_score)
+        summary[(player2, player1)] = (connection.player2_total_passes, connection.player2_total_assists,
+                                       connection.player2_minutes_together, connection.avg_passes_per_minute_player2,
+                                       connection.player2_avg_assists_per_pass, connection.synergy_score)
+    return summary
+
+
+def player_summary(graph: Graph | ArrayGraph) -> dict[str, tuple]:
+    """Return every player of graph as a dict mapping their name to their totals and player impact estimate."""
+    return {player.name: (player.team, player.position, player.minutes, player.total_points, player.total_assists,
+                          player.player_impact_estimate) for player in graph.get_players()}
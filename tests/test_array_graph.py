@@ -0,0 +1,96 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module tests that an ArrayGraph gives the same players, connections, lineups and pass matrices as a Graph of
+the same datafile, in both its dense and its compressed sparse row storage.
+"""
+import numpy as np
+import pytest
+
+import array_graph
+from pass_matrix import PASS_NORMALIZATIONS
+from array_graph import ArrayGraph
+from main import LineupSimulation
+from summaries import connection_summary, player_summary
+from synthetic import write_team_file
+
+
+@pytest.fixture(params=['dense', 'csr'])
+def storage(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    """Make every ArrayGraph use the given storage, whatever its size and density."""
+    if request.param == 'csr':
+        monkeypatch.setattr(array_graph, 'DENSE_MAX_PLAYERS', 0)
+        monkeypatch.setattr(array_graph, 'DENSE_MIN_DENSITY', 2.0)
+    else:
+        monkeypatch.setattr(array_graph, 'DENSE_MAX_PLAYERS', 10 ** 6)
+    return request.param
+
+
+def assert_same_graph(graph: object, arrays: ArrayGraph) -> None:
+    """Assert that the Graph graph and the ArrayGraph arrays hold the same players and connections."""
+    assert [player.name for player in arrays.get_players()] == [player.name for player in graph.get_players()]
+    assert player_summary(arrays) == player_summary(graph)
+    assert connection_summary(arrays) == connection_summary(graph)
+    for player in graph.get_players():
+        assert arrays.neighbours(player.name) == graph.neighbours(player.name)
+        assert arrays.top_passing_partners(player.name, 3) == graph.top_passing_partners(player.name, 3)
+        assert (arrays.get_passes_per_minute_dict(player.name, graph.neighbours(player.name))
+                == graph.get_passes_per_minute_dict(player.name, graph.neighbours(player.name)))
+
+
+def test_same_as_graph(datafile: str, storage: str) -> None:
+    """An ArrayGraph of a datafile holds the same players and connections and gives the same lineup."""
+    dict_simulation = LineupSimulation(datafile)
+    array_simulation = LineupSimulation(datafile, backend='array')
+    assert array_simulation.team_graph.get_storage() == storage
+    assert_same_graph(dict_simulation.team_graph, array_simulation.team_graph)
+    assert [p.name for p in array_simulation.lineup] == [p.name for p in dict_simulation.lineup]
+
+
+@pytest.mark.parametrize('normalization', PASS_NORMALIZATIONS)
+def test_same_pass_matrix(tmp_path: object, storage: str, normalization: str) -> None:
+    """The pass matrices of an ArrayGraph are the same as those of a Graph, dense or sparse, and for a chosen
+    order of players."""
+    filename = str(tmp_path / 'team.json')
+    write_team_file(filename, 80, density=0.2, seed=4)
+    graph = LineupSimulation(filename).team_graph
+    arrays = ArrayGraph.from_graph(graph)
+    assert arrays.get_storage() == storage
+
+    chosen = [player.name for player in graph.get_players()][::-3]
+    for players in (None, chosen):
+        expected, expected_names = graph.pass_matrix(normalization, players=players)
+        for sparse in (False, True):
+            matrix, names = arrays.pass_matrix(normalization, sparse, players=players)
+            assert names == expected_names
+            np.testing.assert_allclose(matrix.toarray() if sparse else matrix, expected)
+
+
+def test_remove_player_same_as_graph(datafile: str, storage: str) -> None:
+    """Removing players from an ArrayGraph leaves the same graph as removing them from a Graph, and putting
+    them back in the reverse order with restore_order gives back the original graph, in its original order."""
+    graph = LineupSimulation(datafile).team_graph
+    arrays = LineupSimulation(datafile, backend='array').team_graph
+    original = graph.get_order()
+    assert arrays.get_order() == original
+
+    names = [player.name for player in graph.get_players()]
+    removed = []
+    for name in (names[0], names[len(names) // 2], names[-1]):
+        removed.append((graph.get_order(), graph.get_player(name), graph.remove_player(name),
+                        arrays.get_player(name), arrays.remove_player(name)))
+        assert_same_graph(graph, arrays)
+
+    for order, graph_player, graph_connections, array_player, array_connections in reversed(removed):
+        graph.add_player(graph_player)
+        arrays.add_player(array_player)
+        for connection in graph_connections:
+            graph.insert_connection(connection)
+        for connection in array_connections:
+            arrays.insert_connection(connection)
+        graph.restore_order(order)
+        arrays.restore_order(order)
+        assert graph.get_order() == arrays.get_order() == order
+        assert_same_graph(graph, arrays)
+    assert graph.get_order() == original
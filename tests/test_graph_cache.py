@@ -0,0 +1,53 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module tests that a graph loaded from a compiled snapshot in 'graph_cache.py' is the same as the graph
+loaded fresh from its datafile, and that an edited datafile is never loaded from the snapshot of its old contents.
+"""
+import json
+import os
+import shutil
+
+from graph_cache import source_key
+from main import LineupSimulation
+from summaries import connection_summary, player_summary
+
+
+def assert_same_simulation(cached: LineupSimulation, fresh: LineupSimulation) -> None:
+    """Assert that two LineupSimulation classes hold the same graph, partner names and lineup."""
+    assert [p.name for p in cached.team_graph.get_players()] == [p.name for p in fresh.team_graph.get_players()]
+    assert player_summary(cached.team_graph) == player_summary(fresh.team_graph)
+    assert connection_summary(cached.team_graph) == connection_summary(fresh.team_graph)
+    assert {name: partners for name, (_, partners) in cached.players.items()} == \
+        {name: partners for name, (_, partners) in fresh.players.items()}
+    assert [p.name for p in cached.lineup] == [p.name for p in fresh.lineup]
+
+
+def test_round_trip(datafile: str, tmp_path: object) -> None:
+    """The second load of a datafile comes from its snapshot and is the same as a fresh load."""
+    cache_dir = str(tmp_path / 'cache')
+    fresh = LineupSimulation(datafile)
+    stored = LineupSimulation(datafile, cache_dir=cache_dir)
+    assert os.listdir(cache_dir) == [source_key(datafile)]
+
+    assert_same_simulation(stored, fresh)
+    assert_same_simulation(LineupSimulation(datafile, cache_dir=cache_dir), fresh)
+    cached_arrays = LineupSimulation(datafile, cache_dir=cache_dir, backend='array')
+    assert_same_simulation(cached_arrays, LineupSimulation(datafile, backend='array'))
+
+
+def test_edited_datafile(datafile: str, tmp_path: object) -> None:
+    """Editing a datafile gives it a new snapshot, so the old contents are never loaded."""
+    cache_dir, copy = str(tmp_path / 'cache'), str(tmp_path / 'team.json')
+    shutil.copy(datafile, copy)
+    LineupSimulation(copy, cache_dir=cache_dir)
+
+    with open(copy) as f:
+        records = json.load(f)
+    records[0]['defensive_stats']['points'] += 100
+    with open(copy, 'w') as f:
+        json.dump(records, f)
+
+    assert_same_simulation(LineupSimulation(copy, cache_dir=cache_dir), LineupSimulation(copy))
+    assert len(os.listdir(cache_dir)) == 2
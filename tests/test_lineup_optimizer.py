@@ -0,0 +1,77 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module tests the branch-and-bound search of 'lineup_optimizer.py' against a brute force search over every
+lineup of small made-up teams.
+"""
+from itertools import combinations, permutations
+from typing import Optional
+
+import pytest
+
+from classes import Graph, _Player
+from lineup_optimizer import LINEUP_SLOTS, PAIR_WEIGHTS, build_pair_table, optimal_lineup
+from main import LineupSimulation
+from synthetic import generate_team
+
+
+def lineup_score(chosen: tuple[int, ...], players: list[_Player], pairs: list[dict[int, float]]) -> float:
+    """Return the unrounded score of the players with the chosen indices, given their pair score table."""
+    score = sum(players[i].player_impact_estimate for i in chosen)
+    return score + sum(pairs[i].get(j, 0.0) for i, j in combinations(chosen, 2))
+
+
+def brute_force(players: list[_Player], graph: Graph, weights: dict[str, float]) -> Optional[float]:
+    """Return the best unrounded score of any lineup of players that fills LINEUP_SLOTS, or None if there is
+    none."""
+    pairs = build_pair_table(graph, players, weights)
+    best = None
+    for chosen in combinations(range(len(players)), len(LINEUP_SLOTS)):
+        if any(all(slot in players[i].position for i, slot in zip(order, LINEUP_SLOTS))
+               for order in permutations(chosen)):
+            score = lineup_score(chosen, players, pairs)
+            best = score if best is None else max(best, score)
+    return best
+
+
+def assert_optimal(players: list[_Player], graph: Graph, weights: dict[str, float]) -> None:
+    """Assert that optimal_lineup returns a lineup of distinct players in slots they play, with the best score
+    found by brute force. The returned score is rounded to three decimal places."""
+    lineup, score = optimal_lineup(players, graph, weights)
+    assert len(set(lineup)) == len(LINEUP_SLOTS)
+    assert all(slot in player.position for player, slot in zip(lineup, LINEUP_SLOTS))
+
+    chosen = tuple(players.index(player) for player in lineup)
+    best = brute_force(players, graph, weights)
+    assert lineup_score(chosen, players, build_pair_table(graph, players, weights)) == pytest.approx(best)
+    assert score == pytest.approx(best, abs=5e-4 + 1e-9)
+
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('weights', [PAIR_WEIGHTS, {'synergy': 1.0, 'assists_per_pass': 5.0, 'passes_per_minute': 0.5},
+                                     {'synergy': -1.0, 'assists_per_pass': 2.0, 'passes_per_minute': -0.5}])
+def test_same_as_brute_force(seed: int, weights: dict[str, float]) -> None:
+    """The optimizer finds a lineup with the best score of all lineups, with every player in a slot they play."""
+    graph = LineupSimulation.from_records(generate_team(13, density=0.6, seed=seed), 'Synthetic').team_graph
+    assert_optimal(graph.get_players(), graph, weights)
+
+
+def test_datafile_same_as_brute_force(datafile: str) -> None:
+    """The optimizer finds the best lineup of a real team."""
+    graph = LineupSimulation(datafile).team_graph
+    assert_optimal(graph.get_players(), graph, PAIR_WEIGHTS)
+
+
+def test_unfillable() -> None:
+    """Players who can each fill some slot but not every slot at once raise ValueError, as brute force finds no
+    lineup either."""
+    pool = [_Player(f'Swing {i}', 'LAL', ['Guard', 'Forward'], 5, 5, 5, 5, 5, 5) for i in range(3)]
+    pool.append(_Player('Big', 'LAL', ['Center'], 5, 5, 5, 5, 5, 5))
+    graph = Graph()
+    for player in pool:
+        graph.add_player(player)
+
+    assert brute_force(pool, graph, PAIR_WEIGHTS) is None
+    with pytest.raises(ValueError):
+        optimal_lineup(pool, graph)
@@ -0,0 +1,58 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module tests that replaying a season one game at a time with apply_game, or in one batch with apply_games,
+gives the same graph and lineup as loading the whole season at once.
+"""
+import pytest
+
+from array_graph import ArrayGraph
+from league import merge_records
+from main import LineupSimulation
+from summaries import connection_summary, player_summary
+from synthetic import generate_season
+
+
+@pytest.fixture(params=[(12, 0.8, 0), (40, 0.3, 1), (90, 0.1, 2)], ids=['small', 'medium', 'sparse'])
+def season(request: pytest.FixtureRequest) -> list[list[dict]]:
+    """Return a made-up season of 15 games, of a team with the given number of players and density."""
+    num_players, density, seed = request.param
+    return generate_season(num_players, num_games=15, density=density, seed=seed)
+
+
+def assert_same_as_bulk(replayed: LineupSimulation, season: list[list[dict]]) -> None:
+    """Assert that replayed holds the same players, connections and lineup as the whole of season loaded at once.
+    The players are compared by name, since a replay adds each player in the first game they played."""
+    bulk = LineupSimulation.from_records(merge_records(season), 'Bulk')
+    assert player_summary(replayed.team_graph) == player_summary(bulk.team_graph)
+    assert connection_summary(replayed.team_graph) == connection_summary(bulk.team_graph)
+    assert sorted(p.name for p in replayed.lineup) == sorted(p.name for p in bulk.lineup)
+    assert {name: sorted(partners) for name, (_, partners) in replayed.players.items()} == \
+        {name: sorted(partners) for name, (_, partners) in bulk.players.items()}
+
+
+@pytest.mark.parametrize('backend', ['dict', 'array'])
+def test_game_by_game(season: list[list[dict]], backend: str) -> None:
+    """Replaying every game after the first with apply_game gives the same result as the bulk load."""
+    simulation = LineupSimulation.from_records(season[0], 'Replayed')
+    if backend == 'array':
+        simulation.team_graph = ArrayGraph.from_graph(simulation.team_graph)
+    for game in season[1:]:
+        simulation.apply_game(game)
+    assert_same_as_bulk(simulation, season)
+
+
+def test_batched(season: list[list[dict]]) -> None:
+    """Replaying every game after the first with one apply_games call gives the same result as the bulk load."""
+    simulation = LineupSimulation.from_records(season[0], 'Batched')
+    simulation.apply_games(season[1:])
+    assert_same_as_bulk(simulation, season)
+
+
+def test_box_score_only_game(season: list[list[dict]]) -> None:
+    """A game without any passes still updates the players and lineup, as in the bulk load."""
+    simulation = LineupSimulation.from_records(season[0], 'Replayed')
+    quiet = [dict(record, passes_to={}) for record in season[1]]
+    simulation.apply_game(quiet)
+    assert_same_as_bulk(simulation, [season[0], quiet])
@@ -0,0 +1,73 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module tests that undoing the roster moves of a WhatIfEngine gives back every team exactly as it was,
+including the order of its players and connections.
+"""
+import random
+
+import pytest
+
+from classes import _Player
+from summaries import connection_summary, player_summary
+from sweep import LINEUP_POSITIONS
+from whatif import WhatIfEngine
+
+
+@pytest.fixture(params=['dict', 'array'])
+def engine(request: pytest.FixtureRequest, league_dir: str) -> WhatIfEngine:
+    """Return a WhatIfEngine of the LAL and DAL datafiles, with the given graph backend."""
+    return WhatIfEngine.from_files(league_dir, request.param)
+
+
+def league_state(engine: WhatIfEngine) -> dict[str, tuple]:
+    """Return everything about each team of engine that undo should restore, in order."""
+    state = {}
+    for team, simulation in engine.teams.items():
+        graph = simulation.team_graph
+        names = [player.name for player in graph.get_players()]
+        state[team] = (names, graph.get_order(), list(simulation.players.items()),
+                       player_summary(graph), connection_summary(graph),
+                       [graph.neighbours(name) for name in names],
+                       [player.name for player in simulation.lineup],
+                       [[p.name for p in simulation.highest_in_position(position)] for position, _ in LINEUP_POSITIONS])
+    return state
+
+
+def test_undo_each_move(engine: WhatIfEngine) -> None:
+    """Undoing a swap, a removal and an addition one at a time gives back the teams before each move."""
+    states = [league_state(engine)]
+    lal, dal = list(engine.teams['LAL'].players), list(engine.teams['DAL'].players)
+    engine.swap('LAL', lal[3], 'DAL', dal[4])
+    states.append(league_state(engine))
+    engine.remove_player('DAL', dal[0])
+    states.append(league_state(engine))
+    engine.add_player('LAL', _Player('Free Agent', 'FA', ['Guard'], 900, 300, 200, 1000, 40, 10))
+    assert league_state(engine) != states[-1]
+
+    for expected in reversed(states):
+        assert engine.undo()
+        assert league_state(engine) == expected
+    assert not engine.undo()
+
+
+def test_rollback_random_swaps(engine: WhatIfEngine) -> None:
+    """Rolling back random swaps to a checkpoint, and then to the start, gives back the teams at each point."""
+    before = league_state(engine)
+    rng = random.Random(3)
+    checkpoint = None
+    for move in range(8):
+        if move == 4:
+            checkpoint, middle = engine.checkpoint(), league_state(engine)
+        try:
+            engine.swap('LAL', rng.choice(list(engine.teams['LAL'].players)),
+                        'DAL', rng.choice(list(engine.teams['DAL'].players)))
+        except ValueError:
+            # A swap that would leave a team without enough players of some position is refused
+            pass
+
+    engine.rollback(checkpoint)
+    assert league_state(engine) == middle
+    engine.rollback()
+    assert league_state(engine) == before
@@ -3,44 +3,206 @@ Top Hoops: NBA Optimal Basketball Lineup
 Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
 
 This module contains the necessary function needed to create the heatmap of player passes which is displayed
-in the 'main.py' file.
+in the 'main.py' file, and the drawing of the graph of players and connections used by 'classes.py'.
 
 This function is in a seperate file as it uses many libraries seldom used in 'main.py' and 'classes.py'
 
+Every drawing function takes an optional output_path. Without one, the drawing opens in an interactive TkAgg
+window like before. With one, the drawing is rendered without any display, written to that file (the format comes
+from its extension, such as .png or .svg) and then released, so many drawings can be rendered on a server.
+
 """
+from __future__ import annotations
+from typing import Optional
+
 import numpy as np
 import pandas as pd
 import seaborn as sns
 import matplotlib
 import matplotlib.pyplot as plt
-matplotlib.use("TkAgg")
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+
+import instrumentation
+
+INTERACTIVE_BACKEND = "TkAgg"
+
+# Edges with a synergy score of at least the first threshold are green, edges above the second are purple and the
+# rest are dark red
+SYNERGY_THRESHOLDS = (1.75, 0.75)
+EDGE_COLORS = ('green', '#8A2BE2', 'darkred')
+
+# Graphs with more players than this are drawn without player names, which would only overlap
+LABEL_LIMIT = 100
 
+# The number of layouts kept by graph_layout, and the kept layouts, mapping a tuple of player names to their
+# positions. They are keyed by the players alone, so a layout is kept while only the passes of a graph change.
+LAYOUT_CACHE_SIZE = 8
+_layouts = {}
 
-def create_heatmap(pass_data: dict, team_name: str) -> None:
+
+def new_figure(figsize: tuple[float, float], output_path: Optional[str]) -> Figure:
+    """
+    Return a new figure of the given size. If output_path is None, the figure belongs to an interactive window.
+    Otherwise it is a standalone figure that never touches a display, to be written with finish_figure.
+    """
+    if output_path is None:
+        if matplotlib.get_backend() != INTERACTIVE_BACKEND:
+            matplotlib.use(INTERACTIVE_BACKEND)
+        return plt.figure(figsize=figsize)
+    return Figure(figsize=figsize)
+
+
+def finish_figure(figure: Figure, output_path: Optional[str], show: bool = True) -> None:
     """
-    Constructs a heatmap for player passing synergy, and displays it.
+    If output_path is None, display the interactive figure (if show is True). Otherwise write figure to
+    output_path and release it.
     """
-    # pass_data dict is in the following format:
-    # pass_data = {
-    #     "Alex Len": {"Bronny James": 5, "Dalton Knecht": 4, "Jordan Goodwin": 6, "Austin Reaves": 21,
-    #     "Gabe Vincent": 8, "Rui Hachimura": 3, "Luka Dončić": 12, "Jarred Vanderbilt": 2, "Shake Milton": 7,
-    #     "Dorian Finney-Smith": 2, "Markieff Morris": 1, "LeBron James": 8}....}
-    players_list = sorted(set(pass_data.keys()).union(*[set(v.keys()) for v in pass_data.values()]))
-    matrix = pd.DataFrame(np.zeros((len(players_list), len(players_list))), index=players_list, columns=players_list)
+    if output_path is None:
+        if show:
+            plt.show()
+    else:
+        figure.savefig(output_path)
+        figure.clear()
+
+
+def create_heatmap(matrix: np.ndarray, player_names: list[str], team_name: str,
+                   output_path: Optional[str] = None) -> None:
+    """
+    Constructs a heatmap for player passing synergy, and displays it, or writes it to output_path if given.
+
+    matrix is a pass matrix (see 'pass_matrix.py'), where row i and column j hold the passes per minute of
+    player_names[i] to player_names[j].
+    """
+    with instrumentation.span('heatmap_matrix'):
+        matrix = heatmap_matrix(matrix, player_names)
+
+    with instrumentation.span('render_heatmap'):
+        figure = new_figure((12, 10), output_path)
+        axes = figure.add_subplot()
+        sns.heatmap(matrix, annot=True, cmap="Blues", fmt=".3f", linewidths=1, ax=axes)
+        axes.set_title(f"Player Passing per Minute Synergy Heatmap for {team_name}\n "
+                       f"(Note That a Value of 0 Means the Two Players Have Not Played Together)")
+        axes.set_xlabel("Players (Receiving the Pass)")
+        axes.set_ylabel("Players (Making the Pass)")
+        figure.subplots_adjust(left=0.17, right=1.05, top=0.90, bottom=0.28)
+        finish_figure(figure, output_path)
+
+
+def heatmap_matrix(matrix: np.ndarray, player_names: list[str]) -> pd.DataFrame:
+    """
+    Return the given pass matrix as the table shown by create_heatmap, with the players sorted by name.
+    """
+    matrix = np.asarray(matrix)
+    if player_names != sorted(player_names):
+        order = sorted(range(len(player_names)), key=lambda i: player_names[i])
+        player_names = [player_names[i] for i in order]
+        matrix = matrix[np.ix_(order, order)]
+    return pd.DataFrame(matrix, index=player_names, columns=player_names)
+
+
+def draw_graph(graph: object, ideal_lineup: list, output_path: Optional[str] = None, min_passes: float = 0,
+               top_k: Optional[int] = None) -> None:
+    """
+    Draw the _Player classes of graph (a Graph or an ArrayGraph) as nodes around a circle and its connections as
+    edges, as described in Graph.visualize_graph in 'classes.py'. Write the drawing to output_path if given.
+
+    To cut clutter on large graphs, only the connections with at least min_passes passes in total are drawn, and
+    if top_k is given, only the connections among the top_k with the most passes of either of their players.
+    Player names are only written when there are at most LABEL_LIMIT players.
+    """
+    with instrumentation.span('graph_layout'):
+        names, positions = graph_layout(graph)
+    with instrumentation.span('graph_edges'):
+        first, second, _, synergy = graph_edges(graph, min_passes, top_k)
+
+    with instrumentation.span('render_graph'):
+        figure = new_figure((10, 7), output_path)
+        axes = figure.add_subplot()
+        # One collection of line segments per synergy bucket, instead of one line per edge
+        segments = np.stack([positions[first], positions[second]], axis=1)
+        high, low = SYNERGY_THRESHOLDS
+        buckets = (synergy >= high, (synergy > low) & (synergy < high), synergy <= low)
+        for color, bucket in zip(EDGE_COLORS, buckets):
+            if bucket.any():
+                axes.add_collection(LineCollection(segments[bucket], colors=color, linewidths=1.0, alpha=0.7, zorder=1))
+
+        lineup_names = {player.name for player in ideal_lineup}
+        node_colors = ['green' if name in lineup_names else 'blue' for name in names]
+        axes.scatter(positions[:, 0], positions[:, 1], s=300, c=node_colors, alpha=0.7, zorder=2)
+        if len(names) <= LABEL_LIMIT:
+            for name, (x, y) in zip(names, positions.tolist()):
+                axes.text(x, y, name, fontsize=10, ha='center', va='center', zorder=3)
+
+        axes.set_xlim(-1.1, 1.1)
+        axes.set_ylim(-1.1, 1.1)
+        axes.set_axis_off()
+        # The interactive graph was never shown with plt.show(), so keep leaving that to the caller
+        finish_figure(figure, output_path, show=False)
+
+
+def circular_layout(count: int) -> np.ndarray:
+    """
+    Return the positions of count nodes spread evenly around the unit circle, starting at (1, 0), like
+    networkx's circular_layout.
+
+    >>> circular_layout(4).round(3).tolist()
+    [[1.0, 0.0], [0.0, 1.0], [-1.0, 0.0], [-0.0, -1.0]]
+    """
+    if count <= 1:
+        return np.zeros((count, 2))
+    theta = np.linspace(0, 2 * np.pi, count + 1)[:-1]
+    return np.column_stack([np.cos(theta), np.sin(theta)])
+
+
+def graph_layout(graph: object) -> tuple[list[str], np.ndarray]:
+    """
+    Return the player names of graph and their positions in the drawing of draw_graph, where positions[i] is the
+    position of names[i]. The layout is kept until the players of graph change, even when their passes and
+    statistics do.
+    """
+    names = tuple(player.name for player in graph.get_players())
+    if names not in _layouts:
+        if len(_layouts) >= LAYOUT_CACHE_SIZE:
+            del _layouts[next(iter(_layouts))]
+        _layouts[names] = circular_layout(len(names))
+    return list(names), _layouts[names]
+
+
+def graph_edges(graph: object, min_passes: float = 0,
+                top_k: Optional[int] = None) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Return the connections of graph drawn by draw_graph, as arrays of the indices (into the names of
+    graph_layout) of their two players, their total passes in both directions and their synergy scores.
+    See draw_graph for min_passes and top_k.
+    """
+    names, _ = graph_layout(graph)
+    matrix, _ = graph.pass_matrix('raw', sparse=True, players=names)
+    rows = np.repeat(np.arange(len(names)), np.diff(matrix.indptr))
+
+    # Every connection is stored in both directions; add them up under (smaller index, larger index)
+    low, high = np.minimum(rows, matrix.indices), np.maximum(rows, matrix.indices)
+    pairs, inverse = np.unique(low * len(names) + high, return_inverse=True)
+    first, second = pairs // max(len(names), 1), pairs % max(len(names), 1)
+    passes = np.bincount(inverse, weights=matrix.data, minlength=len(pairs))
+
+    kept = passes >= min_passes
+    if top_k is not None:
+        kept &= _top_k_mask(first, passes, top_k) | _top_k_mask(second, passes, top_k)
+    first, second, passes = first[kept], second[kept], passes[kept]
+
+    impact = np.array([graph.get_player(name).player_impact_estimate for name in names], dtype=np.float64)
+    return first, second, passes, (impact[first] + impact[second]) / 2
 
-    for passer, receivers in pass_data.items():
-        for receiver, passes in receivers.items():
-            if receiver in matrix.columns:
-                matrix.loc[passer, receiver] = passes
 
-    plt.figure(figsize=(12, 10))
-    sns.heatmap(matrix, annot=True, cmap="Blues", fmt=".3f", linewidths=1)
-    plt.title(f"Player Passing per Minute Synergy Heatmap for {team_name}\n "
-              f"(Note That a Value of 0 Means the Two Players Have Not Played Together)")
-    plt.xlabel("Players (Receiving the Pass)")
-    plt.ylabel("Players (Making the Pass)")
-    plt.subplots_adjust(left=0.17, right=1.05, top=0.90, bottom=0.28)
-    plt.show()
+def _top_k_mask(nodes: np.ndarray, weights: np.ndarray, k: int) -> np.ndarray:
+    """Return which edges are among the k heaviest edges of their node in nodes."""
+    order = np.lexsort((-weights, nodes))
+    sorted_nodes = nodes[order]
+    starts = np.searchsorted(sorted_nodes, sorted_nodes, side='left')
+    mask = np.zeros(len(nodes), dtype=bool)
+    mask[order] = np.arange(len(nodes)) - starts < k
+    return mask
 
 
 if __name__ == '__main__':
@@ -50,6 +212,7 @@ if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config={
         'max-line-length': 120,
-        'extra-imports': ['numpy', 'pandas', 'seaborn', 'matplotlib', 'matplotlib.pyplot'],
+        'extra-imports': ['numpy', 'pandas', 'seaborn', 'matplotlib', 'matplotlib.pyplot',
+                          'matplotlib.collections', 'matplotlib.figure', 'instrumentation'],
         'disable': ['E9992']
     })
@@ -0,0 +1,440 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module contains the what-if engine for roster moves. It holds the LineupSimulation of every team in a league
+and applies hypothetical moves to them in place, without copying or reloading any graph:
+    - add_player: sign a player to a team
+    - remove_player: release a player from a team
+    - swap: trade one player of a team for one player of another team
+
+Each move reports the new lineup of every team it changed and the change in the total player impact estimate of
+that lineup. Since a player's player_impact_estimate only depends on their own statistics, a move only changes the
+positions of the players it moves, so only those positions of the lineup are looked at again. Every move is
+recorded in a journal, so it can be undone with undo or rollback.
+
+score_swaps and score_league_swaps rank every possible one-for-one trade between two teams, or between every two
+teams of the league, without applying any of them. Pairs of teams are scored in a pool of worker processes.
+"""
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from typing import Callable, NamedTuple, Optional
+
+from classes import _Player
+from league import find_team_files, team_name
+from main import LineupSimulation
+from sweep import LINEUP_POSITIONS
+
+# highest_in_position always looks for two players, so every team needs two players of each lineup position
+MIN_POSITION_PLAYERS = 2
+
+# The slice of the lineup from 'LineupSimulation.generate_lineup' holding each position
+LINEUP_SLICES = {'Guard': slice(0, 2), 'Forward': slice(2, 4), 'Center': slice(4, 5)}
+
+# A player as a row for scoring trades: the name, the primary position and the player_impact_estimate
+PlayerRow = tuple[str, str, float]
+
+
+class MoveResult(NamedTuple):
+    """ The effect of a roster move.
+
+    Instance Attributes:
+        - lineups: Maps each team the move changed to the names of its new lineup
+        - pie_deltas: Maps each team the move changed to the change in the total player_impact_estimate of its
+                      lineup
+    """
+    lineups: dict[str, list[str]]
+    pie_deltas: dict[str, float]
+
+
+class SwapScore(NamedTuple):
+    """ The effect of trading player1 of team1 for player2 of team2, without applying it.
+
+    Instance Attributes:
+        - team1: The team giving up player1
+        - player1: The name of the player moving from team1 to team2
+        - team2: The team giving up player2
+        - player2: The name of the player moving from team2 to team1
+        - pie_delta1: The change in the total player_impact_estimate of the lineup of team1
+        - pie_delta2: The change in the total player_impact_estimate of the lineup of team2
+    """
+    team1: str
+    player1: str
+    team2: str
+    player2: str
+    pie_delta1: float
+    pie_delta2: float
+
+
+class WhatIfEngine:
+    """ A league of LineupSimulation classes that roster moves are applied to in place.
+
+    Instance Attributes:
+        - teams: Maps each team name to its LineupSimulation, whose team_graph is a Graph or an ArrayGraph
+
+    Representation Invariants:
+        - every player is on at most one team
+    """
+    # Private Instance Attributes:
+    #     - _journal: The undo steps of every applied move, from the oldest; a move can have several steps
+    teams: dict[str, LineupSimulation]
+    _journal: list[list[Callable[[], None]]]
+
+    def __init__(self, teams: dict[str, LineupSimulation]) -> None:
+        """
+        Initialize a new WhatIfEngine of the given teams. The teams are changed in place by every move.
+        """
+        self.teams = teams
+        self._journal = []
+
+    @classmethod
+    def from_files(cls, source: str, backend: str = 'dict') -> WhatIfEngine:
+        """
+        Return a new WhatIfEngine of every team datafile given by source (see league.find_team_files), where each
+        team is named after its datafile, like 'LAL' for 'LAL.json'. backend chooses the graph class of every team,
+        as in LineupSimulation.
+        """
+        return cls({team_name(filename): LineupSimulation(filename, backend=backend)
+                    for filename in find_team_files(source)})
+
+    def add_player(self, team: str, player: _Player) -> MoveResult:
+        """
+        Add player, who has no connections and is on no team of this engine, to the given team.
+
+        Preconditions:
+            - team in self.teams
+            - player.connections == []
+        """
+        if player.name in self.teams[team].players:
+            raise ValueError(f'{player.name} is already on {team}')
+
+        pie_before = lineup_pie(self.teams[team].lineup)
+        self._journal.append([])
+        self._add(team, player)
+        self._refresh_lineup(team, [], [player])
+        return self._result({team: pie_before})
+
+    def remove_player(self, team: str, name: str) -> MoveResult:
+        """
+        Remove the player with the given name and all of their connections from the given team.
+
+        Preconditions:
+            - team in self.teams
+        """
+        simulation = self._get_team(team)
+        if name not in simulation.players:
+            raise ValueError(f'{name} is not on {team}')
+        self._check_positions(team, [simulation.players[name][0]], [])
+
+        pie_before = lineup_pie(simulation.lineup)
+        self._journal.append([])
+        self._refresh_lineup(team, [self._remove(team, name)], [])
+        return self._result({team: pie_before})
+
+    def swap(self, team1: str, name1: str, team2: str, name2: str) -> MoveResult:
+        """
+        Trade the player with name1 on team1 for the player with name2 on team2. The traded players lose their
+        connections, since they have not played with their new teammates.
+
+        Preconditions:
+            - team1 in self.teams and team2 in self.teams and team1 != team2
+        """
+        for team, name in ((team1, name1), (team2, name2)):
+            if name not in self._get_team(team).players:
+                raise ValueError(f'{name} is not on {team}')
+        player1, player2 = self.teams[team1].players[name1][0], self.teams[team2].players[name2][0]
+        if name1 != name2 and (name1 in self.teams[team2].players or name2 in self.teams[team1].players):
+            raise ValueError(f'{name1} and {name2} cannot swap teams, since one of them would be on a team twice')
+        self._check_positions(team1, [player1], [player2])
+        self._check_positions(team2, [player2], [player1])
+
+        pies_before = {team1: lineup_pie(self.teams[team1].lineup), team2: lineup_pie(self.teams[team2].lineup)}
+        self._journal.append([])
+        self._remove(team1, name1)
+        self._remove(team2, name2)
+        self._add(team1, player2)
+        self._add(team2, player1)
+        self._refresh_lineup(team1, [player1], [player2])
+        self._refresh_lineup(team2, [player2], [player1])
+        return self._result(pies_before)
+
+    def undo(self) -> bool:
+        """
+        Undo the last move that was not undone yet, and return whether there was one. The teams of the move are
+        restored exactly, including the order of their players and connections.
+
+        >>> engine = WhatIfEngine.from_files('LAL.json')
+        >>> before = list(engine.teams['LAL'].players)
+        >>> engine.remove_player('LAL', 'LeBron James').lineups['LAL'][2]
+        'Markieff Morris'
+        >>> engine.undo(), list(engine.teams['LAL'].players) == before, engine.undo()
+        (True, True, False)
+        """
+        if not self._journal:
+            return False
+        for step in reversed(self._journal.pop()):
+            step()
+        return True
+
+    def checkpoint(self) -> int:
+        """
+        Return a checkpoint that rollback can undo every later move back to.
+        """
+        return len(self._journal)
+
+    def rollback(self, checkpoint: int = 0) -> None:
+        """
+        Undo every move since the given checkpoint, or every move at all by default.
+
+        >>> engine = WhatIfEngine.from_files('LAL.json')
+        >>> _ = engine.remove_player('LAL', 'LeBron James')
+        >>> checkpoint, after_first = engine.checkpoint(), list(engine.teams['LAL'].players)
+        >>> _ = engine.remove_player('LAL', 'Austin Reaves')
+        >>> engine.rollback(checkpoint)
+        >>> list(engine.teams['LAL'].players) == after_first, 'LeBron James' in engine.teams['LAL'].players
+        (True, False)
+        >>> engine.rollback()
+        >>> 'LeBron James' in engine.teams['LAL'].players
+        True
+        """
+        while len(self._journal) > checkpoint:
+            self.undo()
+
+    def score_swaps(self, team1: str, team2: str) -> list[SwapScore]:
+        """
+        Return the SwapScore of every possible trade of one player of team1 for one player of team2 that keeps
+        both teams with enough players of every position, from the best total change in player_impact_estimate.
+        """
+        scores = score_team_pair(team1, team_rows(self._get_team(team1)), team2, team_rows(self._get_team(team2)))
+        return sorted(scores, key=_total_delta, reverse=True)
+
+    def score_league_swaps(self, max_workers: Optional[int] = None,
+                           teams: Optional[list[str]] = None) -> list[SwapScore]:
+        """
+        Return the SwapScore of every possible one-for-one trade between two of the given teams (every team by
+        default), as in score_swaps. The pairs of teams are scored in a pool of max_workers processes, or in this
+        process if max_workers is 1 or there is only one pair.
+        """
+        names = sorted(self.teams) if teams is None else teams
+        rows = {name: team_rows(self._get_team(name)) for name in names}
+        pairs = list(combinations(names, 2))
+
+        if len(pairs) <= 1 or max_workers == 1:
+            results = [score_team_pair(first, rows[first], second, rows[second]) for first, second in pairs]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(score_team_pair, [first for first, _ in pairs],
+                                            [rows[first] for first, _ in pairs], [second for _, second in pairs],
+                                            [rows[second] for _, second in pairs], chunksize=max(1, len(pairs) // 64)))
+
+        return sorted((score for scores in results for score in scores), key=_total_delta, reverse=True)
+
+    def _get_team(self, team: str) -> LineupSimulation:
+        """Return the LineupSimulation of the given team."""
+        if team not in self.teams:
+            raise ValueError(f'Unknown team {team!r}')
+        return self.teams[team]
+
+    def _check_positions(self, team: str, leaving: list[_Player], joining: list[_Player]) -> None:
+        """Raise ValueError if the given team would be left without enough players of some lineup position."""
+        for position, _ in LINEUP_POSITIONS:
+            count = sum(1 for player, _ in self.teams[team].players.values() if player.position[0] == position)
+            count += sum(1 for player in joining if player.position[0] == position)
+            count -= sum(1 for player in leaving if player.position[0] == position)
+            if count < MIN_POSITION_PLAYERS:
+                raise ValueError(f'{team} would have fewer than {MIN_POSITION_PLAYERS} players playing {position}')
+
+    def _remove(self, team: str, name: str) -> _Player:
+        """Remove the player with the given name from team, journal the undo step and return the player. The
+        lineup of team is left to _refresh_lineup."""
+        simulation = self.teams[team]
+        order = simulation.team_graph.get_order()
+        names = list(simulation.players)
+        later = names[names.index(name) + 1:]
+        player, partners = simulation.players.pop(name)
+        removed = simulation.team_graph.remove_player(name)
+
+        def undo() -> None:
+            simulation.team_graph.add_player(player)
+            for connection in removed:
+                simulation.team_graph.insert_connection(connection)
+            simulation.team_graph.restore_order(order)
+            # Move the players after name back behind it, so the order of the heatmap rows and the ties of
+            # highest_in_position are the same as before the move
+            simulation.players[name] = (player, partners)
+            for other in later:
+                simulation.players[other] = simulation.players.pop(other)
+
+        self._journal[-1].append(undo)
+        return player
+
+    def _add(self, team: str, player: _Player) -> None:
+        """Add player to team and journal the undo step. The lineup of team is left to _refresh_lineup."""
+        simulation = self.teams[team]
+        previous_team = player.team
+        if simulation.players:
+            player.team = next(iter(simulation.players.values()))[0].team
+        simulation.team_graph.add_player(player)
+        simulation.players[player.name] = (player, [])
+
+        def undo() -> None:
+            simulation.team_graph.remove_player(player.name)
+            del simulation.players[player.name]
+            player.team = previous_team
+
+        self._journal[-1].append(undo)
+
+    def _refresh_lineup(self, team: str, leaving: list[_Player], joining: list[_Player]) -> None:
+        """Update the lineup of team after the leaving players left it and the joining players joined it, and
+        journal the undo step. Only a position that lost a lineup player is searched again with
+        highest_in_position; a joining player is just compared with the lineup players of their position."""
+        simulation = self.teams[team]
+        lineup = list(simulation.lineup)
+        searched = set()
+        for player in leaving:
+            position = player.position[0]
+            if player in simulation.lineup and position not in searched:
+                lineup[LINEUP_SLICES[position]] = simulation.highest_in_position(position)[:_slots(position)]
+                searched.add(position)
+        for player in joining:
+            if player.position[0] not in searched:
+                lineup = _lineup_with(lineup, player)
+
+        previous_lineup = simulation.lineup
+        simulation.lineup = lineup
+
+        def undo() -> None:
+            simulation.lineup = previous_lineup
+
+        self._journal[-1].append(undo)
+
+    def _result(self, pies_before: dict[str, float]) -> MoveResult:
+        """Return the MoveResult of the teams in pies_before, which maps them to their lineup totals before."""
+        lineups = {team: [player.name for player in self.teams[team].lineup] for team in pies_before}
+        deltas = {team: lineup_pie(self.teams[team].lineup) - pie for team, pie in pies_before.items()}
+        return MoveResult(lineups, deltas)
+
+
+def lineup_pie(lineup: list[_Player]) -> float:
+    """
+    Return the total player_impact_estimate of the players in lineup.
+    """
+    return sum(player.player_impact_estimate for player in lineup)
+
+
+def team_rows(simulation: LineupSimulation) -> list[PlayerRow]:
+    """
+    Return a PlayerRow of every player of simulation, which is all that score_team_pair needs.
+    """
+    return [(player.name, player.position[0], player.player_impact_estimate)
+            for player, _ in simulation.players.values()]
+
+
+def score_team_pair(team1: str, rows1: list[PlayerRow], team2: str, rows2: list[PlayerRow]) -> list[SwapScore]:
+    """
+    Return the SwapScore of every possible trade of one player in rows1 (of team1) for one player in rows2 (of
+    team2) that keeps both teams with at least MIN_POSITION_PLAYERS players of every lineup position, and never
+    puts two players with the same name on one team.
+
+    Each team keeps the best few player_impact_estimate values of every position, so scoring a trade only
+    changes one or two short lists instead of looking at the whole team again.
+
+    >>> rows1 = [('A', 'Guard', 3.0), ('B', 'Guard', 1.0), ('C', 'Guard', 0.5), ('D', 'Forward', 2.0),
+    ...          ('E', 'Forward', 2.0), ('F', 'Center', 1.0), ('G', 'Center', 1.0)]
+    >>> rows2 = [('V', 'Guard', 4.0), ('W', 'Guard', 1.0), ('X', 'Forward', 1.0), ('Y', 'Forward', 1.0),
+    ...          ('Z', 'Center', 2.0), ('Q', 'Center', 1.0), ('R', 'Forward', 0.5)]
+    >>> [score[3:] for score in score_team_pair('T1', rows1, 'T2', rows2) if score.player1 == 'C']
+    [('V', 3.0, -3.5), ('W', 0.0, -0.5), ('X', 0.0, -0.5), ('Y', 0.0, -0.5), ('R', 0.0, 0.0)]
+    """
+    tops1, tops2 = _position_tops(rows1), _position_tops(rows2)
+    pie1, pie2 = _tops_pie(tops1), _tops_pie(tops2)
+    names1, names2 = {row[0] for row in rows1}, {row[0] for row in rows2}
+    scores = []
+    for name1, position1, impact1 in rows1:
+        for name2, position2, impact2 in rows2:
+            if name1 != name2 and (name1 in names2 or name2 in names1):
+                continue
+            new_pie1 = _traded_pie(tops1, position1, impact1, position2, impact2)
+            new_pie2 = _traded_pie(tops2, position2, impact2, position1, impact1)
+            if new_pie1 is not None and new_pie2 is not None:
+                scores.append(SwapScore(team1, name1, team2, name2, new_pie1 - pie1, new_pie2 - pie2))
+    return scores
+
+
+def _slots(position: str) -> int:
+    """Return the number of players of the given position in a lineup."""
+    return LINEUP_SLICES[position].stop - LINEUP_SLICES[position].start
+
+
+def _lineup_with(lineup: list[_Player], player: _Player) -> list[_Player]:
+    """Return lineup after player joined the team as its last player, like generate_lineup would choose it.
+    player only takes a spot from a lineup player with a strictly lower player_impact_estimate, since ties go to
+    the player that comes first in highest_in_position."""
+    position = player.position[0]
+    holders = lineup[LINEUP_SLICES[position]]
+    for i, holder in enumerate(holders):
+        if player.player_impact_estimate > holder.player_impact_estimate:
+            holders = (holders[:i] + [player] + holders[i:])[:len(holders)]
+            break
+
+    new_lineup = list(lineup)
+    new_lineup[LINEUP_SLICES[position]] = holders
+    return new_lineup
+
+
+def _position_tops(rows: list[PlayerRow]) -> dict[str, tuple[list[float], int]]:
+    """Return a dict mapping each lineup position to the best few player_impact_estimate values of that position
+    in rows, from the highest, and the number of players of that position. A trade removes at most one player, so
+    one value more than the lineup needs is kept."""
+    tops = {}
+    for position, count in LINEUP_POSITIONS:
+        impacts = sorted((impact for _, row_position, impact in rows if row_position == position), reverse=True)
+        tops[position] = (impacts[:count + 1], len(impacts))
+    return tops
+
+
+def _tops_pie(tops: dict[str, tuple[list[float], int]]) -> float:
+    """Return the total player_impact_estimate of the lineup of the given position tops."""
+    return sum(sum(tops[position][0][:count]) for position, count in LINEUP_POSITIONS)
+
+
+def _traded_pie(tops: dict[str, tuple[list[float], int]], out_position: str, out_impact: float,
+                in_position: str, in_impact: float) -> Optional[float]:
+    """Return the total player_impact_estimate of the lineup of the given position tops after a player of
+    out_position with out_impact leaves and a player of in_position with in_impact joins, or None if that leaves
+    too few players of some position."""
+    total = 0.0
+    for position, count in LINEUP_POSITIONS:
+        impacts, size = tops[position]
+        if position == out_position or position == in_position:
+            impacts = list(impacts)
+            if position == out_position:
+                size -= 1
+                if out_impact in impacts:
+                    impacts.remove(out_impact)
+            if position == in_position:
+                size += 1
+                impacts.append(in_impact)
+                impacts.sort(reverse=True)
+            if size < MIN_POSITION_PLAYERS:
+                return None
+        total += sum(impacts[:count])
+    return total
+
+
+def _total_delta(score: SwapScore) -> float:
+    """Return the total change in player_impact_estimate of both teams in score."""
+    return score.pie_delta1 + score.pie_delta2
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['concurrent.futures', 'itertools', 'classes', 'league', 'main', 'sweep'],
+        'disable': ['E9998', 'R0913']
+    })
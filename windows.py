@@ -0,0 +1,305 @@
+"""CSC111 Project 2:
+Top Hoops: NBA Optimal Basketball Lineup
+Abdullah Alhidary, Houssam Yaacoub, Justin Peng, Muhammad Rafie
+
+This module contains the game log, which keeps the statistics of every single game of a season instead of only the
+season totals in the _Player and _Connection classes. It answers questions about any range of games, such as
+"who is the best lineup over the last 10 games?", without adding the games up again.
+
+Every statistic of every player and every pass edge is kept as a prefix sum over the games: row g holds the total
+of the first g games. The total of games start to stop - 1 is then row stop minus row start, so the player impact
+estimates, pass rates and lineup of any range of games take the same few array operations however long the range
+is. sliding_lineups does this for every window of a season at once.
+
+A game is a list of records in the same format as the LAL.json and DAL.json files, holding the statistics of the
+players who played in that game (like for LineupSimulation.apply_game). A game log file has one game per line.
+"""
+from __future__ import annotations
+import json
+from typing import Iterator, NamedTuple, Optional, Union
+
+import numpy as np
+
+from array_graph import CSRMatrix, round3
+from impact import POSITIONS, impact_from_stats, weight_matrix
+from pass_matrix import build_pass_matrix
+from classes import POSITION_WEIGHTS, whole_number
+from streaming import iter_ndjson
+from sweep import select_lineups
+
+# The columns of the player prefix sums, and the columns of the pass edge prefix sums
+GAME_STATS = ('minutes', 'points', 'rebounds', 'assists', 'steals', 'blocks')
+EDGE_STATS = ('total_passes', 'assists', 'minutes_together')
+
+
+class GameWindow(NamedTuple):
+    """ The lineup of one range of games.
+
+    Instance Attributes:
+        - start: The index of the first game of the range
+        - stop: The index after the last game of the range
+        - lineup: The names of the lineup chosen like 'LineupSimulation.generate_lineup' over the range
+        - lineup_pie: The total player impact estimate of the lineup over the range
+    """
+    start: int
+    stop: int
+    lineup: list[str]
+    lineup_pie: float
+
+
+class GameLog:
+    """ The statistics of every game of a team (or a league), indexed by prefix sums.
+
+    Instance Attributes:
+        - players: The player names, in the order they first played
+        - positions: positions[i] is the list of positions of players[i], from their first game
+        - teams: teams[i] is the team of players[i], from their first game
+
+    Representation Invariants:
+        - len(self.players) == len(self.positions) == len(self.teams)
+    """
+    # Private Instance Attributes:
+    #     - _player_ids: Maps each player name to its index in self.players
+    #     - _edges: The (passer index, receiver index) of every pass edge, in the order they first appeared
+    #     - _edge_ids: Maps each pass edge to its index in self._edges
+    #     - _games: The (player indices, GAME_STATS rows, edge indices, EDGE_STATS rows) of every game
+    #     - _player_sums: The player prefix sums, of shape (games + 1, players, len(GAME_STATS)), or None if a game
+    #                     was added since they were built
+    #     - _edge_sums: The pass edge prefix sums, of shape (games + 1, edges, len(EDGE_STATS)), or None
+    players: list[str]
+    positions: list[list[str]]
+    teams: list[str]
+    _player_ids: dict[str, int]
+    _edges: list[tuple[int, int]]
+    _edge_ids: dict[tuple[int, int], int]
+    _games: list[tuple[list[int], list[list[float]], list[int], list[list[float]]]]
+    _player_sums: Optional[np.ndarray]
+    _edge_sums: Optional[np.ndarray]
+
+    def __init__(self, games: Optional[list[list[dict]]] = None) -> None:
+        """
+        Initialize a new GameLog holding the given games, in order.
+
+        Preconditions:
+            - every game in games in same format as the LAL.json and DAL.json files, holding a single game
+        """
+        self.players, self.positions, self.teams = [], [], []
+        self._player_ids = {}
+        self._edges, self._edge_ids = [], {}
+        self._games = []
+        self._player_sums, self._edge_sums = None, None
+        for game in games or []:
+            self.add_game(game)
+
+    @classmethod
+    def load(cls, filename: str) -> GameLog:
+        """
+        Return a new GameLog of the game log file with the given filename, which has one JSON game per line.
+        """
+        return cls(list(iter_ndjson(filename)))
+
+    def save(self, filename: str) -> None:
+        """
+        Write every game of this log to a game log file with the given filename, one JSON game per line.
+        """
+        with open(filename, 'w') as f:
+            for game in range(self.num_games()):
+                f.write(json.dumps(self.window_records(game, game + 1)) + '\n')
+
+    def num_games(self) -> int:
+        """
+        Return the number of games in this log.
+        """
+        return len(self._games)
+
+    def add_game(self, game: list[dict]) -> None:
+        """
+        Add the statistics of one more game to the end of this log. Players and pass edges seen for the first
+        time are added. The prefix sums are rebuilt the next time they are needed.
+
+        Preconditions:
+            - game in same format as the LAL.json and DAL.json files, holding the statistics of a single game
+        """
+        player_ids, player_rows, edge_ids, edge_rows = [], [], [], []
+        for record in game:
+            passer = self._player_id(record['name'], record['positions'], record['team'])
+            defense = record['defensive_stats']
+            assists = sum(passes['assists'] for passes in record['passes_to'].values())
+            player_ids.append(passer)
+            player_rows.append([defense['minutes'], defense['points'], defense['rebounds'], assists,
+                                defense['steals'], defense['blocks']])
+
+            for receiver_name, passes in record['passes_to'].items():
+                receiver = self._player_id(receiver_name, passes['positions'], record['team'])
+                if (passer, receiver) not in self._edge_ids:
+                    self._edge_ids[(passer, receiver)] = len(self._edges)
+                    self._edges.append((passer, receiver))
+                edge_ids.append(self._edge_ids[(passer, receiver)])
+                edge_rows.append([passes[stat] for stat in EDGE_STATS])
+
+        self._games.append((player_ids, player_rows, edge_ids, edge_rows))
+        self._player_sums, self._edge_sums = None, None
+
+    def player_totals(self, start: int, stop: int) -> np.ndarray:
+        """
+        Return the total GAME_STATS of every player over games start to stop - 1, as an array with one row per
+        player in self.players.
+
+        Preconditions:
+            - 0 <= start <= stop <= self.num_games()
+        """
+        player_sums, _ = self._prefix_sums()
+        return player_sums[stop] - player_sums[start]
+
+    def window_impact(self, start: int, stop: int,
+                      weights: Optional[dict[str, dict[str, float]]] = None) -> dict[str, float]:
+        """
+        Return a dict mapping every player who played in games start to stop - 1 to their player impact estimate
+        over those games, calculated like _Player.calculate_player_impact with the given weight table (the default
+        is POSITION_WEIGHTS in 'classes.py').
+
+        >>> log = GameLog([[{'name': 'Bob', 'positions': ['Center'], 'team': 'LAL', 'passes_to': {},
+        ...                  'defensive_stats': {'minutes': 10, 'points': 10, 'rebounds': 5, 'steals': 0,
+        ...                                      'blocks': 0}}]])
+        >>> log.window_impact(0, 1)
+        {'Bob': 1.75}
+
+        Preconditions:
+            - 0 <= start <= stop <= self.num_games()
+        """
+        impact = self._window_impacts(np.array([start]), np.array([stop]), weights)[0]
+        return {name: value for name, value in zip(self.players, impact.tolist()) if value != -np.inf}
+
+    def window_pass_matrix(self, start: int, stop: int, normalization: str = 'per_minute',
+                           sparse: bool = False) -> tuple[Union[np.ndarray, CSRMatrix], list[str]]:
+        """
+        Return the pass matrix (see 'pass_matrix.py') of games start to stop - 1 with the given normalization,
+        alongside the player names of its rows and columns, which are all of self.players.
+
+        Preconditions:
+            - 0 <= start <= stop <= self.num_games()
+        """
+        _, edge_sums = self._prefix_sums()
+        totals = edge_sums[stop] - edge_sums[start]
+        edges = np.array(self._edges, dtype=np.intp).reshape(-1, 2)
+        played = (totals[:, 0] > 0) | (totals[:, 2] > 0)
+        edges, totals = edges[played], totals[played]
+        matrix = build_pass_matrix(edges[:, 0], edges[:, 1], totals[:, 0], totals[:, 1], totals[:, 2],
+                                   len(self.players), normalization, sparse)
+        return matrix, list(self.players)
+
+    def window_lineup(self, start: int, stop: int,
+                      weights: Optional[dict[str, dict[str, float]]] = None) -> GameWindow:
+        """
+        Return the lineup over games start to stop - 1, chosen like 'LineupSimulation.generate_lineup' from the
+        players who played in those games.
+
+        Preconditions:
+            - 0 <= start < stop <= self.num_games()
+        """
+        return next(self._windows(np.array([start]), np.array([stop]), weights))
+
+    def sliding_lineups(self, window: int, step: int = 1,
+                        weights: Optional[dict[str, dict[str, float]]] = None) -> Iterator[GameWindow]:
+        """
+        Yield the GameWindow of every range of window games, starting from game 0 and moving step games at a time.
+        The lineups of all the ranges are calculated together.
+
+        Preconditions:
+            - 1 <= window <= self.num_games()
+            - step >= 1
+        """
+        starts = np.arange(0, self.num_games() - window + 1, step)
+        return self._windows(starts, starts + window, weights)
+
+    def window_records(self, start: int, stop: int) -> list[dict]:
+        """
+        Return the total statistics over games start to stop - 1 as records in the same format as the LAL.json
+        and DAL.json files, holding the players who played in those games. These can be passed to
+        LineupSimulation.from_records to get a LineupSimulation of just those games.
+
+        Preconditions:
+            - 0 <= start <= stop <= self.num_games()
+        """
+        player_totals = self.player_totals(start, stop).tolist()
+        _, edge_sums = self._prefix_sums()
+        edge_totals = (edge_sums[stop] - edge_sums[start]).tolist()
+
+        records = {}
+        for i, totals in enumerate(player_totals):
+            if totals[0] > 0:
+                stats = dict(zip(GAME_STATS, (whole_number(value) for value in totals)))
+                del stats['assists']
+                records[i] = {'name': self.players[i], 'positions': list(self.positions[i]), 'team': self.teams[i],
+                              'passes_to': {}, 'defensive_stats': stats}
+
+        for (passer, receiver), totals in zip(self._edges, edge_totals):
+            if passer in records and receiver in records and (totals[0] > 0 or totals[2] > 0):
+                passes = {'positions': list(self.positions[receiver])}
+                passes.update(zip(EDGE_STATS, (whole_number(value) for value in totals)))
+                records[passer]['passes_to'][self.players[receiver]] = passes
+        return list(records.values())
+
+    def _player_id(self, name: str, positions: list[str], team: str) -> int:
+        """Return the index of the player with the given name, adding them if they are new."""
+        if name not in self._player_ids:
+            self._player_ids[name] = len(self.players)
+            self.players.append(name)
+            self.positions.append(list(positions))
+            self.teams.append(team)
+        return self._player_ids[name]
+
+    def _prefix_sums(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return the player and pass edge prefix sums, building them if a game was added since the last time."""
+        if self._player_sums is None:
+            games, players, edges = len(self._games), len(self.players), len(self._edges)
+            player_sums = np.zeros((games + 1, players, len(GAME_STATS)))
+            edge_sums = np.zeros((games + 1, edges, len(EDGE_STATS)))
+            for game, (player_ids, player_rows, edge_ids, edge_rows) in enumerate(self._games, start=1):
+                np.add.at(player_sums[game], player_ids, np.array(player_rows).reshape(-1, len(GAME_STATS)))
+                np.add.at(edge_sums[game], edge_ids, np.array(edge_rows).reshape(-1, len(EDGE_STATS)))
+            self._player_sums = np.cumsum(player_sums, axis=0)
+            self._edge_sums = np.cumsum(edge_sums, axis=0)
+        return self._player_sums, self._edge_sums
+
+    def _position_ids(self) -> np.ndarray:
+        """Return the index in POSITIONS of the primary position of every player."""
+        return np.array([POSITIONS.index(positions[0]) for positions in self.positions], dtype=np.intp)
+
+    def _window_impacts(self, starts: np.ndarray, stops: np.ndarray,
+                        weights: Optional[dict[str, dict[str, float]]]) -> np.ndarray:
+        """Return the player impact estimate of every player over every range of games starts[k] to stops[k] - 1,
+        as an array of shape (len(starts), players), with -inf for players who did not play in a range."""
+        player_sums, _ = self._prefix_sums()
+        totals = player_sums[stops] - player_sums[starts]
+        minutes = totals[..., :1]
+        # The per-minute averages, rounded like the avg_ attributes of _Player
+        averages = np.zeros(totals[..., 1:].shape)
+        np.divide(totals[..., 1:], minutes, out=averages, where=minutes > 0)
+        impact = impact_from_stats(round3(averages), self._position_ids(),
+                                   weight_matrix(POSITION_WEIGHTS if weights is None else weights))
+        return np.where(minutes[..., 0] > 0, impact, -np.inf)
+
+    def _windows(self, starts: np.ndarray, stops: np.ndarray,
+                 weights: Optional[dict[str, dict[str, float]]]) -> Iterator[GameWindow]:
+        """Yield the GameWindow of every range of games starts[k] to stops[k] - 1."""
+        impact = self._window_impacts(starts, stops, weights)
+        lineups = select_lineups(impact, self._position_ids())
+        lineup_impact = np.take_along_axis(impact, lineups, axis=1)
+        for start, stop, lineup, values in zip(starts.tolist(), stops.tolist(), lineups.tolist(),
+                                               lineup_impact.tolist()):
+            if -np.inf in values:
+                raise ValueError(f'Too few players of some position played in games {start} to {stop - 1}')
+            yield GameWindow(start, stop, [self.players[i] for i in lineup], sum(values))
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['json', 'numpy', 'array_graph', 'impact', 'pass_matrix', 'classes', 'streaming', 'sweep'],
+        'disable': ['E9998']
+    })